@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+import time
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from mongo_codec import parse_stored_datetime
+
+# Attendance rows carrying this marker are covered by the unique
+# (employee_id, date) partial index, so each employee has one row per day.
+# Legacy rows without it are left out of the index instead of blocking its build.
+DAILY_ATTENDANCE_MARKER = {"daily_unique": True}
+
+# Employee names change rarely, so check-ins read them from memory
+EMPLOYEE_NAME_CACHE_TTL_SECONDS = 300
+EMPLOYEE_NAME_CACHE_SIZE = 10000
+
+class EmployeeNameCache:
+    """TTL + LRU cache of employee_id -> full_name for the check-in path"""
+
+    def __init__(self, maxsize: int = EMPLOYEE_NAME_CACHE_SIZE, ttl: float = EMPLOYEE_NAME_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._names: "OrderedDict[str, tuple]" = OrderedDict()
+        # Full employee_id -> full_name map for bulk validation
+        self._all_names: Optional[Dict[str, str]] = None
+        self._all_names_expires = 0.0
+
+    async def get(self, db, employee_id: str) -> Optional[str]:
+        """Full name of an employee, or None if the employee does not exist"""
+        cached = self._names.get(employee_id)
+        if cached is not None and cached[1] > time.monotonic():
+            self._names.move_to_end(employee_id)
+            return cached[0]
+
+        employee = await db.employees.find_one({"employee_id": employee_id}, {"_id": 0, "full_name": 1})
+        if not employee:
+            self._names.pop(employee_id, None)
+            return None
+
+        self._names[employee_id] = (employee["full_name"], time.monotonic() + self.ttl)
+        self._names.move_to_end(employee_id)
+        while len(self._names) > self.maxsize:
+            self._names.popitem(last=False)
+        return employee["full_name"]
+
+    async def get_all(self, db) -> Dict[str, str]:
+        """employee_id -> full_name for every employee, loaded with one query"""
+        if self._all_names is not None and self._all_names_expires > time.monotonic():
+            return self._all_names
+
+        names = {}
+        async for employee in db.employees.find({}, {"_id": 0, "employee_id": 1, "full_name": 1}):
+            names[employee["employee_id"]] = employee.get("full_name", "")
+
+        self._all_names = names
+        self._all_names_expires = time.monotonic() + self.ttl
+        return names
+
+    def invalidate(self, employee_id: str = None):
+        """Forget one employee (or everyone) after employee changes"""
+        self._all_names = None
+        if employee_id is None:
+            self._names.clear()
+        else:
+            self._names.pop(employee_id, None)
+
+employee_name_cache = EmployeeNameCache()
+
+async def check_in_attendance(db, attendance: Dict) -> bool:
+    """
+    Insert today's attendance row in a single upsert
+
+    `attendance` is the prepared attendance document. Returns False when the
+    employee already has a row for that date; the unique daily index makes
+    this hold even for simultaneous requests.
+    """
+    key = {"employee_id": attendance["employee_id"], "date": attendance["date"], **DAILY_ATTENDANCE_MARKER}
+    new_fields = {field: value for field, value in attendance.items() if field not in key}
+
+    try:
+        result = await db.attendance.update_one(key, {"$setOnInsert": new_fields}, upsert=True)
+    except DuplicateKeyError:
+        return False
+    return result.upserted_id is not None
+
+def build_logout_update(logout_time: datetime, location: Dict) -> list:
+    """Pipeline update closing an attendance row and computing its hours in MongoDB"""
+    login_time = {"$convert": {"input": "$login_time", "to": "date", "onError": None, "onNull": None}}
+    elapsed_ms = {"$subtract": [logout_time, login_time]}
+
+    return [{"$set": {
+        "logout_time": logout_time,
+        "logout_location": {"$literal": location},
+        "total_hours": {"$cond": [
+            {"$eq": [login_time, None]},
+            None,
+            {"$round": [{"$divide": [elapsed_ms, 3600000]}, 2]}
+        ]},
+        "status": "Logged Out"
+    }}]
+
+async def check_out_attendance(db, employee_id: str, attendance_date: str,
+                               logout_time: datetime, location: Dict) -> Optional[Dict]:
+    """
+    Close the employee's open attendance row for a date in one round trip
+
+    Returns the updated row, or None when there is no open check-in.
+    """
+    record = await db.attendance.find_one_and_update(
+        {"employee_id": employee_id, "date": attendance_date, "status": "Logged In"},
+        build_logout_update(logout_time, location),
+        projection={"_id": 1, "login_time": 1, "logout_time": 1, "total_hours": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if record is None or record.get("total_hours") is not None:
+        return record
+
+    # login_time MongoDB could not parse; work the hours out here instead
+    login_time = parse_stored_datetime(record["login_time"])
+    record["total_hours"] = round((logout_time - login_time).total_seconds() / 3600, 2)
+    await db.attendance.update_one({"_id": record["_id"]}, {"$set": {"total_hours": record["total_hours"]}})
+    return record
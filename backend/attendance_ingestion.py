@@ -0,0 +1,405 @@
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional
+import csv
+import json
+import uuid
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from attendance_checkin import DAILY_ATTENDANCE_MARKER, employee_name_cache
+from attendance_rollups import ROLLUP_REBUILD_BATCH_SIZE, rebuild_attendance_rollups
+from pdf_cache import pdf_cache
+from working_employee_management import OFFICE_TIMEZONE, calculate_login_lateness
+
+# Day records are written with one bulk_write per batch of this size
+BULK_ATTENDANCE_BATCH_SIZE = 5000
+
+# Only the first rejections are returned in the response; the rest are counted
+MAX_REPORTED_REJECTIONS = 1000
+
+PUNCH_DIRECTIONS = ["in", "out"]
+
+# Longest punch line accepted, in bytes; longer lines are rejected without
+# being buffered, so a line with no newline cannot hold the body in memory
+MAX_PUNCH_LINE_BYTES = 4096
+
+class DayPunches:
+    """Earliest check-in and latest check-out seen for one employee and date"""
+    __slots__ = ("employee_id", "date", "first_in", "last_out", "first_punch", "last_punch",
+                 "undirected_punches", "punches", "first_row", "device_id")
+
+    def __init__(self, employee_id: str, date: str, row_number: int):
+        self.employee_id = employee_id
+        self.date = date
+        self.first_in: Optional[datetime] = None
+        self.last_out: Optional[datetime] = None
+        self.first_punch: Optional[datetime] = None
+        self.last_punch: Optional[datetime] = None
+        self.undirected_punches = 0
+        self.punches = 0
+        self.first_row = row_number
+        self.device_id = ""
+
+    def add(self, punch_time: datetime, direction: str):
+        self.punches += 1
+        if direction == "in":
+            if self.first_in is None or punch_time < self.first_in:
+                self.first_in = punch_time
+        elif direction == "out":
+            if self.last_out is None or punch_time > self.last_out:
+                self.last_out = punch_time
+        else:
+            self.undirected_punches += 1
+            if self.first_punch is None or punch_time < self.first_punch:
+                self.first_punch = punch_time
+            if self.last_punch is None or punch_time > self.last_punch:
+                self.last_punch = punch_time
+
+    def pair(self) -> tuple:
+        """(login_time, logout_time) for the day; either may be None"""
+        login_time = self.first_in
+        logout_time = self.last_out
+        if self.undirected_punches:
+            # Without a direction the first punch is the check-in and the last the check-out
+            if login_time is None or self.first_punch < login_time:
+                login_time = self.first_punch
+            if self.undirected_punches > 1 or self.first_in is not None:
+                if logout_time is None or self.last_punch > logout_time:
+                    logout_time = self.last_punch
+        if login_time is not None and logout_time is not None and logout_time <= login_time:
+            logout_time = None
+        return login_time, logout_time
+
+def _decode_line(line: bytes) -> Optional[str]:
+    """Decode one UTF-8 line; None when the bytes are not valid UTF-8"""
+    try:
+        return line.decode("utf-8-sig").rstrip("\r")
+    except UnicodeDecodeError:
+        return None
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[str]]:
+    """
+    Split a streamed request body into lines without buffering the whole body
+
+    Lines that are not valid UTF-8 or longer than MAX_PUNCH_LINE_BYTES are
+    yielded as None so they can be rejected individually instead of failing
+    the whole import. Only the unterminated tail is kept between chunks, and
+    an overlong line is dropped as it streams in.
+    """
+    pending = bytearray()
+    # The current line is already over the limit; skip up to its newline
+    discarding = False
+    async for chunk in chunks:
+        pending += chunk
+        start = 0
+        while True:
+            end = pending.find(b"\n", start)
+            if end < 0:
+                break
+            if discarding:
+                discarding = False
+            elif end - start > MAX_PUNCH_LINE_BYTES:
+                yield None
+            else:
+                yield _decode_line(bytes(pending[start:end]))
+            start = end + 1
+        del pending[:start]
+
+        if not discarding and len(pending) > MAX_PUNCH_LINE_BYTES:
+            yield None
+            discarding = True
+        if discarding:
+            pending.clear()
+    if pending and not discarding:
+        yield _decode_line(bytes(pending))
+
+async def iter_punch_rows(lines: AsyncIterator[Optional[str]], source_format: str) -> AsyncIterator[tuple]:
+    """Yield (row_number, row dict or error message) for NDJSON or CSV punch lines"""
+    header = None
+    row_number = 0
+    async for line in lines:
+        if line is None:
+            row_number += 1
+            yield row_number, f"Line is not valid UTF-8 or longer than {MAX_PUNCH_LINE_BYTES} bytes"
+            continue
+        if not line.strip():
+            continue
+        if source_format == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [value.strip().lower() for value in values]
+                continue
+            row_number += 1
+            if len(values) != len(header):
+                yield row_number, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            yield row_number, dict(zip(header, (value.strip() for value in values)))
+        else:
+            row_number += 1
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield row_number, "Invalid JSON"
+                continue
+            if not isinstance(row, dict):
+                yield row_number, "Each line must be a JSON object"
+                continue
+            yield row_number, row
+
+def parse_punch_time(value) -> datetime:
+    """Parse a punch timestamp; times without an offset are office local time"""
+    punch_time = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    if punch_time.tzinfo is None:
+        punch_time = punch_time.replace(tzinfo=OFFICE_TIMEZONE)
+    return punch_time.astimezone(timezone.utc)
+
+def _is_set(expression) -> Dict:
+    return {"$ne": [{"$ifNull": [expression, None]}, None]}
+
+def _as_date(expression) -> Dict:
+    return {"$convert": {"input": expression, "to": "date", "onError": None, "onNull": None}}
+
+# Second pipeline stage of every day upsert: status and hours from the merged times
+DAY_TOTALS_STAGE = {"$set": {
+    "status": {"$cond": [_is_set("$logout_time"), "Logged Out", "Logged In"]},
+    "total_hours": {"$cond": [
+        {"$and": [_is_set(_as_date("$login_time")), _is_set(_as_date("$logout_time"))]},
+        {"$round": [{"$divide": [
+            {"$subtract": [_as_date("$logout_time"), _as_date("$login_time")]}, 3600000
+        ]}, 2]},
+        {"$ifNull": ["$total_hours", 0.0]}
+    ]},
+    "late_minutes": {"$ifNull": ["$late_minutes", 0]},
+    "late_penalty_amount": {"$ifNull": ["$late_penalty_amount", 0.0]},
+    "logout_location": {"$ifNull": ["$logout_location", {"$literal": {}}]}
+}}
+
+LOGIN_NOT_SET = {"$not": [_is_set("$login_time")]}
+
+def build_day_upsert(day: DayPunches, employee_name: str, login_time: Optional[datetime],
+                     logout_time: Optional[datetime], now: datetime) -> UpdateOne:
+    """
+    Pipeline upsert merging a day's punches into its attendance row
+
+    An existing row keeps the earlier check-in and the later check-out, so
+    re-importing the same file (or mixing it with app check-ins) is idempotent.
+    """
+    location = {"$literal": {"source": "bulk_import", "device_id": day.device_id}}
+    merge = {
+        "id": {"$ifNull": ["$id", str(uuid.uuid4())]},
+        "employee_name": {"$ifNull": ["$employee_name", {"$literal": employee_name}]},
+        "login_location": {"$ifNull": ["$login_location", location]},
+        "created_at": {"$ifNull": ["$created_at", now]}
+    }
+
+    if login_time is not None:
+        lateness = calculate_login_lateness(login_time)
+        is_earlier = {"$or": [LOGIN_NOT_SET, {"$lt": [login_time, _as_date("$login_time")]}]}
+        merge["login_time"] = {"$cond": [is_earlier, login_time, "$login_time"]}
+        merge["late_minutes"] = {"$cond": [is_earlier, lateness["late_minutes"], "$late_minutes"]}
+        merge["late_penalty_amount"] = {"$cond": [
+            is_earlier, lateness["late_penalty_amount"], "$late_penalty_amount"
+        ]}
+
+    if logout_time is not None:
+        merge["logout_time"] = {"$max": [_as_date("$logout_time"), logout_time]}
+        merge["logout_location"] = {"$ifNull": ["$logout_location", location]}
+
+    key = {"employee_id": day.employee_id, "date": day.date, **DAILY_ATTENDANCE_MARKER}
+    return UpdateOne(key, [{"$set": merge}, DAY_TOTALS_STAGE], upsert=True)
+
+class BulkAttendanceImport:
+    """
+    Accumulates punches per employee-day and writes them in bulk batches
+
+    Once BULK_ATTENDANCE_BATCH_SIZE days are buffered, the completed ones
+    (dates before the latest punch seen, as in a time-ordered export) are
+    written and dropped from memory; if too few are complete (an unordered
+    file), every buffered day is written. A day whose punches arrive after
+    it was written is merged into its stored row, as on a re-import. A lone
+    check-out whose check-in is not stored yet stays buffered (up to the
+    batch size) until the end of the file, in case the check-in comes later.
+    """
+
+    def __init__(self, db, employee_names: Dict[str, str]):
+        self.db = db
+        self.employee_names = employee_names
+        self.days: Dict[tuple, DayPunches] = {}
+        self.latest_date = ""
+        # Buffered check-out-only days still waiting for their check-in
+        self.held: set = set()
+        self.total_rows = 0
+        self.accepted_punches = 0
+        self.rejected_punches = 0
+        self.rejections: List[Dict] = []
+        self.days_written = 0
+
+    def reject(self, row_number: int, error: str, employee_id: str = "", punches: int = 1):
+        self.rejected_punches += punches
+        if len(self.rejections) < MAX_REPORTED_REJECTIONS:
+            self.rejections.append({"row": row_number, "employee_id": employee_id, "error": error})
+
+    def add_row(self, row_number: int, row):
+        self.total_rows += 1
+        if isinstance(row, str):
+            self.reject(row_number, row)
+            return
+
+        employee_id = str(row.get("employee_id") or "").strip()
+        if not employee_id:
+            self.reject(row_number, "Missing employee_id")
+            return
+        if employee_id not in self.employee_names:
+            self.reject(row_number, "Unknown employee", employee_id)
+            return
+
+        timestamp = row.get("timestamp") or row.get("punch_time")
+        if not timestamp:
+            self.reject(row_number, "Missing timestamp", employee_id)
+            return
+        try:
+            punch_time = parse_punch_time(timestamp)
+        except ValueError:
+            self.reject(row_number, f"Invalid timestamp: {timestamp}", employee_id)
+            return
+
+        direction = str(row.get("direction") or "").strip().lower()
+        if direction and direction not in PUNCH_DIRECTIONS:
+            self.reject(row_number, f"Invalid direction: {direction}", employee_id)
+            return
+
+        # Attendance dates follow the same UTC day as app check-ins
+        date = punch_time.strftime('%Y-%m-%d')
+        day = self.days.get((employee_id, date))
+        if day is None:
+            day = self.days[(employee_id, date)] = DayPunches(employee_id, date, row_number)
+        day.add(punch_time, direction)
+        if row.get("device_id") and not day.device_id:
+            day.device_id = str(row["device_id"])
+        self.latest_date = max(self.latest_date, date)
+
+    async def _open_days(self, days: List[DayPunches]) -> set:
+        """Keys of days in the batch that already have an attendance row"""
+        if not days:
+            return set()
+        existing = self.db.attendance.find(
+            {"$or": [{"employee_id": day.employee_id, "date": day.date, **DAILY_ATTENDANCE_MARKER} for day in days]},
+            {"_id": 0, "employee_id": 1, "date": 1}
+        )
+        return {(row["employee_id"], row["date"]) async for row in existing}
+
+    def pending_days(self) -> int:
+        """Buffered days counted towards the next write (held check-outs excluded)"""
+        return len(self.days) - len(self.held)
+
+    async def _write_batch(self, days: List[DayPunches], final: bool):
+        now = datetime.now(timezone.utc)
+        operations = []
+        written_days = []
+        logout_only = []
+        for day in days:
+            login_time, logout_time = day.pair()
+            if login_time is None:
+                logout_only.append(day)
+                continue
+            operations.append(build_day_upsert(
+                day, self.employee_names[day.employee_id], login_time, logout_time, now
+            ))
+            written_days.append(day)
+
+        # A check-out on its own can only close a check-in that is already stored
+        open_days = await self._open_days(logout_only)
+        for day in logout_only:
+            if (day.employee_id, day.date) not in open_days:
+                if not final and len(self.held) < BULK_ATTENDANCE_BATCH_SIZE:
+                    self.days[(day.employee_id, day.date)] = day
+                    self.held.add((day.employee_id, day.date))
+                    continue
+                self.reject(day.first_row, f"Check-out without a check-in on {day.date}", day.employee_id, day.punches)
+                continue
+            operations.append(build_day_upsert(
+                day, self.employee_names[day.employee_id], None, day.last_out, now
+            ))
+            written_days.append(day)
+
+        if not operations:
+            return
+        failed = set()
+        try:
+            result = await self.db.attendance.bulk_write(operations, ordered=False)
+            self.days_written += result.upserted_count + result.matched_count
+        except BulkWriteError as e:
+            details = e.details
+            self.days_written += details.get("nUpserted", 0) + details.get("nMatched", 0)
+            for error in details.get("writeErrors", []):
+                day = written_days[error["index"]]
+                failed.add(error["index"])
+                self.reject(day.first_row, f"Could not write {day.date}: {error.get('errmsg', '')}",
+                            day.employee_id, day.punches)
+
+        # Punches count as accepted only once their day is stored
+        stored_days = [day for index, day in enumerate(written_days) if index not in failed]
+        self.accepted_punches += sum(day.punches for day in stored_days)
+        await self._refresh_rollups(stored_days)
+
+    async def _refresh_rollups(self, days: List[DayPunches]):
+        """Rebuild the written employees' rollups for the months touched and drop their cached slips"""
+        affected = {}
+        for day in days:
+            affected.setdefault((int(day.date[:4]), int(day.date[5:7])), set()).add(day.employee_id)
+        for (year, month), employee_ids in sorted(affected.items()):
+            employee_ids = sorted(employee_ids)
+            for start in range(0, len(employee_ids), ROLLUP_REBUILD_BATCH_SIZE):
+                batch = employee_ids[start:start + ROLLUP_REBUILD_BATCH_SIZE]
+                await rebuild_attendance_rollups(self.db, year=year, month=month, employee_ids=batch)
+                await pdf_cache.invalidate(self.db, employee_id={"$in": batch}, year=year, month=month)
+
+    async def _write_days(self, keys: List[tuple], final: bool = False):
+        for start in range(0, len(keys), BULK_ATTENDANCE_BATCH_SIZE):
+            batch = keys[start:start + BULK_ATTENDANCE_BATCH_SIZE]
+            self.held.difference_update(batch)
+            await self._write_batch([self.days.pop(key) for key in batch], final)
+
+    async def write_completed_days(self):
+        """Write buffered days before the latest punch date, or all of them if too few are complete"""
+        completed = [key for key, day in self.days.items() if day.date < self.latest_date]
+        if len(completed) - len(self.held) < BULK_ATTENDANCE_BATCH_SIZE // 2:
+            completed = list(self.days)
+        await self._write_days(completed)
+
+    async def flush(self):
+        """Write every remaining buffered day"""
+        await self._write_days(list(self.days), final=True)
+
+    def summary(self) -> Dict:
+        return {
+            "total_rows": self.total_rows,
+            "accepted_punches": self.accepted_punches,
+            "rejected_punches": self.rejected_punches,
+            "days_written": self.days_written,
+            "rejections": self.rejections,
+            "rejections_truncated": self.rejected_punches > len(self.rejections)
+        }
+
+async def import_attendance_punches(db, chunks: AsyncIterator[bytes], source_format: str = "ndjson") -> Dict:
+    """
+    Import a stream of attendance punches (NDJSON or CSV)
+
+    Each punch has employee_id, timestamp and optionally direction ("in"/"out")
+    and device_id. Punches are validated against the cached employee set and
+    collapsed to one check-in/check-out pair per employee and date. Days are
+    written in bounded batches as the body streams in, so memory stays
+    bounded by the batch size; after each batch only the written employees'
+    rollups for the affected months are rebuilt and their cached slips dropped.
+    """
+    employee_names = await employee_name_cache.get_all(db)
+    bulk_import = BulkAttendanceImport(db, employee_names)
+
+    async for row_number, row in iter_punch_rows(iter_lines(chunks), source_format):
+        bulk_import.add_row(row_number, row)
+        if bulk_import.pending_days() >= BULK_ATTENDANCE_BATCH_SIZE:
+            await bulk_import.write_completed_days()
+    await bulk_import.flush()
+
+    return bulk_import.summary()
@@ -0,0 +1,306 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import os
+from pathlib import Path
+
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from working_calendar import get_month_date_range
+from working_employee_management import (
+    LATE_LOGIN_PENALTY_STRUCTURE, STANDARD_WORKING_HOURS, calculate_overtime_hours,
+    build_monthly_attendance_pipeline
+)
+
+# Rollups are rewritten in bulk batches of this size by the rebuild command
+ROLLUP_REBUILD_BATCH_SIZE = 1000
+
+# Counters shared by rollup documents and the monthly attendance pipeline
+ROLLUP_COUNTER_FIELDS = [
+    "present_days", "late_days", "total_late_minutes",
+    "total_penalty_amount", "total_hours", "overtime_hours"
+]
+
+def get_rollup_key(employee_id: str, year: int, month: int) -> Dict:
+    """Filter identifying one attendance_monthly document"""
+    return {"employee_id": employee_id, "year": year, "month": month}
+
+def empty_rollup(employee_id: str, year: int, month: int) -> Dict:
+    """Rollup document for a month with no attendance"""
+    return {
+        **get_rollup_key(employee_id, year, month),
+        "present_days": 0,
+        "late_days": 0,
+        "total_late_minutes": 0,
+        "total_penalty_amount": 0.0,
+        "total_hours": 0.0,
+        "overtime_hours": 0.0,
+        "max_daily_hours": 0.0,
+        "last_login_time": None,
+        "last_logout_time": None
+    }
+
+async def _seed_rollup(db, employee_id: str, year: int, month: int) -> bool:
+    """
+    Create a missing rollup from the month's raw attendance
+
+    The first event of a month (or the first after rollups were deployed
+    mid-month) would otherwise start the rollup at that one day. The raw
+    record of the event itself is already written, so a freshly seeded rollup
+    includes it; True tells the caller not to count it again.
+    """
+    key = get_rollup_key(employee_id, year, month)
+    if await db.attendance_monthly.find_one(key, {"_id": 1}):
+        return False
+
+    rows = await db.attendance.aggregate(build_rollup_rebuild_pipeline(employee_id, year, month)).to_list(1)
+    document = build_rollup_document(rows[0], year, month) if rows else empty_rollup(employee_id, year, month)
+    try:
+        await db.attendance_monthly.insert_one({**document, "updated_at": datetime.now(timezone.utc)})
+    except DuplicateKeyError:
+        # Another event created it first; count ours on top
+        return False
+    return True
+
+async def record_login_rollup(db, employee_id: str, attendance_date: str, login_time: datetime, lateness: Dict):
+    """Count a new check-in in the employee's monthly rollup"""
+    year, month = int(attendance_date[:4]), int(attendance_date[5:7])
+    if await _seed_rollup(db, employee_id, year, month):
+        return
+    await db.attendance_monthly.update_one(
+        get_rollup_key(employee_id, year, month),
+        {
+            "$inc": {
+                "present_days": 1,
+                "late_days": 1 if lateness["is_late"] else 0,
+                "total_late_minutes": lateness["late_minutes"],
+                "total_penalty_amount": lateness["late_penalty_amount"]
+            },
+            "$max": {"last_login_time": login_time},
+            "$set": {"updated_at": datetime.now(timezone.utc)}
+        },
+        upsert=True
+    )
+
+async def record_logout_rollup(db, employee_id: str, attendance_date: str, logout_time: datetime, total_hours: float):
+    """Add a completed day's hours to the employee's monthly rollup"""
+    year, month = int(attendance_date[:4]), int(attendance_date[5:7])
+    if await _seed_rollup(db, employee_id, year, month):
+        return
+    await db.attendance_monthly.update_one(
+        get_rollup_key(employee_id, year, month),
+        {
+            "$inc": {
+                "total_hours": total_hours,
+                "overtime_hours": calculate_overtime_hours(total_hours)
+            },
+            "$max": {
+                "max_daily_hours": total_hours,
+                "last_logout_time": logout_time
+            },
+            "$set": {"updated_at": datetime.now(timezone.utc)}
+        },
+        upsert=True
+    )
+
+async def get_monthly_attendance(db, employee_id: str, year: int, month: int) -> Dict:
+    """
+    Get an employee's attendance rollup for a month
+
+    Falls back to aggregating the month's raw attendance when no rollup exists
+    yet (e.g. history recorded before rollups were introduced).
+    """
+    rollup = await db.attendance_monthly.find_one(get_rollup_key(employee_id, year, month), {"_id": 0})
+    if rollup:
+        return rollup
+
+    rollup = empty_rollup(employee_id, year, month)
+    statistics = await db.attendance.aggregate(
+        build_monthly_attendance_pipeline(employee_id, year, month)
+    ).to_list(1)
+    if statistics:
+        for field in ROLLUP_COUNTER_FIELDS:
+            rollup[field] = statistics[0][field]
+    return rollup
+
+def build_monthly_present_days_pipeline(year: int, month: int) -> List[Dict]:
+    """Aggregation pipeline that counts present days per employee for one month"""
+    start, end = get_month_date_range(year, month)
+    return [
+        {"$match": {"date": {"$gte": start, "$lt": end}}},
+        {"$group": {"_id": "$employee_id", "present_days": {"$sum": 1}}}
+    ]
+
+async def get_monthly_present_days(db, year: int, month: int) -> Dict[str, int]:
+    """
+    Present days per employee for one month, for company-wide payroll and slips
+
+    Uses the same source as get_monthly_attendance, so a batch slip matches
+    the employee's single slip: the rollup where one exists, otherwise the
+    count of the month's raw attendance.
+    """
+    present_days = {}
+    async for rollup in db.attendance_monthly.find(
+        {"year": year, "month": month}, {"_id": 0, "employee_id": 1, "present_days": 1}
+    ):
+        present_days[rollup["employee_id"]] = rollup["present_days"]
+    async for row in db.attendance.aggregate(build_monthly_present_days_pipeline(year, month)):
+        present_days.setdefault(row["_id"], row["present_days"])
+    return present_days
+
+def build_rollup_rebuild_pipeline(employee_id: Optional[str] = None,
+                                  year: Optional[int] = None, month: Optional[int] = None,
+                                  employee_ids: Optional[List[str]] = None) -> List[Dict]:
+    """Aggregation pipeline recomputing attendance_monthly documents from raw attendance"""
+    match = {}
+    if employee_id:
+        match["employee_id"] = employee_id
+    elif employee_ids is not None:
+        match["employee_id"] = {"$in": employee_ids}
+    if year and month:
+        start, end = get_month_date_range(year, month)
+        match["date"] = {"$gte": start, "$lt": end}
+    elif year:
+        match["date"] = {"$gte": f"{year}-01-01", "$lt": f"{year + 1}-01-01"}
+
+    hours = {"$ifNull": ["$total_hours", 0]}
+    late_minutes = {"$ifNull": ["$late_minutes", 0]}
+
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "employee_id": "$employee_id",
+                "month": {"$dateToString": {"format": "%Y-%m", "date": {"$toDate": "$date"}}}
+            },
+            "present_days": {"$sum": 1},
+            "late_days": {"$sum": {"$cond": [
+                {"$gt": [late_minutes, LATE_LOGIN_PENALTY_STRUCTURE["grace_period_minutes"]]}, 1, 0
+            ]}},
+            "total_late_minutes": {"$sum": late_minutes},
+            "total_penalty_amount": {"$sum": {"$ifNull": ["$late_penalty_amount", 0]}},
+            "total_hours": {"$sum": hours},
+            "overtime_hours": {"$sum": {"$round": [
+                {"$max": [0, {"$subtract": [hours, STANDARD_WORKING_HOURS]}]}, 2
+            ]}},
+            "max_daily_hours": {"$max": hours},
+            "last_login_time": {"$max": "$login_time"},
+            "last_logout_time": {"$max": "$logout_time"}
+        }}
+    ]
+
+def build_rollup_document(row: Dict, year: int, month: int) -> Dict:
+    """attendance_monthly document from one row of the rebuild pipeline"""
+    return {
+        **empty_rollup(row["_id"]["employee_id"], year, month),
+        **{field: value for field, value in row.items() if field != "_id"},
+        "total_hours": round(row["total_hours"], 2),
+        "overtime_hours": round(row["overtime_hours"], 2)
+    }
+
+async def _write_rebuilt_rollups(db, operations: List[ReplaceOne]) -> int:
+    """Apply one batch of rebuilt rollups; returns how many were skipped as live"""
+    try:
+        await db.attendance_monthly.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        # A rollup updated since the rebuild started fails its filter, and the
+        # upsert then hits the unique key; keep the live document
+        errors = e.details.get("writeErrors", [])
+        if any(error["code"] != 11000 for error in errors):
+            raise
+        return len(errors)
+    return 0
+
+async def rebuild_attendance_rollups(db, employee_id: Optional[str] = None,
+                                     year: Optional[int] = None, month: Optional[int] = None,
+                                     employee_ids: Optional[List[str]] = None) -> Dict:
+    """
+    Recompute attendance_monthly documents from raw attendance
+
+    Optionally scoped to one employee (or a list of employees) and/or one
+    year or month. Rollups in the
+    scope are replaced, and rollups with no remaining attendance are removed.
+    Safe to run while check-ins are recorded: a rollup updated after the
+    rebuild started already counts that update on top of what the rebuild
+    would write, so it is left alone and reported as skipped.
+    """
+    scope = {}
+    if employee_id:
+        scope["employee_id"] = employee_id
+    elif employee_ids is not None:
+        scope["employee_id"] = {"$in": employee_ids}
+    if year:
+        scope["year"] = year
+        if month:
+            scope["month"] = month
+
+    # BSON dates keep milliseconds, so compare against the value as stored
+    now = datetime.now(timezone.utc)
+    rebuild_started_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    not_updated_since_start = {"$or": [
+        {"updated_at": {"$lt": rebuild_started_at}},
+        {"updated_at": {"$exists": False}}
+    ]}
+    rebuilt = 0
+    skipped = 0
+    operations = []
+
+    async for row in db.attendance.aggregate(build_rollup_rebuild_pipeline(employee_id, year, month, employee_ids)):
+        row_year, row_month = int(row["_id"]["month"][:4]), int(row["_id"]["month"][5:7])
+        key = get_rollup_key(row["_id"]["employee_id"], row_year, row_month)
+        document = {**build_rollup_document(row, row_year, row_month), "updated_at": rebuild_started_at}
+        operations.append(ReplaceOne({**key, **not_updated_since_start}, document, upsert=True))
+
+        if len(operations) >= ROLLUP_REBUILD_BATCH_SIZE:
+            batch_skipped = await _write_rebuilt_rollups(db, operations)
+            rebuilt += len(operations) - batch_skipped
+            skipped += batch_skipped
+            operations = []
+
+    if operations:
+        batch_skipped = await _write_rebuilt_rollups(db, operations)
+        rebuilt += len(operations) - batch_skipped
+        skipped += batch_skipped
+
+    # Rollups in scope that were neither rewritten nor updated since the start
+    # are stale once their month has no raw attendance left
+    removed = 0
+    async for stale in db.attendance_monthly.find(
+        {**scope, "updated_at": {"$lt": rebuild_started_at}}, {"_id": 0, "employee_id": 1, "year": 1, "month": 1}
+    ):
+        start, end = get_month_date_range(stale["year"], stale["month"])
+        if await db.attendance.find_one(
+            {"employee_id": stale["employee_id"], "date": {"$gte": start, "$lt": end}}, {"_id": 1}
+        ):
+            continue
+        result = await db.attendance_monthly.delete_one({
+            **get_rollup_key(stale["employee_id"], stale["year"], stale["month"]),
+            "updated_at": {"$lt": rebuild_started_at}
+        })
+        removed += result.deleted_count
+
+    return {"rebuilt_rollups": rebuilt, "skipped_rollups": skipped, "removed_rollups": removed}
+
+async def _run_rebuild_command(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        result = await rebuild_attendance_rollups(db, args.employee_id, args.year, args.month)
+        print(f"Rebuilt {result['rebuilt_rollups']} attendance rollups, removed {result['removed_rollups']} stale rollups, "
+              f"skipped {result['skipped_rollups']} updated during the rebuild")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild attendance_monthly rollups from raw attendance")
+    parser.add_argument("--employee-id", help="Only rebuild rollups for this employee")
+    parser.add_argument("--year", type=int, help="Only rebuild rollups for this year")
+    parser.add_argument("--month", type=int, help="Only rebuild rollups for this month (requires --year)")
+    asyncio.run(_run_rebuild_command(parser.parse_args()))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Document decode microbenchmark
+Compares the old parse_from_mongo string sniffing with the schema-driven
+employee decoder on 10k employee documents, in both storage forms.
+
+Run from the backend directory: python benchmarks/decode_benchmark.py
+"""
+
+import copy
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# server.py needs connection settings at import time; no connection is opened
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "hrms_benchmark")
+
+from server import decode_employee
+
+DOCUMENT_COUNT = 10000
+REPEATS = 5
+
+def legacy_parse_from_mongo(item):
+    """parse_from_mongo as it was: try every string containing a 'T'"""
+    if isinstance(item, dict):
+        for key, value in item.items():
+            if isinstance(value, str) and 'T' in value:
+                try:
+                    item[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
+                except ValueError:
+                    pass
+    return item
+
+def make_employees(count: int, legacy_strings: bool):
+    joined = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    employees = []
+    for index in range(count):
+        join_date = joined + timedelta(days=index % 1500)
+        employee = {
+            "id": f"5f1c{index:08d}-TEST",
+            "employee_id": f"VWT{index:05d}",
+            "full_name": f"Test Employee {index}",
+            "department": "Technology",
+            "designation": "Software Engineer",
+            "join_date": join_date,
+            "manager": "Team Lead",
+            "contact_number": "9876543210",
+            "email_id": f"test.employee{index}@vishwasworldtech.com",
+            "address": "No. 12, MG Road, Bangalore - 560001, Karnataka, INDIA",
+            "basic_salary": 45000.0,
+            "username": f"test{index}",
+            "password_hash": "5e884898da28047151d0e56f8dc6292773603d0d6aabbdd62a11ef721d1542d8",
+            "status": "Active",
+            "created_at": join_date,
+            "updated_at": join_date
+        }
+        if legacy_strings:
+            for field in ["join_date", "created_at", "updated_at"]:
+                employee[field] = employee[field].isoformat()
+        employees.append(employee)
+    return employees
+
+def time_decoder(decoder, documents) -> float:
+    """Best time in milliseconds to decode fresh copies of the documents"""
+    def run():
+        for document in batch:
+            decoder(document)
+
+    best = None
+    for _ in range(REPEATS):
+        batch = copy.deepcopy(documents)
+        elapsed = timeit.timeit(run, number=1)
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+if __name__ == "__main__":
+    print(f"Decoding {DOCUMENT_COUNT:,} employee documents (best of {REPEATS})")
+    for label, legacy_strings in [("ISO string dates", True), ("BSON dates", False)]:
+        documents = make_employees(DOCUMENT_COUNT, legacy_strings)
+        before = time_decoder(legacy_parse_from_mongo, documents)
+        after = time_decoder(decode_employee, documents)
+        print(f"  {label:<17} parse_from_mongo: {before:8.2f} ms   decode_employee: {after:8.2f} ms   "
+              f"({before / after:.1f}x)")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+PDF static layer benchmark
+Renders salary slips, offer letters and employee agreements with static
+layers off (every render rebuilds header, footer, styles and watermark, as
+before) and on (layers laid out once, drawn as form XObjects), and reports
+per-document render time and output size.
+
+Run from the backend directory: python benchmarks/pdf_layers_benchmark.py
+"""
+
+import base64
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+RENDERS = 20
+REPEATS = 3
+
+EMPLOYEE = {
+    "employee_id": "VWT00042",
+    "full_name": "Test Employee",
+    "department": "Technology",
+    "designation": "Software Engineer",
+    "join_date": "2024-01-15T00:00:00+00:00",
+    "manager": "Team Lead",
+    "contact_number": "9876543210",
+    "email_address": "test.employee@vishwasworldtech.com",
+    "address": "No. 12, MG Road, Bangalore - 560001, Karnataka, INDIA",
+    "basic_salary": 45000.0
+}
+
+def measure() -> dict:
+    """Runs in a child process, configured by the environment it was given"""
+    from salary_calculator import calculate_employee_salary
+    from standard_salary_slip_generator import generate_standard_salary_slip
+    from document_generator import generate_offer_letter
+    from employee_agreement_generator import generate_employee_agreement
+
+    salary_calculation = calculate_employee_salary(EMPLOYEE, [], 2025, 3, 22, 20)
+    documents = {
+        "salary_slip": (generate_standard_salary_slip, salary_calculation),
+        "offer_letter": (generate_offer_letter, EMPLOYEE),
+        "employee_agreement": (generate_employee_agreement, EMPLOYEE)
+    }
+
+    results = {}
+    for name, (generate, payload) in documents.items():
+        pdf_size = len(base64.b64decode(generate(payload)))  # warm-up render
+        best = min(timeit.repeat(lambda: generate(payload), number=RENDERS, repeat=REPEATS))
+        results[name] = {"ms": best / RENDERS * 1000, "bytes": pdf_size}
+    return results
+
+def run_mode(static_layers: bool, logo_path: str) -> dict:
+    env = dict(os.environ, PDF_STATIC_LAYERS="1" if static_layers else "0", BRAND_LOGO_PATH=logo_path)
+    output = subprocess.run(
+        [sys.executable, __file__, "--measure"], env=env, cwd=BACKEND_DIR,
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def default_logo(directory: str) -> str:
+    """The configured logo, or a photo-sized stand-in so the watermark is drawn"""
+    from brand_assets import DEFAULT_LOGO_PATH
+    configured = os.environ.get("BRAND_LOGO_PATH") or str(DEFAULT_LOGO_PATH)
+    if os.path.exists(configured):
+        return configured
+
+    from PIL import Image, ImageDraw
+    path = os.path.join(directory, "logo.jpg")
+    logo = Image.radial_gradient("L").resize((1200, 1200)).convert("RGB")
+    draw = ImageDraw.Draw(logo)
+    draw.ellipse((200, 200, 1000, 1000), fill=(20, 40, 140))
+    draw.rectangle((450, 300, 750, 900), fill=(240, 200, 40))
+    logo.save(path, quality=85)
+    return path
+
+if __name__ == "__main__":
+    if "--measure" in sys.argv:
+        print(json.dumps(measure()))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        logo_path = default_logo(directory)
+        before = run_mode(False, logo_path)
+        after = run_mode(True, logo_path)
+
+    print(f"Rendering each document {RENDERS} times (best of {REPEATS}), logo {logo_path}")
+    for name in before:
+        b, a = before[name], after[name]
+        print(f"  {name:<19} before: {b['ms']:6.1f} ms {b['bytes']:7,} bytes   "
+              f"after: {a['ms']:6.1f} ms {a['bytes']:7,} bytes   ({b['ms'] / a['ms']:.2f}x)")
@@ -0,0 +1,129 @@
+from pathlib import Path
+from typing import Optional
+import io
+import logging
+import os
+import tempfile
+import threading
+
+import requests
+from PIL import Image as PILImage
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Flowable
+
+logger = logging.getLogger(__name__)
+
+# Company logo on local disk; BRAND_LOGO_PATH overrides it per deployment
+DEFAULT_LOGO_PATH = Path(__file__).parent / "assets" / "company_logo.jpg"
+
+# Where the logo is downloaded from (once) when the file above is missing
+DEFAULT_LOGO_URL = "https://customer-assets.emergentagent.com/job_vishwas-hrms/artifacts/o6uun6ue_IMG-20251002-WA0067.jpg"
+LOGO_DOWNLOAD_TIMEOUT_SECONDS = 30
+
+# Sizes the generators draw the logo at, and the resolution it is pre-scaled to
+HEADER_LOGO_SIZE = 1.5 * inch
+WATERMARK_LOGO_SIZE = 4 * inch
+LOGO_RENDER_DPI = 150
+LOGO_JPEG_QUALITY = 90
+
+def _scaled_reader(image: PILImage.Image, size_points: float) -> ImageReader:
+    """Shared ImageReader of the logo fitted into a square of size_points"""
+    pixels = max(1, int(size_points / inch * LOGO_RENDER_DPI))
+    scaled = image.copy()
+    scaled.thumbnail((pixels, pixels), PILImage.LANCZOS)
+    # JPEG-backed readers are embedded as-is instead of being recompressed per PDF
+    encoded = io.BytesIO()
+    scaled.save(encoded, format="JPEG", quality=LOGO_JPEG_QUALITY)
+    encoded.seek(0)
+    reader = ImageReader(encoded)
+    # Decode once now so every render reuses the same pixel data
+    reader.getRGBData()
+    return reader
+
+class BrandAssets:
+    """
+    Process-wide registry of brand images for the PDF generators
+
+    The logo is read from local disk once and kept in memory, pre-scaled to
+    the header and watermark sizes. A missing file is downloaded once from
+    logo_url and kept on disk. Without a logo both readers are None and the
+    generators fall back to their text-only headers.
+    """
+
+    def __init__(self, logo_path: Optional[str] = None, logo_url: Optional[str] = None):
+        self.logo_path = Path(logo_path or os.environ.get("BRAND_LOGO_PATH") or DEFAULT_LOGO_PATH)
+        self.logo_url = logo_url or os.environ.get("BRAND_LOGO_URL") or DEFAULT_LOGO_URL
+        self.header_logo: Optional[ImageReader] = None
+        self.watermark_logo: Optional[ImageReader] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def fetch(self) -> bool:
+        """Download the logo to logo_path unless it is already there; True when the file exists"""
+        if self.logo_path.exists():
+            return True
+        try:
+            response = requests.get(self.logo_url, timeout=LOGO_DOWNLOAD_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            with PILImage.open(io.BytesIO(response.content)) as logo:
+                logo.verify()
+
+            self.logo_path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.logo_path.parent, suffix=".partial", delete=False) as f:
+                f.write(response.content)
+            os.replace(f.name, self.logo_path)
+            logger.info(f"Downloaded company logo to {self.logo_path}")
+            return True
+        except Exception as e:
+            logger.error(f"Could not download the company logo from {self.logo_url}: {str(e)}")
+            return False
+
+    def load(self) -> bool:
+        """Load and pre-scale the logo (once); True when a logo is available"""
+        with self._lock:
+            if not self._loaded:
+                try:
+                    with PILImage.open(self.logo_path) as logo:
+                        logo = logo.convert("RGB")
+                        self.header_logo = _scaled_reader(logo, HEADER_LOGO_SIZE)
+                        self.watermark_logo = _scaled_reader(logo, WATERMARK_LOGO_SIZE)
+                except Exception as e:
+                    logger.warning(f"Company logo unavailable at {self.logo_path}, using text headers: {str(e)}")
+                self._loaded = True
+        return self.header_logo is not None
+
+    def get_header_logo(self) -> Optional[ImageReader]:
+        if not self._loaded:
+            self.load()
+        return self.header_logo
+
+    def get_watermark_logo(self) -> Optional[ImageReader]:
+        if not self._loaded:
+            self.load()
+        return self.watermark_logo
+
+brand_assets = BrandAssets()
+
+class BrandImage(Flowable):
+    """Platypus flowable drawing a shared ImageReader inside a width x height box"""
+
+    def __init__(self, reader: ImageReader, width: float, height: float):
+        Flowable.__init__(self)
+        self.reader = reader
+        self.width = width
+        self.height = height
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(
+            self.reader, 0, 0, width=self.width, height=self.height,
+            mask='auto', preserveAspectRatio=True
+        )
+
+def header_logo_flowable(size: float = HEADER_LOGO_SIZE) -> Optional[BrandImage]:
+    """Header logo flowable at size x size, or None when no logo is configured"""
+    reader = brand_assets.get_header_logo()
+    return BrandImage(reader, size, size) if reader is not None else None
@@ -0,0 +1,131 @@
+from datetime import datetime, timezone, timedelta
+from typing import Dict
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# All headline counters live in this one dashboard_counters document
+DASHBOARD_COUNTERS_ID = "headline"
+
+# Counters that restart at zero every (UTC) day
+DAILY_COUNTER_FIELDS = ["present_today", "logged_in_now"]
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+def build_counter_queries(today: str) -> Dict[str, tuple]:
+    """counter -> (collection, filter) describing what each counter counts"""
+    return {
+        "total_employees": ("employees", {}),
+        "active_employees": ("employees", {"status": "Active"}),
+        "present_today": ("attendance", {"date": today}),
+        "logged_in_now": ("attendance", {"date": today, "status": "Logged In"}),
+        "total_documents": ("employee_documents", {}),
+        "active_announcements": ("announcements", {"is_active": True}),
+        "urgent_announcements": ("announcements", {"is_active": True, "priority": "Urgent"}),
+        "pending_interviews": ("interviews", {"interview_status": {"$ne": "Completed"}}),
+        "total_holidays": ("holidays", {})
+    }
+
+async def increment_counters(db, **deltas):
+    """
+    $inc headline counters, e.g. increment_counters(db, total_documents=1)
+
+    Nothing is written before the first reconciliation has created the
+    document; that reconciliation counts the change anyway.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    await db.dashboard_counters.update_one(
+        {"_id": DASHBOARD_COUNTERS_ID},
+        {"$inc": deltas, "$set": {"updated_at": datetime.now(timezone.utc)}}
+    )
+
+async def reset_daily_counters(db, day: str = None) -> bool:
+    """Zero the per-day counters when the stored day is not `day`; True if a reset happened"""
+    day = day or _today()
+    result = await db.dashboard_counters.update_one(
+        {"_id": DASHBOARD_COUNTERS_ID, "day": {"$ne": day}},
+        {"$set": {"day": day, **{field: 0 for field in DAILY_COUNTER_FIELDS}}}
+    )
+    return result.modified_count > 0
+
+async def increment_daily_counters(db, day: str, **deltas):
+    """
+    $inc per-day counters for `day`
+
+    The first increment of a new day resets the counters before applying
+    itself. A decrement for a day that has already been reset is dropped.
+    """
+    result = await db.dashboard_counters.update_one(
+        {"_id": DASHBOARD_COUNTERS_ID, "day": day},
+        {"$inc": deltas, "$set": {"updated_at": datetime.now(timezone.utc)}}
+    )
+    if result.matched_count or day != _today() or any(delta < 0 for delta in deltas.values()):
+        return
+
+    if await db.dashboard_counters.find_one({"_id": DASHBOARD_COUNTERS_ID}, {"_id": 1}) is None:
+        await reconcile_dashboard_counters(db)
+        return
+
+    await reset_daily_counters(db, day)
+    await db.dashboard_counters.update_one(
+        {"_id": DASHBOARD_COUNTERS_ID, "day": day},
+        {"$inc": deltas, "$set": {"updated_at": datetime.now(timezone.utc)}}
+    )
+
+async def reconcile_dashboard_counters(db) -> Dict:
+    """Recount every counter from its source collection and repair any drift"""
+    today = _today()
+    queries = build_counter_queries(today)
+    counts = await asyncio.gather(*[
+        db[collection].count_documents(query) for collection, query in queries.values()
+    ])
+    actual = dict(zip(queries, counts))
+
+    previous = await db.dashboard_counters.find_one({"_id": DASHBOARD_COUNTERS_ID}) or {}
+    drift = {
+        field: count - previous.get(field, 0)
+        for field, count in actual.items()
+        if previous.get(field, 0) != count and (field not in DAILY_COUNTER_FIELDS or previous.get("day") == today)
+    }
+
+    now = datetime.now(timezone.utc)
+    await db.dashboard_counters.update_one(
+        {"_id": DASHBOARD_COUNTERS_ID},
+        {"$set": {**actual, "day": today, "updated_at": now, "reconciled_at": now}},
+        upsert=True
+    )
+    if drift:
+        logger.warning(f"Dashboard counters drifted and were repaired: {drift}")
+    return {"counters": actual, "drift": drift}
+
+async def get_dashboard_counters(db) -> Dict:
+    """Current headline counters with a single find_one"""
+    counters = await db.dashboard_counters.find_one({"_id": DASHBOARD_COUNTERS_ID}, {"_id": 0})
+    if counters is None:
+        return (await reconcile_dashboard_counters(db))["counters"]
+
+    if counters.get("day") != _today():
+        # No check-in yet today; the per-day counters have not rolled over
+        counters.update({field: 0 for field in DAILY_COUNTER_FIELDS})
+    return counters
+
+async def run_daily_counter_maintenance(db):
+    """Reconcile now, then reset and reconcile the counters after every UTC midnight"""
+    while True:
+        try:
+            await reconcile_dashboard_counters(db)
+        except Exception as e:
+            logger.error(f"Dashboard counter reconciliation failed: {str(e)}")
+
+        now = datetime.now(timezone.utc)
+        next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        await asyncio.sleep((next_midnight - now).total_seconds())
+
+        try:
+            await reset_daily_counters(db)
+        except Exception as e:
+            logger.error(f"Dashboard daily counter reset failed: {str(e)}")
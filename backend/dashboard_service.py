@@ -0,0 +1,104 @@
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Optional
+import asyncio
+import time
+
+from mongo_codec import date_range_query
+from dashboard_counters import get_dashboard_counters
+
+# Recent-window counts are shared by every caller for this long
+DASHBOARD_CACHE_TTL_SECONDS = 5
+
+# Window for the "recent" document and announcement counts
+DASHBOARD_RECENT_DAYS = 7
+
+async def facet_counts(collection, facets: Dict[str, Dict], match: Optional[Dict] = None) -> Dict[str, int]:
+    """
+    Count several filters on one collection with a single $facet aggregation
+
+    `match`, when given, narrows the scan (ideally on an index) to documents
+    any facet can count.
+    """
+    pipeline = [{"$match": match}] if match else []
+    pipeline.append({"$facet": {
+        name: [{"$match": facet_filter}, {"$count": "count"}]
+        for name, facet_filter in facets.items()
+    }})
+    rows = await collection.aggregate(pipeline).to_list(1)
+    counts = rows[0] if rows else {}
+    return {name: counts[name][0]["count"] if counts.get(name) else 0 for name in facets}
+
+async def compute_recent_counts(db) -> Dict:
+    """Sliding-window counts, which no write-maintained counter can track"""
+    now = datetime.now(timezone.utc)
+    recent = now - timedelta(days=DASHBOARD_RECENT_DAYS)
+
+    documents, announcements = await asyncio.gather(
+        facet_counts(db.employee_documents, {
+            "recent": date_range_query("uploaded_at", start=recent)
+        }),
+        facet_counts(db.announcements, {
+            "recent": date_range_query("published_at", start=recent)
+        })
+    )
+    return {"documents": documents["recent"], "announcements": announcements["recent"], "computed_at": now}
+
+class DashboardStatsCache:
+    """
+    Short-TTL cache of the recent-window counts with single-flight refresh
+
+    Callers arriving while a refresh is running await that same computation
+    instead of issuing their own queries.
+    """
+
+    def __init__(self, ttl: float = DASHBOARD_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._counts: Optional[Dict] = None
+        self._expires = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+
+    async def get(self, db) -> Dict:
+        if self._counts is not None and self._expires > time.monotonic():
+            return self._counts
+
+        if self._refresh is None:
+            self._refresh = asyncio.ensure_future(self._load(db))
+        # shield: one caller going away must not cancel the refresh for the others
+        return await asyncio.shield(self._refresh)
+
+    async def _load(self, db) -> Dict:
+        try:
+            counts = await compute_recent_counts(db)
+            self._counts = counts
+            self._expires = time.monotonic() + self.ttl
+            return counts
+        finally:
+            self._refresh = None
+
+    def invalidate(self):
+        self._counts = None
+        self._expires = 0.0
+
+dashboard_stats_cache = DashboardStatsCache()
+
+async def get_dashboard_counts(db) -> Dict:
+    """
+    Every dashboard count, grouped by collection
+
+    Headline numbers are one find_one on the write-maintained counters
+    document; only the recent-window counts come from the cache.
+    """
+    counters, recent = await asyncio.gather(get_dashboard_counters(db), dashboard_stats_cache.get(db))
+    return {
+        "employees": {"total": counters["total_employees"], "active": counters["active_employees"]},
+        "attendance": {"present_today": counters["present_today"], "logged_in_now": counters["logged_in_now"]},
+        "documents": {"total": counters["total_documents"], "recent": recent["documents"]},
+        "announcements": {
+            "active": counters["active_announcements"],
+            "recent": recent["announcements"],
+            "urgent": counters["urgent_announcements"]
+        },
+        "interviews": {"not_completed": counters["pending_interviews"]},
+        "holidays": {"total": counters["total_holidays"]},
+        "computed_at": counters.get("updated_at") or recent["computed_at"]
+    }
@@ -0,0 +1,173 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from pymongo import UpdateOne
+
+from mongo_codec import parse_stored_datetime
+
+logger = logging.getLogger(__name__)
+
+# Documents are rewritten in batches of this size, with a checkpoint after each
+DATE_MIGRATION_BATCH_SIZE = 1000
+
+# Checkpoint documents live in db.migrations under this prefix
+DATE_MIGRATION_ID = "bson_dates"
+
+# Fields that held ISO strings before the storage codec, per collection.
+# attendance.date stays a 'YYYY-MM-DD' day key and is not migrated.
+DATE_FIELD_REGISTRY: Dict[str, List[str]] = {
+    "employees": ["join_date", "date_of_birth", "last_login", "created_at", "updated_at"],
+    "attendance": ["login_time", "logout_time", "created_at"],
+    "attendance_monthly": ["last_login_time", "last_logout_time", "updated_at"],
+    "employee_documents": ["uploaded_at"],
+    "announcements": ["published_at", "valid_until"],
+    "interviews": ["interview_date", "created_at", "updated_at"],
+    "holidays": ["holiday_date", "created_at"],
+    "payroll_runs": ["created_at", "completed_at"]
+}
+
+def _checkpoint_id(collection_name: str) -> str:
+    return f"{DATE_MIGRATION_ID}.{collection_name}"
+
+def convert_date_fields(document: Dict, fields: List[str]) -> tuple:
+    """
+    Convert a document's legacy string dates
+
+    Returns ({field: BSON datetime} for converted fields, [fields that could not be parsed]).
+    """
+    converted = {}
+    invalid = []
+    for field in fields:
+        value = document.get(field)
+        if not isinstance(value, str):
+            continue
+        try:
+            converted[field] = parse_stored_datetime(value)
+        except ValueError:
+            invalid.append(field)
+    return converted, invalid
+
+async def migrate_collection_dates(db, collection_name: str, fields: List[str],
+                                   batch_size: int = DATE_MIGRATION_BATCH_SIZE) -> Dict:
+    """
+    Rewrite one collection's string dates as BSON dates, resuming from its checkpoint
+
+    Documents are visited in _id order. Each update is conditional on the
+    original string, so a document changed by the application mid-migration
+    is left alone rather than overwritten.
+    """
+    checkpoint = await db.migrations.find_one({"_id": _checkpoint_id(collection_name)}) or {}
+    if checkpoint.get("completed"):
+        return checkpoint
+
+    last_id = checkpoint.get("last_id")
+    converted_total = checkpoint.get("converted", 0)
+    invalid_total = checkpoint.get("invalid", 0)
+    string_dates = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+
+    while True:
+        query = dict(string_dates)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+
+        batch = await db[collection_name].find(query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+
+        operations = []
+        for document in batch:
+            converted, invalid = convert_date_fields(document, fields)
+            invalid_total += len(invalid)
+            if converted:
+                guard = {"_id": document["_id"], **{field: document[field] for field in converted}}
+                operations.append(UpdateOne(guard, {"$set": converted}))
+
+        if operations:
+            result = await db[collection_name].bulk_write(operations, ordered=False)
+            converted_total += result.modified_count
+
+        last_id = batch[-1]["_id"]
+        await db.migrations.update_one(
+            {"_id": _checkpoint_id(collection_name)},
+            {"$set": {
+                "last_id": last_id,
+                "converted": converted_total,
+                "invalid": invalid_total,
+                "completed": False,
+                "updated_at": datetime.now(timezone.utc)
+            }},
+            upsert=True
+        )
+
+    checkpoint = {
+        "_id": _checkpoint_id(collection_name),
+        "last_id": last_id,
+        "converted": converted_total,
+        "invalid": invalid_total,
+        "completed": True,
+        "updated_at": datetime.now(timezone.utc)
+    }
+    await db.migrations.replace_one({"_id": checkpoint["_id"]}, checkpoint, upsert=True)
+    logger.info(f"Date migration of {collection_name} completed: {converted_total} documents converted")
+    return checkpoint
+
+async def migrate_dates_to_bson(db, collections: Optional[List[str]] = None,
+                                batch_size: int = DATE_MIGRATION_BATCH_SIZE, restart: bool = False) -> Dict:
+    """Run (or resume) the string-to-BSON date migration for the registered collections"""
+    collection_names = collections or list(DATE_FIELD_REGISTRY)
+    if restart:
+        await db.migrations.delete_many({"_id": {"$in": [_checkpoint_id(name) for name in collection_names]}})
+
+    results = {}
+    for collection_name in collection_names:
+        checkpoint = await migrate_collection_dates(
+            db, collection_name, DATE_FIELD_REGISTRY[collection_name], batch_size
+        )
+        results[collection_name] = {
+            "converted": checkpoint.get("converted", 0),
+            "invalid": checkpoint.get("invalid", 0),
+            "completed": checkpoint.get("completed", False)
+        }
+    return results
+
+async def get_date_migration_status(db) -> Dict:
+    """Checkpoint state of the date migration for every registered collection"""
+    status = {}
+    for collection_name in DATE_FIELD_REGISTRY:
+        checkpoint = await db.migrations.find_one({"_id": _checkpoint_id(collection_name)}) or {}
+        status[collection_name] = {
+            "converted": checkpoint.get("converted", 0),
+            "invalid": checkpoint.get("invalid", 0),
+            "completed": checkpoint.get("completed", False),
+            "updated_at": checkpoint.get("updated_at")
+        }
+    return status
+
+async def _run_migration_command(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        results = await migrate_dates_to_bson(db, args.collection, args.batch_size, args.restart)
+        for collection_name, result in results.items():
+            print(f"{collection_name}: {result['converted']} converted, {result['invalid']} unparseable fields")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rewrite ISO string dates as native BSON dates")
+    parser.add_argument("--collection", action="append", choices=list(DATE_FIELD_REGISTRY),
+                        help="Only migrate this collection (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=DATE_MIGRATION_BATCH_SIZE)
+    parser.add_argument("--restart", action="store_true", help="Ignore saved checkpoints and start over")
+    asyncio.run(_run_migration_command(parser.parse_args()))
@@ -0,0 +1,180 @@
+from typing import Dict, List
+import logging
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from attendance_checkin import DAILY_ATTENDANCE_MARKER
+from storage_backends import STORAGE_BACKEND, STORAGE_NAMESPACES
+
+logger = logging.getLogger(__name__)
+
+# Declarative index registry: collection name -> indexes the hot paths rely on
+# Index names are fixed so the startup check and the report can match them
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = {
+    "employees": [
+        IndexModel([("employee_id", ASCENDING)], name="employee_id_unique", unique=True),
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("department", ASCENDING)], name="status_department")
+    ],
+    "attendance": [
+        IndexModel(
+            [("employee_id", ASCENDING), ("date", ASCENDING)],
+            name="employee_daily_unique", unique=True,
+            partialFilterExpression=DAILY_ATTENDANCE_MARKER
+        ),
+        IndexModel(
+            [("employee_id", ASCENDING), ("date", DESCENDING), ("status", ASCENDING)],
+            name="employee_date_status"
+        ),
+        IndexModel([("date", ASCENDING), ("status", ASCENDING)], name="date_status")
+    ],
+    "attendance_monthly": [
+        IndexModel(
+            [("employee_id", ASCENDING), ("year", ASCENDING), ("month", ASCENDING)],
+            name="employee_month_unique", unique=True
+        ),
+        IndexModel([("year", ASCENDING), ("month", ASCENDING)], name="year_month")
+    ],
+    "employee_documents": [
+        IndexModel([("employee_id", ASCENDING), ("id", ASCENDING)], name="employee_document"),
+        IndexModel([("uploaded_at", DESCENDING)], name="uploaded_at"),
+        IndexModel(
+            [("slip_job_id", ASCENDING), ("department", ASCENDING), ("employee_id", ASCENDING)],
+            name="slip_job_department_employee",
+            partialFilterExpression={"slip_job_id": {"$exists": True}}
+        )
+    ],
+    "announcements": [
+        IndexModel([("id", ASCENDING)], name="id"),
+        IndexModel(
+            [("is_active", ASCENDING), ("priority", DESCENDING), ("published_at", DESCENDING)],
+            name="active_priority_published"
+        ),
+        IndexModel([("published_at", DESCENDING)], name="published_at")
+    ],
+    "interviews": [
+        IndexModel([("id", ASCENDING)], name="id"),
+        IndexModel([("interview_status", ASCENDING), ("interview_date", ASCENDING)], name="status_interview_date")
+    ],
+    "holidays": [
+        IndexModel([("holiday_date", ASCENDING)], name="holiday_date")
+    ],
+    "payroll_runs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+    ],
+    "salary_slip_jobs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+    ],
+    "document_blobs": [
+        IndexModel([("sha256", ASCENDING)], name="sha256_unique", unique=True),
+        IndexModel([("ref_count", ASCENDING), ("unreferenced_at", ASCENDING)], name="ref_count_unreferenced_at")
+    ],
+    "document_thumbnails": [
+        IndexModel([("sha256", ASCENDING)], name="sha256_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("queued_at", ASCENDING)], name="status_queued_at")
+    ],
+    "pdf_cache": [
+        IndexModel([("key", ASCENDING)], name="key_unique", unique=True),
+        IndexModel(
+            [("employee_id", ASCENDING), ("year", ASCENDING), ("month", ASCENDING)],
+            name="employee_month"
+        ),
+        IndexModel([("last_accessed_at", ASCENDING)], name="last_accessed_at")
+    ],
+    "payroll_run_results": [
+        IndexModel([("run_id", ASCENDING), ("employee_id", ASCENDING)], name="run_employee"),
+        IndexModel(
+            [("run_id", ASCENDING), ("department", ASCENDING), ("employee_id", ASCENDING)],
+            name="run_department_employee"
+        )
+    ]
+}
+
+# GridFS file metadata, looked up by employee and document type; the buckets
+# only exist when documents are stored in GridFS
+if STORAGE_BACKEND == "gridfs":
+    INDEX_REGISTRY.update({
+        f"{namespace}.files": [
+            IndexModel(
+                [("metadata.employee_id", ASCENDING), ("metadata.document_type", ASCENDING)],
+                name="metadata_employee_document_type"
+            )
+        ]
+        for namespace in STORAGE_NAMESPACES
+    })
+
+async def ensure_indexes(db, registry: Dict[str, List[IndexModel]] = INDEX_REGISTRY) -> Dict:
+    """
+    Create every registered index that does not exist yet
+
+    Safe to run on every startup: existing indexes are skipped. An index that
+    cannot be built (e.g. a unique index over duplicate data) is logged and
+    reported, but does not stop the remaining indexes from being created.
+    """
+    created = []
+    failed = []
+
+    for collection_name, indexes in registry.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+
+        for index in indexes:
+            name = index.document["name"]
+            if name in existing:
+                continue
+            try:
+                await collection.create_indexes([index])
+                created.append(f"{collection_name}.{name}")
+            except OperationFailure as e:
+                logger.error(f"Could not create index {collection_name}.{name}: {e}")
+                failed.append({"index": f"{collection_name}.{name}", "error": str(e)})
+
+    if created:
+        logger.info(f"Created indexes: {', '.join(created)}")
+
+    return {"created": created, "failed": failed}
+
+async def get_index_report(db, registry: Dict[str, List[IndexModel]] = INDEX_REGISTRY) -> Dict:
+    """
+    Compare live indexes against the registry
+
+    Reports registered indexes that are missing, indexes that exist but are not
+    registered, and indexes with no recorded use since the server started
+    (from $indexStats).
+    """
+    collections = {}
+    missing_total = 0
+    unused_total = 0
+
+    for collection_name, indexes in registry.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        registered = [index.document["name"] for index in indexes]
+
+        usage = {}
+        async for stats in collection.aggregate([{"$indexStats": {}}]):
+            usage[stats["name"]] = {
+                "ops": stats["accesses"]["ops"],
+                "since": stats["accesses"]["since"]
+            }
+
+        missing = [name for name in registered if name not in existing]
+        unused = [name for name in existing if name != "_id_" and usage.get(name, {}).get("ops", 0) == 0]
+        missing_total += len(missing)
+        unused_total += len(unused)
+
+        collections[collection_name] = {
+            "registered": registered,
+            "missing": missing,
+            "unregistered": [name for name in existing if name != "_id_" and name not in registered],
+            "unused": unused,
+            "usage": usage
+        }
+
+    return {
+        "healthy": missing_total == 0,
+        "missing_indexes": missing_total,
+        "unused_indexes": unused_total,
+        "collections": collections
+    }
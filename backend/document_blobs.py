@@ -0,0 +1,291 @@
+from datetime import datetime, timezone, timedelta
+from typing import BinaryIO, Dict, Optional
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from pathlib import Path
+
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from storage_backends import DOCUMENTS_NAMESPACE, create_storage_backend
+
+logger = logging.getLogger(__name__)
+
+# Uploaded documents are stored once per distinct content, named by SHA-256;
+# BLOB_ROOT is used when the storage backend is local disk
+BLOB_ROOT = os.environ.get("DOCUMENT_BLOB_ROOT", "/app/uploaded_documents/blobs")
+
+# Document record file paths that point into the blob store (local root, S3 or GridFS URI)
+BLOB_LOCATION_PREFIXES = (BLOB_ROOT + os.sep, "s3://", f"gridfs://{DOCUMENTS_NAMESPACE}/")
+
+# Uploads are read in chunks of this size, so memory per upload stays bounded by it
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Largest document accepted, in bytes
+MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE", 25 * 1024 * 1024))
+
+# Unreferenced blobs are kept this long before the collector removes them,
+# so content re-uploaded soon after a delete is deduplicated instead of rewritten
+BLOB_GC_GRACE_SECONDS = 3600
+
+# A blob claimed by the collector takes no new references for this long;
+# after that the claim is treated as abandoned (collector crashed)
+BLOB_COLLECT_LEASE_SECONDS = 300
+
+# How often, and how long apart, an upload retries while its blob is being collected
+BLOB_REFERENCE_ATTEMPTS = 50
+BLOB_REFERENCE_RETRY_SECONDS = 0.1
+
+document_storage = create_storage_backend(BLOB_ROOT, DOCUMENTS_NAMESPACE)
+
+def blob_key(content_sha256: str) -> str:
+    return f"{content_sha256[:2]}/{content_sha256[2:4]}/{content_sha256}"
+
+def is_blob_path(file_path: str) -> bool:
+    return file_path.startswith(BLOB_LOCATION_PREFIXES)
+
+def document_blob_key(document: Dict) -> Optional[str]:
+    """Storage key of an employee_documents record's blob, or None when it owns a local file"""
+    if document.get("content_sha256") and is_blob_path(document["file_path"]):
+        return blob_key(document["content_sha256"])
+    return None
+
+def _hash_stream(source: BinaryIO, max_size: Optional[int]) -> tuple:
+    """(size, sha256 hex) of a seekable stream, read in chunks; 413 beyond max_size"""
+    digest = hashlib.sha256()
+    size = 0
+    source.seek(0)
+    while True:
+        chunk = source.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if max_size is not None and size > max_size:
+            raise HTTPException(status_code=413, detail=f"File too large (limit {max_size // (1024 * 1024)} MB)")
+        digest.update(chunk)
+    return size, digest.hexdigest()
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _unclaimed_blob_filter(content_sha256: str, now: datetime) -> Dict:
+    """Blob record that no live collector is currently removing"""
+    return {"sha256": content_sha256, "$or": [
+        {"collecting_at": {"$exists": False}},
+        {"collecting_at": {"$lt": now - timedelta(seconds=BLOB_COLLECT_LEASE_SECONDS)}}
+    ]}
+
+async def _take_blob_reference(db, content_sha256: str, file_size: int) -> Optional[Dict]:
+    """
+    Add a reference to the blob record, creating it if needed
+
+    Returns the record as it was before (None when it was created). While the
+    collector holds a claim on the record the upsert hits the unique sha256
+    index; the collector removes the record once its file is deleted, so the
+    reference is retried until then.
+    """
+    for _ in range(BLOB_REFERENCE_ATTEMPTS):
+        now = datetime.now(timezone.utc)
+        try:
+            return await db.document_blobs.find_one_and_update(
+                _unclaimed_blob_filter(content_sha256, now),
+                {"$inc": {"ref_count": 1}, "$set": {"last_referenced_at": now},
+                 "$unset": {"unreferenced_at": "", "collecting_at": ""},
+                 "$setOnInsert": {"sha256": content_sha256, "size": file_size, "created_at": now}},
+                projection={"_id": 0, "collecting_at": 1},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            await asyncio.sleep(BLOB_REFERENCE_RETRY_SECONDS)
+    raise HTTPException(status_code=503, detail="Document storage is busy, please retry the upload")
+
+async def store_blob(db, source: BinaryIO, max_size: Optional[int] = MAX_UPLOAD_SIZE,
+                     metadata: Optional[Dict] = None) -> Dict:
+    """
+    Add one reference to the blob holding a seekable stream's content
+
+    The stream is hashed first (size-limited on the way), and the reference
+    is taken before anything is written, so the collector cannot remove the
+    file underneath it. Content already in the store is not written again,
+    so its storage metadata stays that of the upload that first stored it.
+    Disk and storage I/O run on a thread, off the event loop.
+    """
+    file_size, content_sha256 = await asyncio.to_thread(_hash_stream, source, max_size)
+    key = blob_key(content_sha256)
+
+    previous = await _take_blob_reference(db, content_sha256, file_size)
+    # A record taken over from an abandoned collection may have lost its file
+    deduplicated = (
+        previous is not None and "collecting_at" not in previous
+        and await asyncio.to_thread(document_storage.exists, key)
+    )
+    if not deduplicated:
+        try:
+            await asyncio.to_thread(document_storage.put, key, source, metadata)
+        except Exception:
+            await release_blob(db, content_sha256)
+            raise
+
+    return {
+        "content_sha256": content_sha256,
+        "file_path": document_storage.location(key),
+        "file_size": file_size,
+        "deduplicated": deduplicated
+    }
+
+async def release_blob(db, content_sha256: str):
+    """Drop one reference; blobs left without references are collected after the grace period"""
+    blob = await db.document_blobs.find_one_and_update(
+        {"sha256": content_sha256},
+        {"$inc": {"ref_count": -1}},
+        projection={"_id": 0, "ref_count": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if blob is not None and blob["ref_count"] <= 0:
+        await db.document_blobs.update_one(
+            {"sha256": content_sha256, "ref_count": {"$lte": 0}},
+            {"$set": {"unreferenced_at": datetime.now(timezone.utc)}}
+        )
+
+async def collect_unreferenced_blobs(db, grace_seconds: int = BLOB_GC_GRACE_SECONDS) -> Dict:
+    """
+    Remove blobs that have had no references for longer than grace_seconds
+
+    Each record is first claimed (collecting_at), which stops uploads from
+    taking new references to it. The file is deleted next and the record
+    last, so an upload of the same content waits for the record to go and
+    then writes a fresh file.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+    removed = 0
+    freed_bytes = 0
+    async for blob in db.document_blobs.find(
+        {"ref_count": {"$lte": 0}, "unreferenced_at": {"$lt": cutoff}}, {"_id": 0}
+    ):
+        # BSON dates keep milliseconds; the claim is matched again as stored
+        now = datetime.now(timezone.utc)
+        claimed_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+        claim = await db.document_blobs.update_one(
+            {**_unclaimed_blob_filter(blob["sha256"], claimed_at),
+             "ref_count": {"$lte": 0}, "unreferenced_at": {"$lt": cutoff}},
+            {"$set": {"collecting_at": claimed_at}}
+        )
+        if not claim.modified_count:
+            continue
+        await asyncio.to_thread(document_storage.delete, blob_key(blob["sha256"]))
+        await db.document_blobs.delete_one(
+            {"sha256": blob["sha256"], "ref_count": {"$lte": 0}, "collecting_at": claimed_at}
+        )
+        removed += 1
+        freed_bytes += blob["size"]
+
+    if removed:
+        logger.info(f"Removed {removed} unreferenced document blobs ({freed_bytes} bytes)")
+    return {"removed_blobs": removed, "freed_bytes": freed_bytes}
+
+def _legacy_document_filter() -> Dict:
+    """Uploaded documents still stored as per-employee files (generated slips excluded)"""
+    return {
+        "slip_job_id": {"$exists": False},
+        "file_path": {"$not": re.compile("^(" + "|".join(re.escape(prefix) for prefix in BLOB_LOCATION_PREFIXES) + ")")}
+    }
+
+# Projection of employee_documents records the legacy migration needs
+LEGACY_DOCUMENT_PROJECTION = {"_id": 0, "id": 1, "file_path": 1, "employee_id": 1, "document_type": 1}
+
+def legacy_document_cursor(db):
+    return db.employee_documents.find(_legacy_document_filter(), LEGACY_DOCUMENT_PROJECTION)
+
+async def migrate_legacy_document(db, document: Dict) -> str:
+    """
+    Move one per-employee document file into the blob store (whichever backend)
+
+    The file is added to the store (duplicates only gain a reference), its
+    record is pointed at the blob, and the old file is removed. Returns
+    "migrated", "deduplicated", "missing" (file gone; record left alone) or
+    "skipped" (record changed meanwhile).
+    """
+    old_path = document["file_path"]
+    try:
+        source = await asyncio.to_thread(open, old_path, "rb")
+    except FileNotFoundError:
+        return "missing"
+    try:
+        blob = await store_blob(db, source, max_size=None, metadata={
+            "employee_id": document.get("employee_id"), "document_type": document.get("document_type")
+        })
+    finally:
+        source.close()
+
+    result = await db.employee_documents.update_one(
+        {"id": document["id"], "file_path": old_path},
+        {"$set": {"file_path": blob["file_path"], "content_sha256": blob["content_sha256"]}}
+    )
+    if not result.modified_count:
+        # The record changed meanwhile; give back the reference taken for it
+        await release_blob(db, blob["content_sha256"])
+        return "skipped"
+
+    await asyncio.to_thread(_remove_file, old_path)
+    return "deduplicated" if blob["deduplicated"] else "migrated"
+
+async def migrate_documents_to_blobs(db) -> Dict:
+    """Move every per-employee document file into the blob store; safe to run repeatedly"""
+    outcomes = [await migrate_legacy_document(db, document) async for document in legacy_document_cursor(db)]
+    return {
+        "migrated_documents": outcomes.count("migrated") + outcomes.count("deduplicated"),
+        "deduplicated_documents": outcomes.count("deduplicated"),
+        "missing_files": outcomes.count("missing")
+    }
+
+async def get_blob_stats(db) -> Dict:
+    """Blob count and size against the document records pointing at them"""
+    totals = await db.document_blobs.aggregate([
+        {"$group": {
+            "_id": None,
+            "blobs": {"$sum": 1},
+            "stored_bytes": {"$sum": "$size"},
+            "references": {"$sum": "$ref_count"},
+            "unreferenced_blobs": {"$sum": {"$cond": [{"$lte": ["$ref_count", 0]}, 1, 0]}}
+        }}
+    ]).to_list(1)
+    stats = totals[0] if totals else {"blobs": 0, "stored_bytes": 0, "references": 0, "unreferenced_blobs": 0}
+    stats.pop("_id", None)
+    stats["legacy_documents"] = await db.employee_documents.count_documents(_legacy_document_filter())
+    return stats
+
+async def _run_blob_command(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        if args.command == "migrate":
+            result = await migrate_documents_to_blobs(db)
+            print(f"Moved {result['migrated_documents']} documents into the blob store "
+                  f"({result['deduplicated_documents']} duplicates), {result['missing_files']} files missing")
+        else:
+            result = await collect_unreferenced_blobs(db, args.grace_seconds)
+            print(f"Removed {result['removed_blobs']} unreferenced blobs, freed {result['freed_bytes']} bytes")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the content-addressed document blob store")
+    parser.add_argument("command", choices=["migrate", "gc"],
+                        help="migrate: move per-employee files into the store; gc: remove unreferenced blobs")
+    parser.add_argument("--grace-seconds", type=int, default=BLOB_GC_GRACE_SECONDS,
+                        help="Only collect blobs unreferenced for at least this long")
+    asyncio.run(_run_blob_command(parser.parse_args()))
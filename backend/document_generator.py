@@ -11,7 +11,7 @@ from logo_watermark_generator import (
     create_watermarked_document, 
     create_professional_header_with_logo, 
     create_professional_footer,
-    enhance_document_styling,
+    get_document_styles,
     get_professional_table_style
 )
 
@@ -20,7 +20,7 @@ from logo_watermark_generator import (
 def generate_offer_letter_content(employee_data):
     """Generate offer letter content for watermarked document"""
     # Get enhanced professional styles
-    styles = enhance_document_styling()
+    styles = get_document_styles()
     # Professional date style
     date_style = ParagraphStyle(
         'DateStyle',
@@ -111,7 +111,7 @@ def generate_offer_letter(employee_data):
 def generate_appointment_letter_content(employee_data):
     """Generate appointment letter content for watermarked document"""
     # Get enhanced professional styles
-    styles = enhance_document_styling()
+    styles = get_document_styles()
     # Professional date style
     date_style = ParagraphStyle(
         'DateStyle',
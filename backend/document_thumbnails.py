@@ -0,0 +1,357 @@
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import re
+
+from PIL import Image, ImageOps, features
+from pymongo import UpdateOne
+
+from document_blobs import document_storage, blob_key
+from storage_backends import THUMBNAILS_NAMESPACE, create_storage_backend
+
+logger = logging.getLogger(__name__)
+
+# Thumbnails are kept once per source content; THUMBNAIL_ROOT is used when
+# the storage backend is local disk
+THUMBNAIL_ROOT = os.environ.get("THUMBNAIL_ROOT", "/app/uploaded_documents/thumbnails")
+
+# Longest side of a thumbnail, in pixels
+THUMBNAIL_MAX_SIDE = 320
+
+# Bump when rendering changes; older thumbnails are queued again at startup
+THUMBNAIL_VERSION = 1
+
+# WebP where Pillow was built with it, JPEG otherwise
+THUMBNAIL_FORMAT = "WEBP" if features.check("webp") else "JPEG"
+THUMBNAIL_MEDIA_TYPE = f"image/{THUMBNAIL_FORMAT.lower()}"
+THUMBNAIL_QUALITY = 80
+
+# Upload extension -> how a preview is made from it
+THUMBNAIL_SOURCE_KINDS = {".jpg": "image", ".jpeg": "image", ".png": "image", ".pdf": "pdf"}
+
+# Embedded page images smaller than this (logos, signatures) are not taken
+# as a scanned PDF's first page
+PDF_PAGE_IMAGE_MIN_SIDE = 500
+
+# Queued thumbnails claimed and rendered together, on one worker thread
+THUMBNAIL_BATCH_SIZE = 32
+
+# After a wake-up, wait this long so a burst of uploads lands in one batch
+THUMBNAIL_BATCH_DELAY_SECONDS = 0.5
+
+# Idle workers look for queued thumbnails (e.g. from another node) this often
+THUMBNAIL_POLL_SECONDS = 30
+
+# A claimed thumbnail not finished within this long is claimed again, up to
+# THUMBNAIL_MAX_ATTEMPTS times
+THUMBNAIL_LEASE_SECONDS = 300
+THUMBNAIL_MAX_ATTEMPTS = 3
+
+thumbnail_storage = create_storage_backend(THUMBNAIL_ROOT, THUMBNAILS_NAMESPACE)
+
+_PDF_JPEG_IMAGE = re.compile(rb"/DCTDecode")
+_PDF_STREAM_START = re.compile(rb"stream\r?\n")
+
+def thumbnail_source_kind(filename: str) -> Optional[str]:
+    """"image", "pdf", or None when no preview can be made from this file type"""
+    return THUMBNAIL_SOURCE_KINDS.get(os.path.splitext(filename)[1].lower())
+
+def thumbnail_key(content_sha256: str) -> str:
+    extension = "webp" if THUMBNAIL_FORMAT == "WEBP" else "jpg"
+    return f"{content_sha256[:2]}/{content_sha256}-v{THUMBNAIL_VERSION}-{THUMBNAIL_MAX_SIDE}.{extension}"
+
+def thumbnail_etag(key: str) -> str:
+    """Changes whenever the thumbnail bytes can change (content, version, size)"""
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+def _first_pdf_page_image(data: bytes) -> Optional[Image.Image]:
+    """
+    First page-sized JPEG embedded in a PDF, as scanners write each page
+
+    Pillow cannot rasterize PDF pages, so PDFs without such an image (e.g.
+    generated from text) get no preview.
+    """
+    for match in _PDF_JPEG_IMAGE.finditer(data):
+        stream = _PDF_STREAM_START.search(data, match.end())
+        if stream is None:
+            break
+        end = data.find(b"endstream", stream.end())
+        if end < 0:
+            break
+        try:
+            # Only this stream is copied, so the scan stays linear in the file size
+            image = Image.open(io.BytesIO(data[stream.end():end]))
+        except Exception:
+            continue
+        if min(image.size) >= PDF_PAGE_IMAGE_MIN_SIDE:
+            return image
+    return None
+
+def render_thumbnail(data: bytes, kind: str) -> Optional[Tuple[bytes, int, int]]:
+    """(encoded thumbnail, width, height), or None when the file has no previewable image"""
+    image = _first_pdf_page_image(data) if kind == "pdf" else Image.open(io.BytesIO(data))
+    if image is None:
+        return None
+
+    # JPEG sources decode straight at a reduced scale
+    image.draft("RGB", (THUMBNAIL_MAX_SIDE, THUMBNAIL_MAX_SIDE))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((THUMBNAIL_MAX_SIDE, THUMBNAIL_MAX_SIDE), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+    if image.mode == "RGBA" and THUMBNAIL_FORMAT == "JPEG":
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+
+    output = io.BytesIO()
+    image.save(output, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+    return output.getvalue(), image.width, image.height
+
+def _render_batch(entries: List[Dict]) -> List[Dict]:
+    """Runs on a worker thread: render and store each claimed thumbnail; returns record updates"""
+    results = []
+    for entry in entries:
+        key = thumbnail_key(entry["sha256"])
+        try:
+            data = document_storage.read(blob_key(entry["sha256"]))
+            rendered = render_thumbnail(data, entry["kind"])
+            if rendered is None:
+                results.append({"status": "Unavailable"})
+                continue
+            thumbnail, width, height = rendered
+            thumbnail_storage.put(key, io.BytesIO(thumbnail), {"content_sha256": entry["sha256"]})
+            results.append({"status": "Ready", "key": key, "size": len(thumbnail), "width": width, "height": height})
+            if entry.get("key") and entry["key"] != key:
+                # Rendered by an older version; its object is no longer served
+                thumbnail_storage.delete(entry["key"])
+        except FileNotFoundError:
+            results.append({"status": "Failed", "error": "Source file missing"})
+        except Exception as e:
+            logger.warning(f"Thumbnail for {entry['sha256']} failed: {str(e)}")
+            results.append({"status": "Failed", "error": str(e)})
+    return results
+
+async def enqueue_thumbnail(db, content_sha256: str, filename: str) -> bool:
+    """Queue a preview of stored content; False when the file type has none"""
+    kind = thumbnail_source_kind(filename)
+    if kind is None:
+        return False
+    await db.document_thumbnails.update_one(
+        {"sha256": content_sha256},
+        {"$setOnInsert": {
+            "sha256": content_sha256, "kind": kind, "status": "Queued", "version": THUMBNAIL_VERSION,
+            "attempts": 0, "queued_at": datetime.now(timezone.utc)
+        }},
+        upsert=True
+    )
+    return True
+
+async def backfill_thumbnails(db) -> int:
+    """
+    Queue previews for stored documents that have none, and re-queue those
+    rendered by an older THUMBNAIL_VERSION; returns how many were queued
+    """
+    now = datetime.now(timezone.utc)
+    outdated = await db.document_thumbnails.update_many(
+        {"version": {"$ne": THUMBNAIL_VERSION}},
+        {"$set": {"status": "Queued", "version": THUMBNAIL_VERSION, "attempts": 0, "queued_at": now}}
+    )
+
+    requests = []
+    async for document in db.employee_documents.find(
+        {"content_sha256": {"$exists": True}, "slip_job_id": {"$exists": False}},
+        {"_id": 0, "content_sha256": 1, "document_name": 1}
+    ):
+        kind = thumbnail_source_kind(document["document_name"])
+        if kind is None:
+            continue
+        requests.append(UpdateOne(
+            {"sha256": document["content_sha256"]},
+            {"$setOnInsert": {
+                "sha256": document["content_sha256"], "kind": kind, "status": "Queued",
+                "version": THUMBNAIL_VERSION, "attempts": 0, "queued_at": now
+            }},
+            upsert=True
+        ))
+    added = 0
+    for start in range(0, len(requests), 1000):
+        result = await db.document_thumbnails.bulk_write(requests[start:start + 1000], ordered=False)
+        added += result.upserted_count
+
+    return outdated.modified_count + added
+
+async def get_thumbnail_versions(db, content_hashes: Iterable[str]) -> Dict[str, str]:
+    """Content hash -> thumbnail ETag, for the hashes whose thumbnail is ready"""
+    hashes = list({content_sha256 for content_sha256 in content_hashes if content_sha256})
+    if not hashes:
+        return {}
+    return {
+        thumbnail["sha256"]: thumbnail_etag(thumbnail["key"])
+        async for thumbnail in db.document_thumbnails.find(
+            {"sha256": {"$in": hashes}, "status": "Ready"}, {"_id": 0, "sha256": 1, "key": 1}
+        )
+    }
+
+async def get_document_thumbnail(db, content_sha256: Optional[str]) -> Optional[Tuple[bytes, str]]:
+    """(thumbnail bytes, ETag) for stored content, or None when none is ready"""
+    if not content_sha256:
+        return None
+    thumbnail = await db.document_thumbnails.find_one(
+        {"sha256": content_sha256, "status": "Ready"}, {"_id": 0, "key": 1}
+    )
+    if thumbnail is None:
+        return None
+    try:
+        data = await asyncio.to_thread(thumbnail_storage.read, thumbnail["key"])
+    except FileNotFoundError:
+        # Object removed behind our back; render it again
+        await db.document_thumbnails.update_one(
+            {"sha256": content_sha256},
+            {"$set": {"status": "Queued", "attempts": 0, "queued_at": datetime.now(timezone.utc)}}
+        )
+        thumbnail_worker.wake()
+        return None
+    return data, thumbnail_etag(thumbnail["key"])
+
+async def collect_orphaned_thumbnails(db) -> int:
+    """Remove thumbnails whose source content is no longer in the blob store"""
+    # One indexed join on sha256 rather than a blob lookup per thumbnail
+    orphans = [
+        thumbnail
+        async for thumbnail in db.document_thumbnails.aggregate([
+            {"$project": {"_id": 0, "sha256": 1, "key": 1}},
+            {"$lookup": {"from": "document_blobs", "localField": "sha256", "foreignField": "sha256", "as": "blobs"}},
+            {"$match": {"blobs": {"$size": 0}}},
+            {"$project": {"blobs": 0}}
+        ])
+    ]
+    if not orphans:
+        return 0
+
+    await db.document_thumbnails.delete_many({"sha256": {"$in": [thumbnail["sha256"] for thumbnail in orphans]}})
+    keys = [thumbnail["key"] for thumbnail in orphans if thumbnail.get("key")]
+    await asyncio.to_thread(lambda: [thumbnail_storage.delete(key) for key in keys])
+    return len(orphans)
+
+async def get_thumbnail_stats(db) -> Dict:
+    counts = {
+        row["_id"]: row["count"]
+        async for row in db.document_thumbnails.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}])
+    }
+    return {
+        "format": THUMBNAIL_FORMAT,
+        "max_side": THUMBNAIL_MAX_SIDE,
+        "statuses": counts,
+        "rendered": thumbnail_worker.rendered,
+        "batches": thumbnail_worker.batches
+    }
+
+class ThumbnailWorker:
+    """
+    Background thumbnail generation, off the request path
+
+    Uploads only queue a record and wake the worker. It claims queued
+    records in batches and renders each batch on one worker thread. Every
+    API process runs a worker; claims are atomic, so they share the queue.
+    """
+
+    def __init__(self, batch_size: int = THUMBNAIL_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.rendered = 0
+        self.batches = 0
+        self._wake_event: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, db):
+        self._wake_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run(db))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def wake(self):
+        if self._wake_event is not None:
+            self._wake_event.set()
+
+    async def _run(self, db):
+        try:
+            queued = await backfill_thumbnails(db)
+            if queued:
+                logger.info(f"Queued {queued} document thumbnails")
+        except Exception as e:
+            logger.error(f"Thumbnail backfill failed: {str(e)}")
+
+        while True:
+            self._wake_event.clear()
+            try:
+                claimed = await self.process_batch(db)
+            except Exception as e:
+                logger.error(f"Thumbnail batch failed: {str(e)}")
+                claimed = 0
+            if claimed >= self.batch_size:
+                continue
+
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), THUMBNAIL_POLL_SECONDS)
+                await asyncio.sleep(THUMBNAIL_BATCH_DELAY_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self, db) -> List[Dict]:
+        now = datetime.now(timezone.utc)
+        # Claims that timed out on their last attempt are not retried; give them up
+        await db.document_thumbnails.update_many(
+            {"status": "Running", "lease_expires": {"$lt": now}, "attempts": {"$gte": THUMBNAIL_MAX_ATTEMPTS}},
+            {"$set": {"status": "Failed", "error": f"Not finished after {THUMBNAIL_MAX_ATTEMPTS} attempts",
+                      "completed_at": now},
+             "$unset": {"lease_expires": ""}}
+        )
+        claimed = []
+        while len(claimed) < self.batch_size:
+            entry = await db.document_thumbnails.find_one_and_update(
+                {"$or": [
+                    {"status": "Queued"},
+                    {"status": "Running", "lease_expires": {"$lt": now}, "attempts": {"$lt": THUMBNAIL_MAX_ATTEMPTS}}
+                ]},
+                {"$set": {"status": "Running", "lease_expires": now + timedelta(seconds=THUMBNAIL_LEASE_SECONDS)},
+                 "$inc": {"attempts": 1}},
+                projection={"_id": 0, "sha256": 1, "kind": 1, "key": 1, "attempts": 1},
+                sort=[("queued_at", 1)]
+            )
+            if entry is None:
+                break
+            # The document is returned as it was before the claim
+            entry["attempts"] = entry.get("attempts", 0) + 1
+            claimed.append(entry)
+        return claimed
+
+    async def process_batch(self, db) -> int:
+        """Claim, render and record one batch of queued thumbnails; returns how many were claimed"""
+        claimed = await self._claim(db)
+        if not claimed:
+            return 0
+
+        results = await asyncio.to_thread(_render_batch, claimed)
+        now = datetime.now(timezone.utc)
+        await db.document_thumbnails.bulk_write([
+            UpdateOne(
+                # A claim whose lease expired and was taken again must not overwrite the newer result
+                {"sha256": entry["sha256"], "status": "Running", "attempts": entry["attempts"]},
+                {"$set": {"error": "", **result, "completed_at": now}, "$unset": {"lease_expires": ""}}
+            )
+            for entry, result in zip(claimed, results)
+        ], ordered=False)
+
+        self.batches += 1
+        self.rendered += sum(result["status"] == "Ready" for result in results)
+        return len(claimed)
+
+thumbnail_worker = ThumbnailWorker()
@@ -7,42 +7,24 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 from datetime import datetime, timezone
 import io
 import base64
-import requests
-from PIL import Image as PILImage
+from brand_assets import header_logo_flowable
 from logo_watermark_generator import (
     create_watermarked_document, 
     create_professional_header_with_logo, 
     create_professional_footer,
-    enhance_document_styling,
+    get_document_styles,
     get_professional_table_style
 )
 
-def download_and_process_logo():
-    """Download company logo and prepare for PDF"""
-    try:
-        logo_url = "https://customer-assets.emergentagent.com/job_vishwas-hrms/artifacts/o6uun6ue_IMG-20251002-WA0067.jpg"
-        response = requests.get(logo_url)
-        
-        if response.status_code == 200:
-            # Save logo temporarily
-            with open('/tmp/company_logo.jpg', 'wb') as f:
-                f.write(response.content)
-            return '/tmp/company_logo.jpg'
-    except Exception as e:
-        print(f"Error downloading logo: {e}")
-    
-    return None
-
 def create_company_header_with_logo(styles):
     """Create company letterhead with logo"""
     story = []
     
-    # Try to add logo
-    logo_path = download_and_process_logo()
-    if logo_path:
+    # Logo comes from memory (brand asset registry)
+    logo_img = header_logo_flowable(1*inch)
+    if logo_img is not None:
         try:
             # Create table with logo and company info
-            logo_img = Image(logo_path, width=1*inch, height=1*inch)
             company_info = [
                 Paragraph('<b><font size="16">VISHWAS WORLD TECH PRIVATE LIMITED</font></b>', styles['Title']),
                 Paragraph('<font size="10">100 DC Complex, Chandra Layout, Bangalore - 560040</font>', styles['Normal']),
@@ -80,7 +62,7 @@ def create_company_header_with_logo(styles):
 def generate_employee_agreement_content(employee_data):
     """Generate employee agreement content for watermarked document"""
     # Get enhanced professional styles
-    styles = enhance_document_styling()
+    styles = get_document_styles()
     
     # Enhanced justify style for legal content
     justify_style = ParagraphStyle(
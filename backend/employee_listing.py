@@ -0,0 +1,79 @@
+from typing import Dict, Iterable, List, Optional
+import time
+
+# Largest page either employee listing endpoint returns
+EMPLOYEE_PAGE_SIZE_LIMIT = 1000
+
+# Fields the salary processing dropdown needs (the default selection there)
+SALARY_SELECTION_FIELDS = [
+    "employee_id", "full_name", "department", "designation",
+    "email_address", "contact_number", "basic_salary"
+]
+
+# Total counts per filter are served from memory for this long
+EMPLOYEE_COUNT_CACHE_TTL_SECONDS = 60
+
+class EmployeeCountCache:
+    """Short-lived cache of employee counts keyed by listing filter"""
+
+    def __init__(self, ttl: float = EMPLOYEE_COUNT_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._counts: Dict[tuple, tuple] = {}
+
+    async def get(self, db, department: Optional[str] = None, status: Optional[str] = None) -> int:
+        key = (department, status)
+        cached = self._counts.get(key)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+
+        count = await db.employees.count_documents(build_employee_filter(department, status))
+        self._counts[key] = (count, time.monotonic() + self.ttl)
+        return count
+
+    def invalidate(self):
+        """Drop every cached count after employees are added or removed"""
+        self._counts.clear()
+
+employee_count_cache = EmployeeCountCache()
+
+def build_employee_filter(department: Optional[str] = None, status: Optional[str] = None,
+                          after: Optional[str] = None) -> Dict:
+    """Employee query for the listing filters, starting after the `after` employee_id"""
+    query = {}
+    if department:
+        query["department"] = department
+    if status:
+        query["status"] = status
+    if after:
+        query["employee_id"] = {"$gt": after}
+    return query
+
+def parse_field_selection(fields: Optional[str], allowed_fields: Iterable[str]) -> Optional[List[str]]:
+    """
+    Parse a comma separated fields= parameter
+
+    Returns None when no selection was made. Raises ValueError naming any
+    field that is not allowed. employee_id is always included, as the cursor.
+    """
+    if not fields:
+        return None
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in allowed_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if "employee_id" not in selected:
+        selected.insert(0, "employee_id")
+    return selected
+
+def build_employee_projection(selected_fields: Optional[List[str]]) -> Dict:
+    """Mongo projection for a field selection; never returns password hashes"""
+    if selected_fields is None:
+        return {"_id": 0, "password_hash": 0}
+    return {"_id": 0, **{field: 1 for field in selected_fields}}
+
+async def fetch_employee_page(db, query: Dict, projection: Dict, limit: int) -> tuple:
+    """One keyset page of employees ordered by employee_id, plus the next cursor (or None)"""
+    limit = max(1, min(limit, EMPLOYEE_PAGE_SIZE_LIMIT))
+    employees = await db.employees.find(query, projection).sort("employee_id", 1).limit(limit).to_list(limit)
+    next_cursor = employees[-1]["employee_id"] if len(employees) == limit else None
+    return employees, next_cursor
@@ -1,10 +1,9 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, File
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime, timezone
 import uuid
-import os
 import base64
 
 # Enhanced Models for new features
@@ -19,6 +18,7 @@ class EmployeeDocument(BaseModel):
     uploaded_by: str
     uploaded_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     description: Optional[str] = ""
+    content_sha256: Optional[str] = None
 
 class CompanyAnnouncement(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -55,6 +55,7 @@ class EmployeeDocumentResponse(BaseModel):
     uploaded_by: str
     uploaded_at: datetime
     description: str
+    thumbnail_version: Optional[str] = None  # Set once a preview is ready; changes when it does
 
 class AnnouncementResponse(BaseModel):
     id: str
@@ -68,29 +69,12 @@ class AnnouncementResponse(BaseModel):
     is_active: bool
     target_departments: List[str]
 
-# File upload utilities
-def save_uploaded_file(file: UploadFile, employee_id: str, document_type: str) -> tuple:
-    """Save uploaded file and return file path and size"""
-    # Create directory for employee documents
-    upload_dir = f"/app/uploaded_documents/{employee_id}"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Generate unique filename
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"{document_type}_{uuid.uuid4().hex[:8]}{file_extension}"
-    file_path = os.path.join(upload_dir, unique_filename)
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        content = file.file.read()
-        buffer.write(content)
-        file_size = len(content)
-    
-    return file_path, file_size
-
-def get_file_as_base64(file_path: str) -> str:
-    """Convert file to base64 for download"""
+# File download utilities
+def get_file_as_base64(file_path: str, storage=None, key: Optional[str] = None) -> str:
+    """Convert file to base64 for download; objects in a storage backend are read through it"""
     try:
+        if storage is not None and key is not None:
+            return base64.b64encode(storage.read(key)).decode()
         with open(file_path, "rb") as file:
             return base64.b64encode(file.read()).decode()
     except FileNotFoundError:
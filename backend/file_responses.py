@@ -0,0 +1,165 @@
+from typing import Callable, Iterator, Optional, Tuple
+from urllib.parse import quote
+import asyncio
+import hashlib
+import os
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+
+# Bytes read per step when streaming a file from disk
+FILE_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Query flag value selecting the legacy base64-in-JSON body (?format=json)
+LEGACY_JSON_FORMAT = "json"
+
+# Query flag value asking for a direct download link instead of the bytes (?format=url)
+DOWNLOAD_URL_FORMAT = "url"
+
+# Cache lifetime of content whose URL changes whenever the content does
+IMMUTABLE_MAX_AGE_SECONDS = 365 * 24 * 3600
+
+def wants_json(format: Optional[str]) -> bool:
+    """True when the caller asked for the legacy base64-in-JSON body"""
+    return format == LEGACY_JSON_FORMAT
+
+def wants_download_url(format: Optional[str]) -> bool:
+    """True when the caller asked for a presigned download link"""
+    return format == DOWNLOAD_URL_FORMAT
+
+def content_disposition(filename: str) -> str:
+    """Attachment header with an ASCII fallback and the UTF-8 name for browsers that read it"""
+    fallback = filename.encode("ascii", "ignore").decode().replace('"', "") or "download"
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+def parse_byte_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single "bytes=" range, or None for the whole body
+
+    Multiple ranges are answered with the whole body, which RFC 9110 allows.
+    Raises 416 for a range that starts beyond the end of the content.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416, detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [value.strip().removeprefix("W/") for value in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+def _conditional_parts(request: Request, size: int, etag: str) -> Tuple[int, Optional[Tuple[int, int]]]:
+    """(status, byte range) for a download; 304 when the client's copy is current"""
+    # Conditional and partial requests only apply to GET/HEAD (RFC 9110)
+    if request.method not in ("GET", "HEAD"):
+        return 200, None
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return 304, None
+
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != etag:
+        return 200, None
+    byte_range = parse_byte_range(request.headers.get("range"), size)
+    return (206, byte_range) if byte_range else (200, None)
+
+def _download_headers(etag: str, filename: str, size: int, byte_range: Optional[Tuple[int, int]]) -> dict:
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": content_disposition(filename)
+    }
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+    else:
+        headers["Content-Length"] = str(size)
+    return headers
+
+def bytes_download_response(request: Request, data: bytes, filename: str,
+                            media_type: str = "application/pdf") -> Response:
+    """Binary download of generated content, with ETag and range support"""
+    etag = f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+    status, byte_range = _conditional_parts(request, len(data), etag)
+    headers = _download_headers(etag, filename, len(data), byte_range)
+    if status == 304:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": headers["Cache-Control"]})
+
+    body = data[byte_range[0]:byte_range[1] + 1] if byte_range else data
+    return Response(
+        content=b"" if request.method == "HEAD" else body,
+        status_code=status, media_type=media_type, headers=headers
+    )
+
+def immutable_bytes_response(request: Request, data: bytes, etag: str, media_type: str) -> Response:
+    """Inline content the browser may keep for a year; revalidation answers 304"""
+    etag = f'"{etag}"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={IMMUTABLE_MAX_AGE_SECONDS}, immutable"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=b"" if request.method == "HEAD" else data, media_type=media_type, headers=headers)
+
+def _iter_file(path: str, start: int, end: int) -> Iterator[bytes]:
+    length = end - start + 1
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(FILE_STREAM_CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+def _streamed_download(request: Request, size: int, etag: str, iter_range: Callable[[int, int], Iterator[bytes]],
+                       filename: str, media_type: str) -> Response:
+    status, byte_range = _conditional_parts(request, size, etag)
+    headers = _download_headers(etag, filename, size, byte_range)
+    if status == 304:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": headers["Cache-Control"]})
+    if request.method == "HEAD" or size == 0:
+        return Response(status_code=status, media_type=media_type, headers=headers)
+
+    start, end = byte_range or (0, size - 1)
+    return StreamingResponse(iter_range(start, end), status_code=status, media_type=media_type, headers=headers)
+
+def file_download_response(request: Request, path: str, filename: str,
+                           media_type: str = "application/octet-stream") -> Response:
+    """Stream a stored file in chunks, with ETag and range support"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    etag = f'"{hashlib.md5(f"{stat.st_mtime_ns}-{stat.st_size}".encode()).hexdigest()}"'
+    return _streamed_download(
+        request, stat.st_size, etag, lambda start, end: _iter_file(path, start, end), filename, media_type
+    )
+
+async def object_download_response(request: Request, storage, key: str, filename: str,
+                                   media_type: str = "application/octet-stream") -> Response:
+    """Stream an object from a storage backend with ranged reads, ETag and range support"""
+    stored = await asyncio.to_thread(storage.stat, key)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return _streamed_download(
+        request, stored.size, stored.etag, lambda start, end: storage.iter_range(key, start, end), filename, media_type
+    )
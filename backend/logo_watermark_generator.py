@@ -9,31 +9,16 @@ from reportlab.lib.utils import ImageReader
 from datetime import datetime, timezone
 import io
 import base64
-import requests
-from PIL import Image as PILImage
-import os
+from brand_assets import brand_assets, header_logo_flowable
+from pdf_layers import STATIC_LAYERS_ENABLED, StaticLayer, draw_static_form
 
 class LogoWatermarkCanvas(canvas.Canvas):
     """Custom canvas class to add watermark to every page"""
     
     def __init__(self, *args, **kwargs):
         canvas.Canvas.__init__(self, *args, **kwargs)
-        self.logo_path = self.download_and_process_logo()
-        
-    def download_and_process_logo(self):
-        """Download and process company logo"""
-        try:
-            logo_url = "https://customer-assets.emergentagent.com/job_vishwas-hrms/artifacts/o6uun6ue_IMG-20251002-WA0067.jpg"
-            response = requests.get(logo_url)
-            
-            if response.status_code == 200:
-                # Save logo temporarily
-                with open('/tmp/watermark_logo.jpg', 'wb') as f:
-                    f.write(response.content)
-                return '/tmp/watermark_logo.jpg'
-        except Exception as e:
-            print(f"Error downloading logo for watermark: {e}")
-        return None
+        # Shared, pre-scaled logo from the brand asset registry
+        self.watermark_logo = brand_assets.get_watermark_logo()
     
     def showPage(self):
         """Add watermark to each page before showing"""
@@ -42,45 +27,19 @@ class LogoWatermarkCanvas(canvas.Canvas):
     
     def add_watermark(self):
         """Add logo watermark to the page"""
-        if self.logo_path and os.path.exists(self.logo_path):
+        if self.watermark_logo is not None:
             try:
                 # Save current graphics state
                 self.saveState()
+                page = (0, 0) + A4
                 
-                # Set transparency for watermark
+                # Logo and text are drawn once per document as form XObjects and
+                # reused on every page; transparency is set here because ReportLab
+                # forms do not carry their own alpha states
                 self.setFillAlpha(0.1)  # Very transparent
-                
-                # Calculate center position
-                page_width, page_height = A4
-                center_x = page_width / 2
-                center_y = page_height / 2
-                
-                # Draw watermark logo in center
-                logo_width = 4 * inch
-                logo_height = 4 * inch
-                
-                self.drawImage(
-                    self.logo_path,
-                    center_x - logo_width/2,
-                    center_y - logo_height/2,
-                    width=logo_width,
-                    height=logo_height,
-                    mask='auto',
-                    preserveAspectRatio=True
-                )
-                
-                # Add "VISHWAS WORLD TECH" text watermark
-                self.setFont("Helvetica-Bold", 48)
-                self.setFillColor(colors.lightgrey)
+                draw_static_form(self, "layer_watermark_logo", self.draw_watermark_logo, page)
                 self.setFillAlpha(0.05)
-                
-                # Rotate and draw company name
-                self.saveState()
-                self.translate(center_x, center_y - 100)
-                self.rotate(45)
-                text_width = self.stringWidth("VISHWAS WORLD TECH", "Helvetica-Bold", 48)
-                self.drawString(-text_width/2, 0, "VISHWAS WORLD TECH")
-                self.restoreState()
+                draw_static_form(self, "layer_watermark_text", self.draw_watermark_text, page)
                 
                 # Restore graphics state
                 self.restoreState()
@@ -88,33 +47,62 @@ class LogoWatermarkCanvas(canvas.Canvas):
             except Exception as e:
                 print(f"Error adding watermark: {e}")
                 self.restoreState()
-
-def download_and_process_logo():
-    """Download company logo and prepare for PDF"""
-    try:
-        logo_url = "https://customer-assets.emergentagent.com/job_vishwas-hrms/artifacts/o6uun6ue_IMG-20251002-WA0067.jpg"
-        response = requests.get(logo_url)
+    
+    def draw_watermark_logo(self, canv):
+        """Draw watermark logo in center"""
+        page_width, page_height = A4
+        logo_width = 4 * inch
+        logo_height = 4 * inch
         
-        if response.status_code == 200:
-            # Save logo temporarily
-            with open('/tmp/company_logo_header.jpg', 'wb') as f:
-                f.write(response.content)
-            return '/tmp/company_logo_header.jpg'
-    except Exception as e:
-        print(f"Error downloading logo: {e}")
+        canv.drawImage(
+            self.watermark_logo,
+            page_width/2 - logo_width/2,
+            page_height/2 - logo_height/2,
+            width=logo_width,
+            height=logo_height,
+            mask='auto',
+            preserveAspectRatio=True
+        )
     
-    return None
+    def draw_watermark_text(self, canv):
+        """Add "VISHWAS WORLD TECH" text watermark, rotated across the center"""
+        page_width, page_height = A4
+        canv.setFont("Helvetica-Bold", 48)
+        canv.setFillColor(colors.lightgrey)
+        
+        canv.saveState()
+        canv.translate(page_width / 2, page_height / 2 - 100)
+        canv.rotate(45)
+        text_width = canv.stringWidth("VISHWAS WORLD TECH", "Helvetica-Bold", 48)
+        canv.drawString(-text_width/2, 0, "VISHWAS WORLD TECH")
+        canv.restoreState()
 
-def create_professional_header_with_logo(styles):
+_document_styles = None
+
+def get_document_styles():
+    """Stylesheet shared by every document in this process; do not modify it"""
+    global _document_styles
+    if not STATIC_LAYERS_ENABLED:
+        return enhance_document_styling()
+    if _document_styles is None:
+        _document_styles = enhance_document_styling()
+    return _document_styles
+
+def create_professional_header_with_logo(styles=None):
     """Create professional company header with logo and styling"""
+    # Identical in every document, so it is laid out once and reused as a form
+    return [StaticLayer("professional_header", build_professional_header)]
+
+def build_professional_header():
+    """Flowables of the professional header (see create_professional_header_with_logo)"""
+    styles = get_document_styles()
     story = []
     
-    # Try to add logo
-    logo_path = download_and_process_logo()
-    if logo_path:
+    # Logo comes from memory (brand asset registry)
+    logo_img = header_logo_flowable(1.5*inch)
+    if logo_img is not None:
         try:
             # Create professional header with logo and company info
-            logo_img = Image(logo_path, width=1.5*inch, height=1.5*inch)
             
             # Company information with enhanced styling
             company_info = [
@@ -160,8 +148,13 @@ def create_professional_header_with_logo(styles):
     
     return story
 
-def create_professional_footer(styles):
+def create_professional_footer(styles=None):
     """Create professional footer with company branding"""
+    return [StaticLayer("professional_footer", build_professional_footer)]
+
+def build_professional_footer():
+    """Flowables of the professional footer (see create_professional_footer)"""
+    styles = get_document_styles()
     footer_content = [
         Spacer(1, 30),
         Paragraph('<hr width="100%" color="darkblue" size="2"/>', styles['Normal']),
@@ -247,15 +240,14 @@ def create_watermarked_document(content_generator_func, *args, **kwargs):
         buffer, 
         pagesize=A4, 
         topMargin=0.5*inch, 
-        bottomMargin=0.5*inch,
-        canvasmaker=LogoWatermarkCanvas
+        bottomMargin=0.5*inch
     )
     
     # Generate document content
     story = content_generator_func(*args, **kwargs)
     
-    # Build PDF with watermark
-    doc.build(story)
+    # Build PDF with watermark (canvasmaker is a build() argument)
+    doc.build(story, canvasmaker=LogoWatermarkCanvas)
     
     # Get PDF data and encode to base64
     pdf_data = buffer.getvalue()
@@ -0,0 +1,114 @@
+from datetime import date, datetime, time, timezone
+from typing import Dict, Iterable, List, Optional, Type, Union, get_args
+
+from pydantic import BaseModel
+
+DateLike = Union[datetime, date]
+
+# Storage codec: dates and datetimes are persisted as native BSON dates (UTC).
+# BSON has no date-only type, so a date is stored as midnight UTC of that day.
+# Documents written before the switch hold ISO strings instead; readers accept
+# both forms until date_migration has rewritten them.
+
+def to_bson_datetime(value: DateLike) -> datetime:
+    """Convert a date or datetime to the aware UTC datetime stored in MongoDB"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+    return datetime.combine(value, time.min, tzinfo=timezone.utc)
+
+def to_legacy_string(value: DateLike) -> str:
+    """ISO string the pre-codec storage used for the same value"""
+    if isinstance(value, datetime):
+        return to_bson_datetime(value).isoformat()
+    return value.isoformat()
+
+def parse_stored_datetime(value) -> Optional[datetime]:
+    """Read a stored date value in either the BSON or the legacy ISO string form"""
+    if value is None:
+        return None
+    if isinstance(value, (datetime, date)):
+        return to_bson_datetime(value)
+    return to_bson_datetime(datetime.fromisoformat(str(value).replace('Z', '+00:00')))
+
+def encode_document(data: Dict) -> Dict:
+    """Prepare a document for MongoDB: top-level dates become BSON dates"""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(value, (datetime, date)):
+                data[key] = to_bson_datetime(value)
+    return data
+
+def _date_kind(annotation):
+    """datetime or date if a field annotation is (an Optional of) one, else None"""
+    for candidate in (annotation, *get_args(annotation)):
+        if candidate is datetime:
+            return datetime
+        if candidate is date:
+            return date
+    return None
+
+class DocumentDecoder:
+    """
+    Decoder for one collection's documents, generated from its Pydantic model
+
+    Only the model's date and datetime fields are touched, so free-text fields
+    are never parsed. Build it once per model and reuse it for every request.
+    """
+
+    def __init__(self, model: Type[BaseModel], extra_datetime_fields: Iterable[str] = ()):
+        self.model = model
+        self.datetime_fields = list(extra_datetime_fields)
+        self.date_fields = []
+        for name, field in model.model_fields.items():
+            kind = _date_kind(field.annotation)
+            if kind is datetime:
+                self.datetime_fields.append(name)
+            elif kind is date:
+                self.date_fields.append(name)
+
+    def __call__(self, document: Optional[Dict]) -> Optional[Dict]:
+        if not document:
+            return document
+        for field in self.datetime_fields:
+            value = document.get(field)
+            if value is None or (isinstance(value, datetime) and value.tzinfo is not None):
+                continue
+            try:
+                document[field] = parse_stored_datetime(value)
+            except ValueError:
+                pass
+        for field in self.date_fields:
+            value = document.get(field)
+            if isinstance(value, datetime):
+                document[field] = value.date()
+            elif isinstance(value, str):
+                try:
+                    document[field] = date.fromisoformat(value[:10])
+                except ValueError:
+                    pass
+        return document
+
+def date_range_clauses(field: str, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                       start_op: str = "$gte", end_op: str = "$lt") -> List[Dict]:
+    """
+    Range filters on a date field for both storage forms
+
+    The BSON clause is an indexed range scan; the string clause matches
+    documents not yet migrated and becomes an empty index range afterwards.
+    """
+    native = {}
+    legacy = {}
+    if start is not None:
+        native[start_op] = to_bson_datetime(start)
+        legacy[start_op] = to_legacy_string(start)
+    if end is not None:
+        native[end_op] = to_bson_datetime(end)
+        legacy[end_op] = to_legacy_string(end)
+    return [{field: native}, {field: legacy}]
+
+def date_range_query(field: str, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                     start_op: str = "$gte", end_op: str = "$lt") -> Dict:
+    """Query document matching a date range in either storage form"""
+    return {"$or": date_range_clauses(field, start, end, start_op, end_op)}
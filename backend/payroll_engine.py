@@ -0,0 +1,258 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import calendar
+
+import numpy as np
+import pandas as pd
+
+from salary_calculator import SalaryCalculator
+
+# Result columns produced by a batch run, in the order they appear on a salary slip
+EARNING_COLUMNS = [
+    'basic_salary', 'hra', 'da', 'medical_allowance',
+    'transport_allowance', 'special_allowance', 'gross_salary'
+]
+DEDUCTION_COLUMNS = [
+    'pf_employee', 'pf_employer', 'esi_employee', 'esi_employer',
+    'professional_tax', 'income_tax', 'total_deductions'
+]
+
+def round_to_paisa(values) -> np.ndarray:
+    """
+    Round an array to 2 decimals exactly like Python's built-in round()
+
+    np.round scales by 100 before rounding, which can land on the wrong side of
+    a half-paisa. Those ambiguous values are rare, so they are re-rounded with
+    the scalar round() while everything else stays vectorized.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, 2)
+    scaled = values * 100.0
+    ambiguous = np.nonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)[0]
+    if ambiguous.size:
+        rounded[ambiguous] = [round(value, 2) for value in values[ambiguous].tolist()]
+    return rounded
+
+class BatchSalaryCalculator(SalaryCalculator):
+    """
+    Vectorized company-wide payroll on top of SalaryCalculator
+    Uses the same rates and the same order of arithmetic as the scalar
+    calculate_monthly_salary, so every component matches it to the paisa
+    """
+
+    def calculate_monthly_salaries(self, basic_salary, present_days, total_working_days,
+                                   medical=None, transport=None, special=None) -> Dict[str, np.ndarray]:
+        """
+        Calculate monthly salaries for many employees in one pass
+
+        Args:
+            basic_salary: Basic salary per month for each employee
+            present_days: Present days for each employee
+            total_working_days: Working days in the month (scalar or per employee)
+            medical, transport, special: Optional per-employee allowance overrides
+
+        Returns:
+            Dictionary of rounded result arrays keyed by salary component
+        """
+        basic_salary = np.asarray(basic_salary, dtype=np.float64)
+        count = basic_salary.shape[0]
+        present_days = np.broadcast_to(np.asarray(present_days, dtype=np.float64), (count,))
+        total_working_days = np.broadcast_to(np.asarray(total_working_days, dtype=np.float64), (count,))
+
+        # Pro-rated basic salary based on attendance
+        attendance_ratio = np.divide(
+            present_days, total_working_days,
+            out=np.zeros(count), where=total_working_days > 0
+        )
+        prorated_basic = basic_salary * attendance_ratio
+
+        # Standard allowances
+        hra_rate = self.HRA_RATE_METRO if self.is_metro_city else self.HRA_RATE_NON_METRO
+        hra = prorated_basic * hra_rate
+        da = prorated_basic * self.DA_RATE
+
+        # Additional allowances (same defaults as the scalar calculator)
+        medical_allowance = self._allowance(medical, 1250, count) * attendance_ratio
+        transport_allowance = self._allowance(transport, 1600, count) * attendance_ratio
+        special_allowance = self._allowance(special, 0, count) * attendance_ratio
+
+        gross_salary = (prorated_basic + hra + da + medical_allowance +
+                        transport_allowance + special_allowance)
+
+        # Like the scalar path, net pay is taken against the rounded deductions
+        deductions = self.calculate_deductions_batch(prorated_basic, gross_salary)
+        total_deductions = round_to_paisa(deductions['total_deductions'])
+        net_salary = gross_salary - total_deductions
+
+        pf_employer = round_to_paisa(deductions['pf_employer'])
+        esi_employer = round_to_paisa(deductions['esi_employer'])
+
+        results = {
+            'present_days': present_days,
+            'total_working_days': total_working_days,
+            'attendance_percentage': round_to_paisa(attendance_ratio * 100),
+            'basic_salary': round_to_paisa(prorated_basic),
+            'hra': round_to_paisa(hra),
+            'da': round_to_paisa(da),
+            'medical_allowance': round_to_paisa(medical_allowance),
+            'transport_allowance': round_to_paisa(transport_allowance),
+            'special_allowance': round_to_paisa(special_allowance),
+            'gross_salary': round_to_paisa(gross_salary),
+            'net_salary': round_to_paisa(net_salary),
+            'total_employer_contribution': round_to_paisa(pf_employer + esi_employer)
+        }
+        for column in DEDUCTION_COLUMNS:
+            results[column] = round_to_paisa(deductions[column])
+
+        return results
+
+    def calculate_deductions_batch(self, basic_salary: np.ndarray, gross_salary: np.ndarray) -> Dict[str, np.ndarray]:
+        """Calculate all statutory deductions (unrounded) for arrays of salaries"""
+
+        # PF Calculation (12% of basic salary, max on 15,000)
+        pf_eligible_salary = np.minimum(basic_salary, self.PF_WAGE_LIMIT)
+        pf_employee = pf_eligible_salary * self.PF_RATE
+        pf_employer = pf_eligible_salary * self.PF_RATE
+
+        # ESI Calculation (1.75% of gross salary, only if gross <= 21,000)
+        esi_applicable = gross_salary <= self.ESI_WAGE_LIMIT
+        esi_employee = np.where(esi_applicable, gross_salary * self.ESI_RATE, 0.0)
+        esi_employer = np.where(esi_applicable, gross_salary * 0.0475, 0.0)
+
+        pt = self.calculate_professional_tax_batch(gross_salary)
+        income_tax = self.calculate_income_tax_batch(gross_salary)
+
+        total_deductions = pf_employee + esi_employee + pt + income_tax
+
+        return {
+            'pf_employee': pf_employee,
+            'pf_employer': pf_employer,
+            'esi_employee': esi_employee,
+            'esi_employer': esi_employer,
+            'professional_tax': pt,
+            'income_tax': income_tax,
+            'total_deductions': total_deductions
+        }
+
+    def calculate_professional_tax_batch(self, gross_salary: np.ndarray) -> np.ndarray:
+        """Professional Tax for an array of gross salaries (first matching slab wins)"""
+        conditions = [(min_sal <= gross_salary) & (gross_salary <= max_sal)
+                      for min_sal, max_sal, _ in self.PT_RATES]
+        amounts = [float(pt_amount) for _, _, pt_amount in self.PT_RATES]
+        return np.select(conditions, amounts, default=0.0)
+
+    def calculate_income_tax_batch(self, gross_salary: np.ndarray) -> np.ndarray:
+        """Simplified monthly Income Tax for an array of gross salaries"""
+        annual_salary = gross_salary * 12
+
+        conditions = [
+            annual_salary <= 300000,
+            annual_salary <= 600000,
+            annual_salary <= 900000,
+            annual_salary <= 1200000
+        ]
+        slabs = [
+            np.zeros_like(annual_salary),
+            (annual_salary - 300000) * 0.05,
+            300000 * 0.05 + (annual_salary - 600000) * 0.10,
+            300000 * 0.05 + 300000 * 0.10 + (annual_salary - 900000) * 0.15
+        ]
+        above = 300000 * 0.05 + 300000 * 0.10 + 300000 * 0.15 + (annual_salary - 1200000) * 0.20
+        annual_tax = np.select(conditions, slabs, default=above)
+
+        return annual_tax / 12
+
+    def calculate_payroll_frame(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calculate salaries for a pandas frame of employees
+
+        The frame needs basic_salary, present_days and total_working_days columns;
+        medical, transport and special columns are used when present.
+        Returns a frame with one column per salary component, on the same index.
+        """
+        results = self.calculate_monthly_salaries(
+            frame['basic_salary'].to_numpy(),
+            frame['present_days'].to_numpy(),
+            frame['total_working_days'].to_numpy(),
+            medical=frame['medical'].to_numpy() if 'medical' in frame else None,
+            transport=frame['transport'].to_numpy() if 'transport' in frame else None,
+            special=frame['special'].to_numpy() if 'special' in frame else None
+        )
+        return pd.DataFrame(results, index=frame.index)
+
+    @staticmethod
+    def salary_breakdown(results: Dict[str, np.ndarray], index: int) -> Dict:
+        """Build the calculate_monthly_salary() dictionary for one row of a batch result"""
+        return {
+            'employee_details': {
+                'present_days': int(results['present_days'][index]),
+                'total_working_days': int(results['total_working_days'][index]),
+                'attendance_percentage': float(results['attendance_percentage'][index])
+            },
+            'earnings': {column: float(results[column][index]) for column in EARNING_COLUMNS},
+            'deductions': {column: float(results[column][index]) for column in DEDUCTION_COLUMNS},
+            'net_salary': float(results['net_salary'][index]),
+            'employer_contributions': {
+                'pf_employer': float(results['pf_employer'][index]),
+                'esi_employer': float(results['esi_employer'][index]),
+                'total_employer_contribution': float(results['total_employer_contribution'][index])
+            }
+        }
+
+    @staticmethod
+    def _allowance(values, default: float, count: int) -> np.ndarray:
+        if values is None:
+            return np.full(count, float(default))
+        return np.broadcast_to(np.asarray(values, dtype=np.float64), (count,))
+
+# Utility functions for integration with HRMS
+def calculate_company_payroll(employees: List[Dict], present_days: Dict[str, int],
+                              year: int = None, month: int = None,
+                              total_working_days: Optional[int] = None) -> List[Dict]:
+    """
+    Calculate salaries for a whole company in one vectorized pass
+
+    Args:
+        employees: Employee documents (employee_id, full_name, basic_salary, ...)
+        present_days: Present days for the month keyed by employee_id
+        year: Year for calculation (default: current year)
+        month: Month for calculation (default: current month)
+        total_working_days: Working days in the month (default: SalaryCalculator rule)
+
+    Returns:
+        One calculate_employee_salary()-shaped dictionary per employee, in input order
+    """
+    if year is None or month is None:
+        now = datetime.now(timezone.utc)
+        year = year or now.year
+        month = month or now.month
+
+    # Same configuration as calculate_employee_salary (Bangalore - metro city)
+    calculator = BatchSalaryCalculator(is_metro_city=True, state="Karnataka")
+
+    if total_working_days is None:
+        total_working_days = calculator.get_working_days_in_month(year, month)
+
+    basic_salaries = np.fromiter(
+        (float(emp.get('basic_salary', 0)) for emp in employees), dtype=np.float64, count=len(employees)
+    )
+    attendance = np.fromiter(
+        (present_days.get(emp.get('employee_id', ''), 0) for emp in employees), dtype=np.float64, count=len(employees)
+    )
+
+    results = calculator.calculate_monthly_salaries(basic_salaries, attendance, total_working_days)
+
+    calculation_month = f"{calendar.month_name[month]} {year}"
+    calculations = []
+    for index, emp in enumerate(employees):
+        salary_calculation = calculator.salary_breakdown(results, index)
+        salary_calculation['employee_info'] = {
+            'employee_id': emp.get('employee_id', ''),
+            'employee_name': emp.get('full_name', ''),
+            'department': emp.get('department', ''),
+            'designation': emp.get('designation', ''),
+            'calculation_month': calculation_month
+        }
+        calculations.append(salary_calculation)
+
+    return calculations
@@ -0,0 +1,158 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from datetime import datetime, timezone
+import logging
+import uuid
+
+from attendance_rollups import get_monthly_present_days
+from payroll_engine import calculate_company_payroll
+from working_calendar import get_working_days_in_month
+
+logger = logging.getLogger(__name__)
+
+# Employees are read and priced in chunks of this size during a run
+PAYROLL_BATCH_SIZE = 5000
+
+# Only the fields the payroll engine needs are pulled from the employees collection
+PAYROLL_EMPLOYEE_PROJECTION = {
+    "_id": 0,
+    "employee_id": 1,
+    "full_name": 1,
+    "department": 1,
+    "designation": 1,
+    "basic_salary": 1
+}
+
+# Payroll Run Models
+class PayrollRun(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    year: int
+    month: int
+    status: str = "Queued"  # "Queued", "Running", "Completed", "Failed"
+    total_employees: int = 0
+    processed_employees: int = 0
+    total_working_days: int = 0
+    total_gross_salary: float = 0.0
+    total_deductions: float = 0.0
+    total_net_salary: float = 0.0
+    error: str = ""
+    created_by: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    completed_at: Optional[datetime] = None
+
+class PayrollRunResponse(BaseModel):
+    id: str
+    year: int
+    month: int
+    status: str
+    total_employees: int
+    processed_employees: int
+    progress_percentage: float
+    total_working_days: int
+    total_gross_salary: float
+    total_deductions: float
+    total_net_salary: float
+    error: str
+    created_by: str
+    created_at: datetime
+    completed_at: Optional[datetime]
+
+def get_payroll_run_progress(run: Dict) -> float:
+    """Percentage of employees processed so far in a payroll run"""
+    total = run.get("total_employees", 0)
+    if total == 0:
+        return 100.0 if run.get("status") == "Completed" else 0.0
+    return round(run.get("processed_employees", 0) / total * 100, 2)
+
+def build_payroll_result(run_id: str, year: int, month: int, salary_calculation: Dict) -> Dict:
+    """Flatten a salary calculation into a payroll_run_results document"""
+    emp_info = salary_calculation["employee_info"]
+    return {
+        "run_id": run_id,
+        "year": year,
+        "month": month,
+        "employee_id": emp_info["employee_id"],
+        "employee_name": emp_info["employee_name"],
+        "department": emp_info["department"],
+        "present_days": salary_calculation["employee_details"]["present_days"],
+        "total_working_days": salary_calculation["employee_details"]["total_working_days"],
+        "gross_salary": salary_calculation["earnings"]["gross_salary"],
+        "total_deductions": salary_calculation["deductions"]["total_deductions"],
+        "net_salary": salary_calculation["net_salary"],
+        "calculation": salary_calculation
+    }
+
+async def execute_payroll_run(db, run_id: str, year: int, month: int):
+    """
+    Compute salaries for every active employee for a month
+
+    Attendance is counted with a single aggregation, employees are streamed in
+    batches and priced with the vectorized payroll engine. Progress and totals
+    are written to the payroll_runs document as each batch completes.
+    """
+    try:
+        total_employees = await db.employees.count_documents({"status": "Active"})
+        total_working_days = await get_working_days_in_month(db, year, month)
+
+        await db.payroll_runs.update_one(
+            {"id": run_id},
+            {"$set": {
+                "status": "Running",
+                "total_employees": total_employees,
+                "total_working_days": total_working_days
+            }}
+        )
+
+        # Present days for the whole company, from the same rollups as single slips
+        present_days = await get_monthly_present_days(db, year, month)
+
+        cursor = db.employees.find(
+            {"status": "Active"}, PAYROLL_EMPLOYEE_PROJECTION
+        ).sort("employee_id", 1).batch_size(PAYROLL_BATCH_SIZE)
+
+        batch = []
+        async for employee in cursor:
+            batch.append(employee)
+            if len(batch) >= PAYROLL_BATCH_SIZE:
+                await _store_payroll_batch(db, run_id, year, month, batch, present_days, total_working_days)
+                batch = []
+        if batch:
+            await _store_payroll_batch(db, run_id, year, month, batch, present_days, total_working_days)
+
+        await db.payroll_runs.update_one(
+            {"id": run_id},
+            {"$set": {
+                "status": "Completed",
+                "completed_at": datetime.now(timezone.utc)
+            }}
+        )
+
+    except Exception as e:
+        logger.exception(f"Payroll run {run_id} failed")
+        await db.payroll_runs.update_one(
+            {"id": run_id},
+            {"$set": {
+                "status": "Failed",
+                "error": str(e),
+                "completed_at": datetime.now(timezone.utc)
+            }}
+        )
+
+async def _store_payroll_batch(db, run_id: str, year: int, month: int, employees: List[Dict],
+                               present_days: Dict[str, int], total_working_days: int):
+    calculations = calculate_company_payroll(
+        employees, present_days, year, month, total_working_days=total_working_days
+    )
+    results = [build_payroll_result(run_id, year, month, calc) for calc in calculations]
+
+    await db.payroll_run_results.insert_many(results, ordered=False)
+
+    await db.payroll_runs.update_one(
+        {"id": run_id},
+        {"$inc": {
+            "processed_employees": len(results),
+            "total_gross_salary": round(sum(r["gross_salary"] for r in results), 2),
+            "total_deductions": round(sum(r["total_deductions"] for r in results), 2),
+            "total_net_salary": round(sum(r["net_salary"] for r in results), 2)
+        }}
+    )
@@ -0,0 +1,189 @@
+from datetime import datetime, timezone
+from typing import Dict, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from standard_salary_slip_generator import SALARY_SLIP_TEMPLATE_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Cached PDFs live on local disk, indexed by the pdf_cache collection
+PDF_CACHE_DIR = os.environ.get("PDF_CACHE_DIR", "/app/pdf_cache")
+
+# Total size of cached PDFs; least recently used entries are evicted beyond it
+PDF_CACHE_MAX_BYTES = int(os.environ.get("PDF_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# Employee fields a salary slip is rendered from (via calculate_employee_salary)
+SALARY_SLIP_EMPLOYEE_FIELDS = ["employee_id", "full_name", "department", "designation", "basic_salary"]
+
+def salary_slip_cache_key(employee: Dict, year: int, month: int,
+                          present_days: int, total_working_days: int) -> str:
+    """
+    Content hash of everything a salary slip is rendered from
+
+    Changed attendance, working days, salary or template version give a new
+    key, so a stale slip is never served even before it is invalidated.
+    """
+    inputs = {
+        "kind": "salary_slip",
+        "template_version": SALARY_SLIP_TEMPLATE_VERSION,
+        "employee": {field: employee.get(field) for field in SALARY_SLIP_EMPLOYEE_FIELDS},
+        "year": year,
+        "month": month,
+        "present_days": present_days,
+        "total_working_days": total_working_days
+    }
+    encoded = json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+def _write_atomically(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Unique per call, so concurrent renders of one key never share a partial file
+    partial_path = f"{path}.{uuid.uuid4().hex}.partial"
+    try:
+        with open(partial_path, "wb") as f:
+            f.write(data)
+        os.replace(partial_path, path)
+    except BaseException:
+        _remove_file(partial_path)
+        raise
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _read_file(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+class PdfCache:
+    """
+    Content-addressed cache of generated PDFs
+
+    Files are named by their key on disk; the pdf_cache collection indexes
+    them by key, employee and month, with size and last access for eviction.
+    Each entry also keeps the data it was rendered from (e.g. the salary
+    calculation) so a hit needs neither recalculation nor rendering.
+    """
+
+    def __init__(self, directory: str = PDF_CACHE_DIR, max_bytes: int = PDF_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pdf")
+
+    async def get(self, db, key: str) -> Optional[Dict]:
+        """Cache entry for key with its PDF bytes under "pdf_data", or None on a miss"""
+        entry = await db.pdf_cache.find_one_and_update(
+            {"key": key},
+            {"$set": {"last_accessed_at": datetime.now(timezone.utc)}, "$inc": {"hits": 1}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if entry is None:
+            return None
+
+        pdf_data = await asyncio.to_thread(_read_file, entry["file_path"])
+        if pdf_data is None:
+            # File removed behind our back; forget the entry and render again
+            await db.pdf_cache.delete_one({"key": key})
+            return None
+        entry["pdf_data"] = pdf_data
+        return entry
+
+    async def put(self, db, key: str, pdf_data: bytes, kind: str, **metadata):
+        """
+        Store a rendered PDF under key, then evict down to the size budget
+
+        Failures are logged and not raised: the caller already has the PDF,
+        and a missed cache write only costs a render next time.
+        """
+        path = self.path_for(key)
+        try:
+            await asyncio.to_thread(_write_atomically, path, pdf_data)
+
+            now = datetime.now(timezone.utc)
+            try:
+                await db.pdf_cache.update_one(
+                    {"key": key},
+                    {"$set": {
+                        **metadata,
+                        "kind": kind,
+                        "file_path": path,
+                        "size": len(pdf_data),
+                        "last_accessed_at": now
+                    }, "$setOnInsert": {"key": key, "created_at": now, "hits": 0}},
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                # A concurrent render of the same content stored it first
+                pass
+
+            await self.evict(db)
+        except Exception as e:
+            logger.warning(f"Could not cache {kind} PDF {key}: {str(e)}")
+
+    async def invalidate(self, db, **scope) -> int:
+        """Drop entries matching scope (e.g. employee_id, year, month); returns how many"""
+        paths = [entry["file_path"] async for entry in db.pdf_cache.find(scope, {"_id": 0, "file_path": 1})]
+        if not paths:
+            return 0
+        await db.pdf_cache.delete_many(scope)
+        await asyncio.to_thread(lambda: [_remove_file(path) for path in paths])
+        return len(paths)
+
+    async def evict(self, db) -> int:
+        """Remove least recently used entries until the cache fits its size budget"""
+        totals = await db.pdf_cache.aggregate([
+            {"$group": {"_id": None, "total_bytes": {"$sum": "$size"}}}
+        ]).to_list(1)
+        excess = (totals[0]["total_bytes"] if totals else 0) - self.max_bytes
+        if excess <= 0:
+            return 0
+
+        keys, paths = [], []
+        cursor = db.pdf_cache.find({}, {"_id": 0, "key": 1, "file_path": 1, "size": 1}).sort("last_accessed_at", 1)
+        async for entry in cursor:
+            if excess <= 0:
+                break
+            keys.append(entry["key"])
+            paths.append(entry["file_path"])
+            excess -= entry["size"]
+
+        await db.pdf_cache.delete_many({"key": {"$in": keys}})
+        await asyncio.to_thread(lambda: [_remove_file(path) for path in paths])
+        return len(keys)
+
+    async def purge_stale_templates(self, db) -> int:
+        """Drop salary slips rendered with an older template version"""
+        removed = await self.invalidate(
+            db, kind="salary_slip", template_version={"$ne": SALARY_SLIP_TEMPLATE_VERSION}
+        )
+        if removed:
+            logger.info(f"Discarded {removed} cached salary slips from older templates")
+        return removed
+
+    async def get_stats(self, db) -> Dict:
+        totals = await db.pdf_cache.aggregate([
+            {"$group": {"_id": "$kind", "entries": {"$sum": 1}, "total_bytes": {"$sum": "$size"}, "hits": {"$sum": "$hits"}}}
+        ]).to_list(None)
+        return {
+            "max_bytes": self.max_bytes,
+            "total_bytes": sum(row["total_bytes"] for row in totals),
+            "kinds": {row["_id"]: {field: row[field] for field in ["entries", "total_bytes", "hits"]} for row in totals}
+        }
+
+pdf_cache = PdfCache()
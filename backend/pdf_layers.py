@@ -0,0 +1,99 @@
+from typing import Callable, Dict, List, Tuple
+import os
+import threading
+
+from reportlab import rl_config
+from reportlab.platypus import Flowable
+
+# Static page layers (letterheads, footers, the watermark) are laid out once
+# per process and written once per document as a form XObject that every page
+# reuses. PDF_STATIC_LAYERS=0 rebuilds and redraws them on every render.
+STATIC_LAYERS_ENABLED = os.environ.get("PDF_STATIC_LAYERS", "1") != "0"
+
+if STATIC_LAYERS_ENABLED:
+    # Binary rather than ASCII85 streams; saves more than the forms' headers cost
+    rl_config.useA85 = 0
+
+# Room around a layer's box for borders drawn on its edge (form XObjects clip)
+LAYER_BLEED = 6
+
+# (layer name, available width) -> (flowables, positions, width, height)
+_layouts: Dict[Tuple[str, float], tuple] = {}
+_layout_lock = threading.Lock()
+
+def _layout(build: Callable[[], List[Flowable]], avail_width: float) -> tuple:
+    """Wrap the layer's flowables and stack them top-down like a frame would"""
+    flowables = build()
+    placed = []
+    height = 0.0
+    for index, flowable in enumerate(flowables):
+        width, flowable_height = flowable.wrap(avail_width, 10000)
+        if index:
+            height += flowable.getSpaceBefore()
+        height += flowable_height
+        align = getattr(flowable, "hAlign", "LEFT")
+        x = {"CENTER": (avail_width - width) / 2, "CENTRE": (avail_width - width) / 2,
+             "RIGHT": avail_width - width}.get(align, 0)
+        placed.append((flowable, x, height))
+        height += flowable.getSpaceAfter()
+    return flowables, placed, avail_width, height
+
+class StaticLayer(Flowable):
+    """
+    Flowable for content that is identical in every document
+
+    `build` returns the layer's flowables; they are laid out on first use in
+    the process. Each document draws them once into a form XObject named
+    after the layer and places that form wherever the layer appears.
+    """
+
+    def __init__(self, name: str, build: Callable[[], List[Flowable]]):
+        Flowable.__init__(self)
+        self.name = name
+        self.build = build
+        self._placed = None
+
+    def wrap(self, availWidth, availHeight):
+        key = (self.name, round(availWidth, 2))
+        if STATIC_LAYERS_ENABLED:
+            with _layout_lock:
+                if key not in _layouts:
+                    _layouts[key] = _layout(self.build, availWidth)
+                layout = _layouts[key]
+        else:
+            layout = _layout(self.build, availWidth)
+        _, self._placed, self.width, self.height = layout
+        return self.width, self.height
+
+    def _draw_flowables(self, canv):
+        for flowable, x, bottom in self._placed:
+            flowable.drawOn(canv, x, self.height - bottom)
+
+    def draw(self):
+        canv = self.canv
+        if not STATIC_LAYERS_ENABLED:
+            self._draw_flowables(canv)
+            return
+
+        form_name = f"layer_{self.name}_{int(self.width)}"
+        if not canv.hasForm(form_name):
+            canv.beginForm(
+                form_name, -LAYER_BLEED, -LAYER_BLEED,
+                self.width + LAYER_BLEED, self.height + LAYER_BLEED
+            )
+            # Shared flowables are not safe to draw from two threads at once
+            with _layout_lock:
+                self._draw_flowables(canv)
+            canv.endForm()
+        canv.doForm(form_name)
+
+def draw_static_form(canv, form_name: str, draw: Callable, bbox: Tuple[float, float, float, float]):
+    """Canvas-level static layer: `draw(canv)` once per document, then reuse the form"""
+    if not STATIC_LAYERS_ENABLED:
+        draw(canv)
+        return
+    if not canv.hasForm(form_name):
+        canv.beginForm(form_name, *bbox)
+        draw(canv)
+        canv.endForm()
+    canv.doForm(form_name)
@@ -0,0 +1,180 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+import asyncio
+import base64
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Rendering processes; PDF_RENDER_WORKERS=0 renders on a thread instead
+PDF_RENDER_WORKERS = int(os.environ.get("PDF_RENDER_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Document kind -> (module, function) rendering it to base64 PDF
+PDF_RENDERERS = {
+    "salary_slip": ("standard_salary_slip_generator", "generate_standard_salary_slip"),
+    "offer_letter": ("document_generator", "generate_offer_letter"),
+    "appointment_letter": ("document_generator", "generate_appointment_letter"),
+    "employee_agreement": ("employee_agreement_generator", "generate_employee_agreement"),
+}
+
+def _renderer(kind: str):
+    module_name, function_name = PDF_RENDERERS[kind]
+    return getattr(importlib.import_module(module_name), function_name)
+
+def _warm_worker():
+    """Process initializer: import generators, styles, fonts and the logo up front"""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from logo_watermark_generator import get_document_styles
+    from brand_assets import brand_assets
+
+    for kind in PDF_RENDERERS:
+        _renderer(kind)
+    get_document_styles()
+    for font in ["Helvetica", "Helvetica-Bold"]:
+        stringWidth("VISHWAS WORLD TECH", font, 12)
+    brand_assets.load()
+
+def _ping() -> int:
+    return os.getpid()
+
+def _render_pdf(kind: str, payload: Dict) -> tuple:
+    """Runs in a worker: (PDF bytes, seconds spent rendering)"""
+    started = time.perf_counter()
+    pdf_data = base64.b64decode(_renderer(kind)(payload))
+    return pdf_data, time.perf_counter() - started
+
+def _render_to_file(kind: str, payload: Dict, path: str) -> tuple:
+    """Runs in a worker: write the PDF to path atomically; (file size, seconds spent rendering)"""
+    started = time.perf_counter()
+    pdf_data = base64.b64decode(_renderer(kind)(payload))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial_path = f"{path}.{os.getpid()}.partial"
+    with open(partial_path, "wb") as f:
+        f.write(pdf_data)
+    os.replace(partial_path, path)
+    return len(pdf_data), time.perf_counter() - started
+
+class PdfRenderPool:
+    """
+    Process pool rendering ReportLab documents off the event loop
+
+    Handlers await render_pdf() or render_to_file(); the CPU work happens in warm worker processes,
+    so check-ins and other requests keep being served meanwhile.
+    """
+
+    def __init__(self, workers: int = PDF_RENDER_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.stats: Dict[str, Dict] = {}
+
+    def start(self):
+        """Start the workers and have each one warm itself up"""
+        with self._lock:
+            if self._executor is not None or self.workers <= 0:
+                return
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker
+            )
+            for _ in range(self.workers):
+                self._executor.submit(_ping)
+        logger.info(f"PDF render pool started with {self.workers} workers")
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def queue_depth(self) -> int:
+        """Renders waiting for a free worker"""
+        return max(0, self.in_flight - max(self.workers, 1))
+
+    async def render_pdf(self, kind: str, payload: Dict) -> bytes:
+        """Render one document of `kind` (see PDF_RENDERERS) to raw PDF bytes"""
+        return await self._run(kind, _render_pdf, kind, payload)
+
+    async def render_to_file(self, kind: str, payload: Dict, path: str) -> int:
+        """Render one document straight to a file in the worker; returns its size"""
+        return await self._run(kind, _render_to_file, kind, payload, path)
+
+    async def _run(self, kind: str, function, *args):
+        if kind not in PDF_RENDERERS:
+            raise ValueError(f"Unknown document kind: {kind}")
+
+        self.in_flight += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        submitted = time.perf_counter()
+        try:
+            result, render_seconds = await self._submit(function, *args)
+        except Exception:
+            self._record(kind, failed=True)
+            raise
+        finally:
+            self.in_flight -= 1
+
+        self._record(kind, render_seconds, time.perf_counter() - submitted - render_seconds)
+        return result
+
+    async def _submit(self, function, *args) -> tuple:
+        if self.workers <= 0:
+            return await asyncio.to_thread(function, *args)
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            return await loop.run_in_executor(executor, function, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool once
+            if self._executor is executor:
+                logger.error("PDF render pool broken, restarting it")
+                self.shutdown()
+            self.start()
+            return await loop.run_in_executor(self._executor, function, *args)
+
+    def _record(self, kind: str, render_seconds: float = 0.0, wait_seconds: float = 0.0, failed: bool = False):
+        stats = self.stats.setdefault(kind, {
+            "rendered": 0, "failed": 0, "render_seconds_total": 0.0,
+            "render_seconds_max": 0.0, "wait_seconds_total": 0.0
+        })
+        if failed:
+            stats["failed"] += 1
+            return
+        stats["rendered"] += 1
+        stats["render_seconds_total"] += render_seconds
+        stats["render_seconds_max"] = max(stats["render_seconds_max"], render_seconds)
+        stats["wait_seconds_total"] += wait_seconds
+
+    def get_metrics(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "documents": {
+                kind: {
+                    "rendered": stats["rendered"],
+                    "failed": stats["failed"],
+                    "render_ms_max": round(1000 * stats["render_seconds_max"], 1),
+                    "render_ms_avg": round(1000 * stats["render_seconds_total"] / stats["rendered"], 1)
+                    if stats["rendered"] else None,
+                    "wait_ms_avg": round(1000 * stats["wait_seconds_total"] / stats["rendered"], 1)
+                    if stats["rendered"] else None
+                }
+                for kind, stats in self.stats.items()
+            }
+        }
+
+pdf_render_pool = PdfRenderPool()
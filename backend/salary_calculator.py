@@ -166,19 +166,16 @@ class SalaryCalculator:
         return monthly_tax
     
     def get_working_days_in_month(self, year: int, month: int) -> int:
-        """Calculate working days in a month (excluding Sundays)"""
-        # Get total days in month
-        total_days = calendar.monthrange(year, month)[1]
+        """
+        Calculate working days in a month (excluding Sundays only)
+        Holiday-aware counts come from working_calendar.WorkingCalendar
+        """
+        first_weekday, total_days = calendar.monthrange(year, month)
+        
+        # Day offsets of the Sundays (weekday 6) in this month
+        sundays = len(range((6 - first_weekday) % 7, total_days, 7))
         
-        # Count working days (excluding Sundays)
-        working_days = 0
-        for day in range(1, total_days + 1):
-            date_obj = datetime(year, month, day)
-            # Skip Sundays (weekday 6)
-            if date_obj.weekday() != 6:
-                working_days += 1
-                
-        return working_days
+        return total_days - sundays
     
     def calculate_annual_salary(self, monthly_calculations: List[Dict]) -> Dict:
         """Calculate annual salary summary from monthly calculations"""
@@ -218,7 +215,8 @@ def get_employee_attendance_days(attendance_records: List[Dict], year: int, mont
     return present_days
 
 def calculate_employee_salary(employee_data: Dict, attendance_records: List[Dict], 
-                            year: int = None, month: int = None) -> Dict:
+                            year: int = None, month: int = None,
+                            total_working_days: int = None, present_days: int = None) -> Dict:
     """
     Calculate salary for an employee based on attendance data
     
@@ -227,6 +225,8 @@ def calculate_employee_salary(employee_data: Dict, attendance_records: List[Dict
         attendance_records: List of attendance records
         year: Year for calculation (default: current year)
         month: Month for calculation (default: current month)
+        total_working_days: Working days in the month (default: all days except Sundays)
+        present_days: Present days in the month (default: counted from attendance_records)
         
     Returns:
         Complete salary calculation
@@ -240,10 +240,12 @@ def calculate_employee_salary(employee_data: Dict, attendance_records: List[Dict
     calculator = SalaryCalculator(is_metro_city=True, state="Karnataka")
     
     # Get working days for the month
-    total_working_days = calculator.get_working_days_in_month(year, month)
+    if total_working_days is None:
+        total_working_days = calculator.get_working_days_in_month(year, month)
     
     # Get present days from attendance
-    present_days = get_employee_attendance_days(attendance_records, year, month)
+    if present_days is None:
+        present_days = get_employee_attendance_days(attendance_records, year, month)
     
     # Get basic salary from employee data
     basic_salary = float(employee_data.get('basic_salary', 0))
@@ -11,15 +11,15 @@ from logo_watermark_generator import (
     create_watermarked_document, 
     create_professional_header_with_logo, 
     create_professional_footer,
-    enhance_document_styling,
+    get_document_styles,
     get_professional_table_style
 )
 
 def generate_salary_slip_content(salary_calculation):
     """Generate salary slip content for watermarked document"""
     # Get enhanced professional styles
-    styles = enhance_document_styling()
-    # Styles are now handled by enhance_document_styling()
+    styles = get_document_styles()
+    # Styles are now handled by get_document_styles()
     
     # Build document content
     story = []
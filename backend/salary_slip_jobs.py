@@ -0,0 +1,323 @@
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Iterator, List, Optional
+import asyncio
+import io
+import logging
+import os
+import zipfile
+
+from pydantic import BaseModel
+from pymongo import ReturnDocument, UpdateOne
+
+from attendance_rollups import get_monthly_present_days
+from dashboard_counters import increment_counters
+from payroll_engine import calculate_company_payroll
+from payroll_runs import PAYROLL_EMPLOYEE_PROJECTION
+from pdf_cache import salary_slip_cache_key
+from pdf_render_pool import pdf_render_pool
+from storage_backends import SALARY_SLIPS_NAMESPACE, LocalStorageBackend, create_storage_backend
+from working_calendar import get_working_days_in_month
+
+logger = logging.getLogger(__name__)
+
+# Slips are stored one folder per employee; SALARY_SLIP_ROOT is used when the
+# storage backend is local disk (next to uploaded documents)
+SALARY_SLIP_ROOT = os.environ.get("SALARY_SLIP_ROOT", "/app/uploaded_documents")
+
+# Employees are priced, rendered and recorded in chunks of this size;
+# a crash loses at most one chunk of bookkeeping, never a finished chunk
+SALARY_SLIP_CHUNK_SIZE = 200
+
+# A running job that has not checked in for this long is treated as crashed
+SALARY_SLIP_JOB_LEASE_SECONDS = 120
+
+# Every process looks for crashed jobs this often, so a job whose lease was
+# still live at startup is resumed once it runs out
+SALARY_SLIP_RESUME_POLL_SECONDS = 30
+
+slip_storage = create_storage_backend(SALARY_SLIP_ROOT, SALARY_SLIPS_NAMESPACE)
+
+class SalarySlipDepartment(BaseModel):
+    department: str
+    slips: int
+    total_bytes: int
+
+class SalarySlipJobResponse(BaseModel):
+    id: str
+    year: int
+    month: int
+    status: str  # "Queued", "Running", "Completed", "Failed"
+    total_employees: int = 0
+    rendered_slips: int = 0
+    failed_slips: int = 0
+    progress_percentage: float
+    error: str = ""
+    created_by: str
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    departments: List[SalarySlipDepartment] = []
+
+def salary_slip_job_id(year: int, month: int) -> str:
+    """One job per payroll month, so starting it again resumes it"""
+    return f"{year}-{month:02d}"
+
+def salary_slip_document_id(job_id: str, employee_id: str) -> str:
+    return f"salary-slip-{job_id}-{employee_id}"
+
+def salary_slip_key(job_id: str, employee_id: str) -> str:
+    return f"{employee_id}/salary_slip_{job_id}.pdf"
+
+def salary_slip_document_key(document: Dict) -> Optional[str]:
+    """Slip storage key of an employee_documents record, or None when it is not a generated slip"""
+    if not document.get("slip_job_id"):
+        return None
+    return salary_slip_key(document["slip_job_id"], document["employee_id"])
+
+def get_salary_slip_job_progress(job: Dict) -> float:
+    """Percentage of slips rendered so far"""
+    total = job.get("total_employees", 0)
+    if total == 0:
+        return 100.0 if job.get("status") == "Completed" else 0.0
+    return round(job.get("rendered_slips", 0) / total * 100, 2)
+
+async def claim_salary_slip_job(db, year: int, month: int, created_by: str) -> Optional[Dict]:
+    """
+    Create or take over the slip job for a month
+
+    Returns the claimed job, or None when another worker holds a live lease
+    on it. A completed job is claimed again so new employees, and employees
+    whose slip inputs changed, get fresh slips.
+    """
+    job_id = salary_slip_job_id(year, month)
+    now = datetime.now(timezone.utc)
+    await db.salary_slip_jobs.update_one(
+        {"id": job_id},
+        {"$setOnInsert": {
+            "id": job_id, "year": year, "month": month, "status": "Queued",
+            "created_by": created_by, "created_at": now, "lease_expires": now
+        }},
+        upsert=True
+    )
+    return await db.salary_slip_jobs.find_one_and_update(
+        {"id": job_id, "$or": [{"status": {"$ne": "Running"}}, {"lease_expires": {"$lt": now}}]},
+        {"$set": {
+            "status": "Running", "error": "", "started_at": now, "completed_at": None,
+            "lease_expires": now + timedelta(seconds=SALARY_SLIP_JOB_LEASE_SECONDS)
+        }},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+async def execute_salary_slip_job(db, job_id: str):
+    """
+    Render every active employee's salary slip for the job's month
+
+    Salaries come from the vectorized payroll engine; slips are rendered in
+    parallel by the PDF render pool, straight to slip storage. A slip
+    already recorded for the job is skipped while it was rendered from the
+    same inputs (the salary slip cache key), so a restarted job resumes and
+    a re-run only re-renders slips whose attendance, working days or salary
+    changed.
+    """
+    job = await db.salary_slip_jobs.find_one({"id": job_id}, {"_id": 0})
+    year, month = job["year"], job["month"]
+    try:
+        total_employees = await db.employees.count_documents({"status": "Active"})
+        total_working_days = await get_working_days_in_month(db, year, month)
+
+        # Input key each recorded slip was rendered from; older records have none
+        rendered_from = {}
+        async for document in db.employee_documents.find(
+            {"slip_job_id": job_id}, {"_id": 0, "employee_id": 1, "slip_input_key": 1}
+        ):
+            rendered_from[document["employee_id"]] = document.get("slip_input_key")
+
+        await _heartbeat(db, job_id, {
+            "total_employees": total_employees,
+            "total_working_days": total_working_days,
+            "rendered_slips": 0,
+            "failed_slips": 0
+        })
+
+        present_days = await get_monthly_present_days(db, year, month)
+
+        cursor = db.employees.find(
+            {"status": "Active"}, PAYROLL_EMPLOYEE_PROJECTION
+        ).sort("employee_id", 1).batch_size(SALARY_SLIP_CHUNK_SIZE)
+
+        chunk = []
+        up_to_date = 0
+        async for employee in cursor:
+            if rendered_from.get(employee["employee_id"]) == _slip_input_key(employee, job, present_days, total_working_days):
+                up_to_date += 1
+                continue
+            chunk.append(employee)
+            if len(chunk) >= SALARY_SLIP_CHUNK_SIZE:
+                await _render_slip_chunk(db, job, chunk, present_days, total_working_days, up_to_date)
+                chunk = []
+                up_to_date = 0
+        if chunk:
+            await _render_slip_chunk(db, job, chunk, present_days, total_working_days, up_to_date)
+        elif up_to_date:
+            await _heartbeat(db, job_id, increments={"rendered_slips": up_to_date})
+
+        await db.salary_slip_jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": "Completed", "completed_at": datetime.now(timezone.utc)}}
+        )
+
+    except Exception as e:
+        logger.exception(f"Salary slip job {job_id} failed")
+        await db.salary_slip_jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": "Failed", "error": str(e), "completed_at": datetime.now(timezone.utc)}}
+        )
+
+async def resume_salary_slip_jobs(db):
+    """Pick up slip jobs whose worker stopped (crash or restart) where they left off"""
+    now = datetime.now(timezone.utc)
+    async for job in db.salary_slip_jobs.find({"status": "Running", "lease_expires": {"$lt": now}}, {"_id": 0}):
+        claimed = await claim_salary_slip_job(db, job["year"], job["month"], job.get("created_by", "system"))
+        if claimed is not None:
+            logger.info(f"Resuming salary slip job {claimed['id']}")
+            await execute_salary_slip_job(db, claimed["id"])
+
+async def run_salary_slip_job_resumer(db):
+    """Resume crashed slip jobs now, then every SALARY_SLIP_RESUME_POLL_SECONDS"""
+    while True:
+        try:
+            await resume_salary_slip_jobs(db)
+        except Exception as e:
+            logger.error(f"Resuming salary slip jobs failed: {str(e)}")
+        await asyncio.sleep(SALARY_SLIP_RESUME_POLL_SECONDS)
+
+async def _heartbeat(db, job_id: str, fields: Dict = None, increments: Dict = None):
+    update = {"$set": {
+        **(fields or {}),
+        "lease_expires": datetime.now(timezone.utc) + timedelta(seconds=SALARY_SLIP_JOB_LEASE_SECONDS)
+    }}
+    if increments:
+        update["$inc"] = increments
+    await db.salary_slip_jobs.update_one({"id": job_id}, update)
+
+async def _store_salary_slip(calculation: Dict, key: str, metadata: Dict) -> int:
+    """Render one slip into slip storage; returns its size"""
+    if isinstance(slip_storage, LocalStorageBackend):
+        # The render worker writes the file itself; no PDF bytes cross back
+        return await pdf_render_pool.render_to_file("salary_slip", calculation, slip_storage.path(key))
+    pdf_data = await pdf_render_pool.render_pdf("salary_slip", calculation)
+    await asyncio.to_thread(slip_storage.put, key, io.BytesIO(pdf_data), metadata)
+    return len(pdf_data)
+
+def _slip_input_key(employee: Dict, job: Dict, present_days: Dict[str, int], total_working_days: int) -> str:
+    """Hash of what an employee's slip is rendered from, as used by the PDF cache"""
+    return salary_slip_cache_key(
+        employee, job["year"], job["month"], present_days.get(employee["employee_id"], 0), total_working_days
+    )
+
+async def _render_slip_chunk(db, job: Dict, employees: List[Dict],
+                             present_days: Dict[str, int], total_working_days: int, up_to_date: int = 0):
+    """Render and record one chunk; up_to_date slips skipped before it count as rendered"""
+    job_id = job["id"]
+    calculations = calculate_company_payroll(
+        employees, present_days, job["year"], job["month"], total_working_days=total_working_days
+    )
+
+    keys = [salary_slip_key(job_id, emp["employee_id"]) for emp in employees]
+    sizes = await asyncio.gather(*[
+        _store_salary_slip(calculation, key, {
+            "employee_id": employee["employee_id"],
+            "document_type": "Salary Slip",
+            "department": employee.get("department", ""),
+            "slip_job_id": job_id
+        })
+        for employee, calculation, key in zip(employees, calculations, keys)
+    ], return_exceptions=True)
+
+    now = datetime.now(timezone.utc)
+    requests = []
+    failed = 0
+    for employee, calculation, key, size in zip(employees, calculations, keys, sizes):
+        if isinstance(size, Exception):
+            logger.error(f"Salary slip for {employee['employee_id']} failed: {str(size)}")
+            failed += 1
+            continue
+        requests.append(UpdateOne(
+            {"id": salary_slip_document_id(job_id, employee["employee_id"])},
+            {"$set": {
+                "file_path": slip_storage.location(key),
+                "file_size": size,
+                "net_salary": calculation["net_salary"],
+                "slip_input_key": _slip_input_key(employee, job, present_days, total_working_days),
+                "uploaded_at": now
+            }, "$setOnInsert": {
+                "employee_id": employee["employee_id"],
+                "department": employee.get("department", ""),
+                "document_type": "Salary Slip",
+                "document_name": f"Salary_Slip_{employee['employee_id']}_{job_id}.pdf",
+                "uploaded_by": job.get("created_by", "system"),
+                "description": f"Salary slip for {calculation['employee_info']['calculation_month']}",
+                "slip_job_id": job_id
+            }},
+            upsert=True
+        ))
+
+    if requests:
+        result = await db.employee_documents.bulk_write(requests, ordered=False)
+        await increment_counters(db, total_documents=result.upserted_count)
+    await _heartbeat(db, job_id, increments={"rendered_slips": len(requests) + up_to_date, "failed_slips": failed})
+
+async def get_salary_slip_departments(db, job_id: str) -> List[Dict]:
+    """Slip count and size per department for a job"""
+    pipeline = [
+        {"$match": {"slip_job_id": job_id}},
+        {"$group": {"_id": "$department", "slips": {"$sum": 1}, "total_bytes": {"$sum": "$file_size"}}},
+        {"$sort": {"_id": 1}}
+    ]
+    return [
+        {"department": row["_id"], "slips": row["slips"], "total_bytes": row["total_bytes"]}
+        async for row in db.employee_documents.aggregate(pipeline)
+    ]
+
+class _ZipStreamBuffer:
+    """Write-only, non-seekable sink; zipfile then streams with data descriptors"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def stream_salary_slip_zip(slips: List[Dict]) -> Iterator[bytes]:
+    """
+    Yield a ZIP of slip PDFs while reading them, without building it in memory
+
+    `slips` are employee_documents records (employee_id, slip_job_id,
+    document_name), read from slip storage. PDFs are already compressed, so
+    entries are stored uncompressed.
+    """
+    sink = _ZipStreamBuffer()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as bundle:
+        for slip in slips:
+            key = salary_slip_document_key(slip)
+            stored = slip_storage.stat(key)
+            if stored is None:
+                logger.warning(f"Salary slip file missing: {slip_storage.location(key)}")
+                continue
+            with bundle.open(slip["document_name"], "w") as entry:
+                if stored.size:
+                    for data in slip_storage.iter_range(key, 0, stored.size - 1):
+                        entry.write(data)
+                        yield sink.take()
+            yield sink.take()
+    yield sink.take()
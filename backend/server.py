@@ -1,29 +1,29 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, BackgroundTasks, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import List, Optional
 import uuid
-from datetime import datetime, timezone, timedelta, date
+from datetime import datetime, timezone, date
 import jwt
 from passlib.context import CryptContext
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, RedirectResponse
+import mimetypes
 import base64
-from document_generator import generate_offer_letter, generate_appointment_letter
-from salary_calculator import SalaryCalculator, calculate_employee_salary, get_employee_attendance_days
+from salary_calculator import calculate_employee_salary
 from salary_slip_generator import generate_salary_slip
-from standard_salary_slip_generator import generate_standard_salary_slip
-from employee_agreement_generator import generate_employee_agreement, calculate_late_login_penalty
+from employee_agreement_generator import calculate_late_login_penalty
 from communication_service import CommunicationService
 from enhanced_communication_service import EnhancedCommunicationService, create_digital_signature_info
 from enhanced_features import (
     EmployeeDocument, CompanyAnnouncement, DocumentUpload, AnnouncementCreate,
-    EmployeeDocumentResponse, AnnouncementResponse, save_uploaded_file, 
+    EmployeeDocumentResponse, AnnouncementResponse, 
     get_file_as_base64, get_dashboard_theme, get_enhanced_dashboard_stats
 )
 from hrms_modules import (
@@ -36,16 +36,59 @@ from working_employee_management import (
     EmployeeAttendanceDetail, LateLoginPenalty, MonthlyAttendanceSummary,
     WorkingEmployeeDocument, WorkingEmployeeProfile, WorkingEmployeeDocumentUpload,
     calculate_late_penalty, calculate_working_hours, get_attendance_status,
-    generate_employee_attendance_report, WORKING_EMPLOYEE_DOCUMENT_CATEGORIES
+    calculate_login_lateness, calculate_punctuality_score,
+    build_monthly_attendance_pipeline, build_working_employees_pipeline
 )
+from attendance_checkin import employee_name_cache, check_in_attendance, check_out_attendance
+from attendance_ingestion import import_attendance_punches
+from attendance_rollups import record_login_rollup, record_logout_rollup, get_monthly_attendance
+from working_calendar import working_calendar_cache, get_working_calendar, get_working_days_in_month
+from payroll_runs import (
+    PayrollRun, PayrollRunResponse, execute_payroll_run, get_payroll_run_progress
+)
+from employee_listing import (
+    EMPLOYEE_PAGE_SIZE_LIMIT, SALARY_SELECTION_FIELDS, employee_count_cache, build_employee_filter,
+    build_employee_projection, parse_field_selection, fetch_employee_page
+)
+from dashboard_service import get_dashboard_counts, dashboard_stats_cache
+from dashboard_counters import (
+    increment_counters, increment_daily_counters, reconcile_dashboard_counters, run_daily_counter_maintenance
+)
+from db_indexes import ensure_indexes, get_index_report
+from brand_assets import brand_assets
+from pdf_render_pool import pdf_render_pool
+from pdf_cache import pdf_cache, salary_slip_cache_key
+from file_responses import (
+    wants_json, wants_download_url, bytes_download_response, file_download_response, object_download_response,
+    immutable_bytes_response
+)
+from storage_backends import PRESIGNED_URL_EXPIRY_SECONDS
+from document_blobs import (
+    document_storage, document_blob_key, store_blob, release_blob,
+    collect_unreferenced_blobs, migrate_documents_to_blobs, get_blob_stats
+)
+from standard_salary_slip_generator import SALARY_SLIP_TEMPLATE_VERSION
+from salary_slip_jobs import (
+    SalarySlipJobResponse, claim_salary_slip_job, execute_salary_slip_job, run_salary_slip_job_resumer,
+    salary_slip_job_id, get_salary_slip_job_progress, get_salary_slip_departments, stream_salary_slip_zip,
+    slip_storage, salary_slip_document_key
+)
+from storage_migration import migrate_files_to_storage
+from document_thumbnails import (
+    thumbnail_worker, enqueue_thumbnail, get_thumbnail_versions, get_document_thumbnail,
+    collect_orphaned_thumbnails, get_thumbnail_stats, THUMBNAIL_MEDIA_TYPE
+)
+from mongo_codec import encode_document, DocumentDecoder, date_range_query, date_range_clauses
+from date_migration import migrate_dates_to_bson, get_date_migration_status
 from fastapi import UploadFile, File
+from pymongo.errors import DuplicateKeyError
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ['DB_NAME']]
 
 # JWT and Password settings
@@ -69,23 +112,8 @@ api_router = APIRouter(prefix="/api")
 
 # Helper functions
 def prepare_for_mongo(data):
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if isinstance(value, datetime):
-                data[key] = value.isoformat()
-            elif isinstance(value, date):
-                data[key] = value.isoformat()
-    return data
-
-def parse_from_mongo(item):
-    if isinstance(item, dict):
-        for key, value in item.items():
-            if isinstance(value, str) and 'T' in value:
-                try:
-                    item[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                except ValueError:
-                    pass
-    return item
+    # Dates are stored as native BSON dates (see mongo_codec)
+    return encode_document(data)
 
 def create_access_token(data: dict):
     return jwt.encode(data, SECRET_KEY, algorithm=ALGORITHM)
@@ -147,6 +175,24 @@ class EmployeeResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+class EmployeeListItem(BaseModel):
+    # Every field is optional so fields= selections validate; unselected fields are omitted
+    id: Optional[str] = None
+    employee_id: Optional[str] = None
+    full_name: Optional[str] = None
+    department: Optional[str] = None
+    designation: Optional[str] = None
+    join_date: Optional[datetime] = None
+    manager: Optional[str] = None
+    contact_number: Optional[str] = None
+    email_address: Optional[str] = None
+    address: Optional[str] = None
+    basic_salary: Optional[float] = None
+    status: Optional[str] = None
+    username: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 class AttendanceRecord(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     employee_id: str
@@ -157,6 +203,8 @@ class AttendanceRecord(BaseModel):
     logout_location: dict = {}
     date: str = Field(default_factory=lambda: datetime.now(timezone.utc).strftime('%Y-%m-%d'))
     total_hours: float = 0.0
+    late_minutes: int = 0
+    late_penalty_amount: float = 0.0
     status: str = "Logged In"  # Logged In, Logged Out
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
@@ -187,6 +235,15 @@ class SalarySlipShareRequest(BaseModel):
     month: int = None
     channels: List[str] = ["email", "whatsapp", "sms"]  # Default all channels
 
+# Document decoders (built once from the models; only known date fields are parsed)
+decode_employee = DocumentDecoder(Employee)
+decode_attendance = DocumentDecoder(AttendanceRecord)
+decode_employee_document = DocumentDecoder(EmployeeDocument)
+decode_announcement = DocumentDecoder(CompanyAnnouncement)
+decode_interview = DocumentDecoder(InterviewCandidate)
+decode_holiday = DocumentDecoder(CompanyHoliday)
+decode_payroll_run = DocumentDecoder(PayrollRun)
+
 # Authentication Routes
 @api_router.post("/auth/login", response_model=LoginResponse)
 async def login(login_data: LoginRequest):
@@ -238,26 +295,54 @@ async def create_employee(employee_data: EmployeeCreate):
     # Prepare for MongoDB
     employee_mongo = prepare_for_mongo(employee.dict())
     
-    # Insert into database
-    await db.employees.insert_one(employee_mongo)
+    # Insert into database (unique indexes catch a concurrent duplicate)
+    try:
+        await db.employees.insert_one(employee_mongo)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Employee ID or username already exists")
+    employee_name_cache.invalidate(employee.employee_id)
+    employee_count_cache.invalidate()
+    await increment_counters(db, total_employees=1, active_employees=1 if employee.status == "Active" else 0)
     
     # Return employee data without password hash
     employee_response_dict = employee.dict()
     employee_response_dict.pop("password_hash")
     return EmployeeResponse(**employee_response_dict)
 
-@api_router.get("/employees", response_model=List[EmployeeResponse])
-async def get_employees(current_user: dict = Depends(verify_token)):
-    employees = await db.employees.find().to_list(1000)
+@api_router.get("/employees", response_model=List[EmployeeListItem], response_model_exclude_unset=True)
+async def get_employees(
+    response: Response,
+    department: Optional[str] = None,
+    status: Optional[str] = None,
+    fields: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = EMPLOYEE_PAGE_SIZE_LIMIT,
+    current_user: dict = Depends(verify_token)
+):
+    """
+    List employees ordered by employee_id
     
-    # Remove password hashes and convert to response model
-    result = []
-    for emp in employees:
-        emp.pop("password_hash", None)
-        emp = parse_from_mongo(emp)
-        result.append(EmployeeResponse(**emp))
+    fields= (comma separated) limits the returned fields. Pages continue with
+    after=<X-Next-Cursor header>; X-Total-Count has the total for the filters.
+    """
+    try:
+        selected_fields = parse_field_selection(fields, EmployeeListItem.model_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return result
+    # Filters, projection and page size are all pushed down to MongoDB
+    employees, next_cursor = await fetch_employee_page(
+        db,
+        build_employee_filter(department, status, after),
+        build_employee_projection(selected_fields),
+        limit
+    )
+    
+    response.headers["X-Total-Count"] = str(await employee_count_cache.get(db, department, status))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    return [EmployeeListItem(**decode_employee(emp)) for emp in employees]
 
 @api_router.get("/employees/{employee_id}", response_model=EmployeeResponse)
 async def get_employee(employee_id: str, current_user: dict = Depends(verify_token)):
@@ -267,76 +352,97 @@ async def get_employee(employee_id: str, current_user: dict = Depends(verify_tok
         raise HTTPException(status_code=404, detail="Employee not found")
     
     employee.pop("password_hash", None)
-    employee = parse_from_mongo(employee)
+    employee = decode_employee(employee)
     return EmployeeResponse(**employee)
 
 # Attendance Management Routes
 @api_router.post("/attendance/login")
 async def employee_login(attendance_data: AttendanceLogin, current_user: dict = Depends(verify_token)):
-    # Check if employee exists
-    employee = await db.employees.find_one({"employee_id": attendance_data.employee_id})
-    if not employee:
+    # Check if employee exists (names are served from cache)
+    employee_name = await employee_name_cache.get(db, attendance_data.employee_id)
+    if employee_name is None:
         raise HTTPException(status_code=404, detail="Employee not found")
     
-    # Check if already logged in today
-    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-    existing_record = await db.attendance.find_one({
-        "employee_id": attendance_data.employee_id,
-        "date": today,
-        "status": "Logged In"
-    })
-    
-    if existing_record:
-        raise HTTPException(status_code=400, detail="Employee already logged in today")
-    
     # Create attendance record
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
     attendance = AttendanceRecord(
         employee_id=attendance_data.employee_id,
-        employee_name=employee["full_name"],
+        employee_name=employee_name,
         login_location=attendance_data.location,
         date=today
     )
     
+    # Late check-in against the 9:45 AM schedule
+    lateness = calculate_login_lateness(attendance.login_time)
+    attendance.late_minutes = lateness["late_minutes"]
+    attendance.late_penalty_amount = lateness["late_penalty_amount"]
+    
     # Prepare for MongoDB
     attendance_mongo = prepare_for_mongo(attendance.dict())
     
-    # Insert into database
-    await db.attendance.insert_one(attendance_mongo)
+    # Single upsert; the unique daily index rejects a second check-in
+    if not await check_in_attendance(db, attendance_mongo):
+        raise HTTPException(status_code=400, detail="Employee already logged in today")
+    await increment_daily_counters(db, today, present_today=1, logged_in_now=1)
+    
+    # Keep the monthly attendance rollup in step; the month's cached slip is now stale
+    await record_login_rollup(db, attendance.employee_id, today, attendance_mongo["login_time"], lateness)
+    await pdf_cache.invalidate(db, employee_id=attendance.employee_id, year=int(today[:4]), month=int(today[5:7]))
     
     return {"message": "Login recorded successfully", "login_time": attendance.login_time}
 
 @api_router.post("/attendance/logout")
 async def employee_logout(attendance_data: AttendanceLogout, current_user: dict = Depends(verify_token)):
-    # Find today's attendance record
+    # Close today's attendance record; hours are computed in the same update
     today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-    attendance_record = await db.attendance.find_one({
-        "employee_id": attendance_data.employee_id,
-        "date": today,
-        "status": "Logged In"
-    })
+    attendance_record = await check_out_attendance(
+        db, attendance_data.employee_id, today, datetime.now(timezone.utc), attendance_data.location
+    )
     
     if not attendance_record:
         raise HTTPException(status_code=404, detail="No active login found for today")
+    await increment_daily_counters(db, today, logged_in_now=-1)
     
-    # Calculate total hours
-    logout_time = datetime.now(timezone.utc)
-    login_time = datetime.fromisoformat(attendance_record["login_time"].replace('Z', '+00:00')) if isinstance(attendance_record["login_time"], str) else attendance_record["login_time"]
-    total_hours = (logout_time - login_time).total_seconds() / 3600
-    
-    # Update attendance record
-    update_data = {
-        "logout_time": logout_time.isoformat(),
-        "logout_location": attendance_data.location,
-        "total_hours": round(total_hours, 2),
-        "status": "Logged Out"
-    }
-    
-    await db.attendance.update_one(
-        {"_id": attendance_record["_id"]},
-        {"$set": update_data}
+    # Keep the monthly attendance rollup in step
+    await record_logout_rollup(
+        db, attendance_data.employee_id, today,
+        attendance_record["logout_time"], attendance_record["total_hours"]
     )
     
-    return {"message": "Logout recorded successfully", "total_hours": round(total_hours, 2)}
+    return {"message": "Logout recorded successfully", "total_hours": attendance_record["total_hours"]}
+
+@api_router.post("/attendance/bulk")
+async def bulk_import_attendance(
+    request: Request,
+    format: Optional[str] = None,
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Import attendance punches from biometric devices or CSV exports
+    
+    The body is streamed as NDJSON (default) or CSV with a header row; pass
+    format=csv or a text/csv content type for CSV. Each punch needs employee_id
+    and timestamp, with optional direction ("in"/"out") and device_id.
+    """
+    try:
+        source_format = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+        if source_format not in ["ndjson", "csv"]:
+            raise HTTPException(status_code=400, detail="Format must be ndjson or csv")
+        
+        result = await import_attendance_punches(db, request.stream(), source_format)
+        if result["days_written"]:
+            # Imported days can touch today's presence counts; recount them
+            await reconcile_dashboard_counters(db)
+        
+        return {
+            "message": f"Imported {result['accepted_punches']} punches into {result['days_written']} attendance days",
+            **result
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing attendance: {str(e)}")
 
 @api_router.get("/attendance/today")
 async def get_today_attendance(current_user: dict = Depends(verify_token)):
@@ -347,7 +453,7 @@ async def get_today_attendance(current_user: dict = Depends(verify_token)):
     result = []
     for record in attendance_records:
         record.pop("_id", None)  # Remove MongoDB ObjectId
-        record = parse_from_mongo(record)
+        record = decode_attendance(record)
         result.append(record)
     
     return result
@@ -360,22 +466,18 @@ async def get_employee_attendance(employee_id: str, current_user: dict = Depends
     result = []
     for record in attendance_records:
         record.pop("_id", None)  # Remove MongoDB ObjectId
-        record = parse_from_mongo(record)
+        record = decode_attendance(record)
         result.append(record)
     
     return result
 
 @api_router.get("/dashboard/stats")
 async def get_dashboard_stats(current_user: dict = Depends(verify_token)):
-    # Get total employees
-    total_employees = await db.employees.count_documents({"status": "Active"})
-    
-    # Get today's attendance
-    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-    present_today = await db.attendance.count_documents({"date": today})
-    
-    # Get currently logged in
-    logged_in_now = await db.attendance.count_documents({"date": today, "status": "Logged In"})
+    # Counts come from the shared dashboard cache
+    counts = await get_dashboard_counts(db)
+    total_employees = counts["employees"]["active"]
+    present_today = counts["attendance"]["present_today"]
+    logged_in_now = counts["attendance"]["logged_in_now"]
     
     return {
         "total_employees": total_employees,
@@ -386,8 +488,17 @@ async def get_dashboard_stats(current_user: dict = Depends(verify_token)):
 
 # Document Generation Routes
 @api_router.post("/employees/{employee_id}/generate-offer-letter")
-async def generate_employee_offer_letter(employee_id: str, current_user: dict = Depends(verify_token)):
-    """Generate offer letter for employee"""
+async def generate_employee_offer_letter(
+    employee_id: str,
+    request: Request,
+    format: Optional[str] = None,
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Generate offer letter for employee
+    
+    Responds with the PDF itself; format=json returns the legacy base64 JSON body.
+    """
     employee = await db.employees.find_one({"employee_id": employee_id})
     
     if not employee:
@@ -397,26 +508,39 @@ async def generate_employee_offer_letter(employee_id: str, current_user: dict =
         # Remove MongoDB ObjectId and parse dates
         employee.pop("_id", None)
         employee.pop("password_hash", None)
-        employee = parse_from_mongo(employee)
+        employee = decode_employee(employee)
         
         # Generate offer letter PDF
-        pdf_base64 = generate_offer_letter(employee)
+        pdf_data = await pdf_render_pool.render_pdf("offer_letter", employee)
+        filename = f"Offer_Letter_{employee['full_name'].replace(' ', '_')}_{employee_id}.pdf"
+        
+        if not wants_json(format):
+            return bytes_download_response(request, pdf_data, filename)
         
         return {
             "message": "Offer letter generated successfully",
             "document_type": "offer_letter",
             "employee_id": employee_id,
             "employee_name": employee["full_name"],
-            "pdf_data": pdf_base64,
-            "filename": f"Offer_Letter_{employee['full_name'].replace(' ', '_')}_{employee_id}.pdf"
+            "pdf_data": base64.b64encode(pdf_data).decode(),
+            "filename": filename
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating offer letter: {str(e)}")
 
 @api_router.post("/employees/{employee_id}/generate-appointment-letter")
-async def generate_employee_appointment_letter(employee_id: str, current_user: dict = Depends(verify_token)):
-    """Generate appointment letter for employee"""
+async def generate_employee_appointment_letter(
+    employee_id: str,
+    request: Request,
+    format: Optional[str] = None,
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Generate appointment letter for employee
+    
+    Responds with the PDF itself; format=json returns the legacy base64 JSON body.
+    """
     employee = await db.employees.find_one({"employee_id": employee_id})
     
     if not employee:
@@ -426,23 +550,69 @@ async def generate_employee_appointment_letter(employee_id: str, current_user: d
         # Remove MongoDB ObjectId and parse dates
         employee.pop("_id", None)
         employee.pop("password_hash", None)
-        employee = parse_from_mongo(employee)
+        employee = decode_employee(employee)
         
         # Generate appointment letter PDF
-        pdf_base64 = generate_appointment_letter(employee)
+        pdf_data = await pdf_render_pool.render_pdf("appointment_letter", employee)
+        filename = f"Appointment_Letter_{employee['full_name'].replace(' ', '_')}_{employee_id}.pdf"
+        
+        if not wants_json(format):
+            return bytes_download_response(request, pdf_data, filename)
         
         return {
             "message": "Appointment letter generated successfully",
             "document_type": "appointment_letter",
             "employee_id": employee_id,
             "employee_name": employee["full_name"],
-            "pdf_data": pdf_base64,
-            "filename": f"Appointment_Letter_{employee['full_name'].replace(' ', '_')}_{employee_id}.pdf"
+            "pdf_data": base64.b64encode(pdf_data).decode(),
+            "filename": filename
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating appointment letter: {str(e)}")
 
+# Salary Calculation Helpers
+async def calculate_monthly_salary_for_employee(employee: dict, year: int, month: int) -> dict:
+    """Calculate an employee's salary from the monthly attendance rollup and working calendar"""
+    monthly_attendance = await get_monthly_attendance(db, employee["employee_id"], year, month)
+    total_working_days = await get_working_days_in_month(db, year, month)
+    
+    return calculate_employee_salary(
+        employee, [], year, month,
+        total_working_days=total_working_days,
+        present_days=monthly_attendance["present_days"]
+    )
+
+async def get_salary_slip_for_employee(employee: dict, year: int, month: int) -> tuple:
+    """
+    Salary calculation and slip PDF bytes for an employee's month
+
+    Served from the PDF cache while the month's attendance, working days,
+    salary and slip template are unchanged; calculated and rendered otherwise.
+    """
+    monthly_attendance = await get_monthly_attendance(db, employee["employee_id"], year, month)
+    total_working_days = await get_working_days_in_month(db, year, month)
+    cache_key = salary_slip_cache_key(
+        employee, year, month, monthly_attendance["present_days"], total_working_days
+    )
+    
+    cached = await pdf_cache.get(db, cache_key)
+    if cached is not None:
+        return cached["calculation"], cached["pdf_data"]
+    
+    salary_calculation = calculate_employee_salary(
+        employee, [], year, month,
+        total_working_days=total_working_days,
+        present_days=monthly_attendance["present_days"]
+    )
+    pdf_data = await pdf_render_pool.render_pdf("salary_slip", salary_calculation)
+    await pdf_cache.put(
+        db, cache_key, pdf_data, "salary_slip",
+        employee_id=employee["employee_id"], year=year, month=month,
+        template_version=SALARY_SLIP_TEMPLATE_VERSION, calculation=salary_calculation
+    )
+    return salary_calculation, pdf_data
+
 # Salary Calculation Routes
 @api_router.post("/employees/{employee_id}/calculate-salary")
 async def calculate_employee_monthly_salary(
@@ -463,21 +633,13 @@ async def calculate_employee_monthly_salary(
     month = salary_request.month or now.month
     
     try:
-        # Get employee attendance records
-        attendance_records = await db.attendance.find({"employee_id": employee_id}).to_list(1000)
-        
-        # Remove MongoDB ObjectId and parse dates
-        for record in attendance_records:
-            record.pop("_id", None)
-            record = parse_from_mongo(record)
-        
         # Remove sensitive data from employee
         employee.pop("_id", None)
         employee.pop("password_hash", None)
-        employee = parse_from_mongo(employee)
+        employee = decode_employee(employee)
         
-        # Calculate salary
-        salary_calculation = calculate_employee_salary(employee, attendance_records, year, month)
+        # Calculate salary from the monthly attendance rollup
+        salary_calculation = await calculate_monthly_salary_for_employee(employee, year, month)
         
         return {
             "message": "Salary calculated successfully",
@@ -491,14 +653,15 @@ async def calculate_employee_monthly_salary(
 async def get_working_days(year: int, month: int, current_user: dict = Depends(verify_token)):
     """Get working days for a specific month"""
     try:
-        calculator = SalaryCalculator()
-        working_days = calculator.get_working_days_in_month(year, month)
+        working_calendar = await get_working_calendar(db, year)
+        working_days = working_calendar.working_days_in_month(month)
         
         return {
             "year": year,
             "month": month,
             "working_days": working_days,
-            "month_name": datetime(year, month, 1).strftime('%B')
+            "month_name": datetime(year, month, 1).strftime('%B'),
+            "holidays": [h.isoformat() for h in working_calendar.holidays_in_month(month)]
         }
         
     except Exception as e:
@@ -514,15 +677,13 @@ async def get_employee_attendance_summary(
     """Get attendance summary for employee for a specific month"""
     
     try:
-        # Get attendance records for the month
-        attendance_records = await db.attendance.find({"employee_id": employee_id}).to_list(1000)
-        
-        # Count present days
-        present_days = get_employee_attendance_days(attendance_records, year, month)
+        # Get the month's attendance rollup
+        monthly_attendance = await get_monthly_attendance(db, employee_id, year, month)
+        present_days = monthly_attendance["present_days"]
+        late_days = monthly_attendance["late_days"]
         
         # Get working days
-        calculator = SalaryCalculator()
-        total_working_days = calculator.get_working_days_in_month(year, month)
+        total_working_days = await get_working_days_in_month(db, year, month)
         
         # Calculate attendance percentage
         attendance_percentage = (present_days / total_working_days * 100) if total_working_days > 0 else 0
@@ -534,8 +695,12 @@ async def get_employee_attendance_summary(
             "month_name": datetime(year, month, 1).strftime('%B'),
             "present_days": present_days,
             "total_working_days": total_working_days,
-            "absent_days": total_working_days - present_days,
-            "attendance_percentage": round(attendance_percentage, 2)
+            "absent_days": max(0, total_working_days - present_days),
+            "attendance_percentage": round(attendance_percentage, 2),
+            "late_days": late_days,
+            "total_late_minutes": monthly_attendance["total_late_minutes"],
+            "total_penalty_amount": monthly_attendance["total_penalty_amount"],
+            "punctuality_score": calculate_punctuality_score(late_days, total_working_days)
         }
         
     except Exception as e:
@@ -583,9 +748,15 @@ async def get_salary_rates(current_user: dict = Depends(verify_token)):
 async def generate_employee_salary_slip(
     employee_id: str,
     salary_request: SalaryCalculationRequest,
+    request: Request,
+    format: Optional[str] = None,
     current_user: dict = Depends(verify_token)
 ):
-    """Generate salary slip PDF for employee"""
+    """
+    Generate salary slip PDF for employee
+    
+    Responds with the PDF itself; format=json returns the legacy base64 JSON body.
+    """
     
     # Get employee data
     employee = await db.employees.find_one({"employee_id": employee_id})
@@ -598,35 +769,28 @@ async def generate_employee_salary_slip(
     month = salary_request.month or now.month
     
     try:
-        # Get employee attendance records
-        attendance_records = await db.attendance.find({"employee_id": employee_id}).to_list(1000)
-        
-        # Remove MongoDB ObjectId and parse dates
-        for record in attendance_records:
-            record.pop("_id", None)
-            record = parse_from_mongo(record)
-        
         # Remove sensitive data from employee
         employee.pop("_id", None)
         employee.pop("password_hash", None)
-        employee = parse_from_mongo(employee)
+        employee = decode_employee(employee)
         
-        # Calculate salary
-        salary_calculation = calculate_employee_salary(employee, attendance_records, year, month)
+        # Calculate salary and render the standard format slip (cached per month)
+        salary_calculation, pdf_data = await get_salary_slip_for_employee(employee, year, month)
+        filename = f"Salary_Slip_{employee['full_name'].replace(' ', '_')}_{year}_{month:02d}.pdf"
         
-        # Generate standard format salary slip PDF with digital signature
-        pdf_base64 = generate_standard_salary_slip(salary_calculation)
+        if not wants_json(format):
+            return bytes_download_response(request, pdf_data, filename)
         
         # Add digital signature information
-        digital_signature = create_digital_signature_info()
+        digital_signature = create_digital_signature_info(employee_id, month, year)
         
         return {
             "message": "Standard salary slip generated successfully with digital signature",
             "employee_id": employee_id,
             "employee_name": employee["full_name"],
             "month_year": f"{salary_calculation['employee_info']['calculation_month']}",
-            "pdf_data": pdf_base64,
-            "filename": f"Salary_Slip_{employee['full_name'].replace(' ', '_')}_{year}_{month:02d}.pdf",
+            "pdf_data": base64.b64encode(pdf_data).decode(),
+            "filename": filename,
             "digital_signature": digital_signature,
             "format": "Standard Indian Salary Slip Format"
         }
@@ -634,6 +798,41 @@ async def generate_employee_salary_slip(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating salary slip: {str(e)}")
 
+@api_router.get("/employees/{employee_id}/salary-slips/{year}/{month}")
+async def download_employee_salary_slip(
+    employee_id: str,
+    year: int,
+    month: int,
+    request: Request,
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Download an employee's salary slip PDF for a month
+    
+    Served from the PDF cache while unchanged, with ETag revalidation and
+    range requests.
+    """
+    if month < 1 or month > 12:
+        raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
+    
+    employee = await db.employees.find_one({"employee_id": employee_id})
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    try:
+        employee.pop("_id", None)
+        employee.pop("password_hash", None)
+        employee = decode_employee(employee)
+        
+        salary_calculation, pdf_data = await get_salary_slip_for_employee(employee, year, month)
+        filename = f"Salary_Slip_{employee['full_name'].replace(' ', '_')}_{year}_{month:02d}.pdf"
+        return bytes_download_response(request, pdf_data, filename)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error downloading salary slip: {str(e)}")
+
 @api_router.post("/employees/{employee_id}/generate-and-share-salary-slip")
 async def generate_and_share_salary_slip(
     employee_id: str,
@@ -653,24 +852,14 @@ async def generate_and_share_salary_slip(
     month = salary_request.month or now.month
     
     try:
-        # Get employee attendance records
-        attendance_records = await db.attendance.find({"employee_id": employee_id}).to_list(1000)
-        
-        # Remove MongoDB ObjectId and parse dates
-        for record in attendance_records:
-            record.pop("_id", None)
-            record = parse_from_mongo(record)
-        
         # Remove sensitive data from employee
         employee.pop("_id", None)
         employee.pop("password_hash", None)
-        employee = parse_from_mongo(employee)
-        
-        # Calculate salary
-        salary_calculation = calculate_employee_salary(employee, attendance_records, year, month)
+        employee = decode_employee(employee)
         
-        # Generate standard salary slip PDF
-        pdf_base64 = generate_standard_salary_slip(salary_calculation)
+        # Calculate salary and render the standard slip (cached per month)
+        salary_calculation, pdf_data = await get_salary_slip_for_employee(employee, year, month)
+        pdf_base64 = base64.b64encode(pdf_data).decode()
         
         # Create communication service
         comm_service = CommunicationService()
@@ -681,7 +870,7 @@ async def generate_and_share_salary_slip(
         )
         
         # Add digital signature information
-        digital_signature = create_digital_signature_info()
+        digital_signature = create_digital_signature_info(employee_id, month, year)
         
         return {
             "message": "Salary slip generated and shared successfully",
@@ -699,32 +888,37 @@ async def generate_and_share_salary_slip(
         raise HTTPException(status_code=500, detail=f"Error generating and sharing salary slip: {str(e)}")
 
 @api_router.get("/salary/employee-selection")
-async def get_employees_for_salary_selection(current_user: dict = Depends(verify_token)):
+async def get_employees_for_salary_selection(
+    department: Optional[str] = None,
+    fields: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = EMPLOYEE_PAGE_SIZE_LIMIT,
+    current_user: dict = Depends(verify_token)
+):
     """Get employees list for salary processing selection"""
     try:
-        employees = await db.employees.find({"status": "Active"}).to_list(1000)
-        
-        # Format for selection dropdown
-        employee_list = []
-        for emp in employees:
-            emp.pop("_id", None)
-            emp.pop("password_hash", None)
-            employee_list.append({
-                "employee_id": emp["employee_id"],
-                "full_name": emp["full_name"],
-                "department": emp["department"],
-                "designation": emp["designation"],
-                "email_address": emp["email_address"],
-                "contact_number": emp["contact_number"],
-                "basic_salary": emp["basic_salary"]
-            })
+        try:
+            selected_fields = parse_field_selection(fields, SALARY_SELECTION_FIELDS) or SALARY_SELECTION_FIELDS
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # Only the dropdown fields are read from MongoDB
+        employee_list, next_cursor = await fetch_employee_page(
+            db,
+            build_employee_filter(department, "Active", after),
+            build_employee_projection(selected_fields),
+            limit
+        )
         
         return {
             "employees": employee_list,
-            "total_count": len(employee_list),
+            "total_count": await employee_count_cache.get(db, department, "Active"),
+            "next_cursor": next_cursor,
             "message": "Employee list retrieved for salary processing"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching employees for salary selection: {str(e)}")
 
@@ -759,6 +953,162 @@ async def get_available_communication_channels():
         "note": "Email includes PDF attachment, WhatsApp and SMS provide notifications only"
     }
 
+# Payroll Run Routes
+@api_router.post("/payroll/runs/{year}/{month}", response_model=PayrollRunResponse)
+async def start_payroll_run(
+    year: int,
+    month: int,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(verify_token)
+):
+    """Start a month-end payroll run for all active employees"""
+    if month < 1 or month > 12:
+        raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
+    
+    try:
+        payroll_run = PayrollRun(
+            year=year,
+            month=month,
+            created_by=current_user.get("username", "system")
+        )
+        
+        await db.payroll_runs.insert_one(prepare_for_mongo(payroll_run.dict()))
+        
+        # Salaries are computed after the response is sent
+        background_tasks.add_task(execute_payroll_run, db, payroll_run.id, year, month)
+        
+        return PayrollRunResponse(
+            **payroll_run.dict(),
+            progress_percentage=get_payroll_run_progress(payroll_run.dict())
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting payroll run: {str(e)}")
+
+@api_router.post("/payroll/{year}/{month}/slips", response_model=SalarySlipJobResponse)
+async def start_salary_slip_job(
+    year: int,
+    month: int,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Render every active employee's salary slip for a month in the background
+    
+    Starting the job again resumes it: slips already rendered are skipped.
+    """
+    if month < 1 or month > 12:
+        raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
+    
+    try:
+        job = await claim_salary_slip_job(db, year, month, current_user.get("username", "system"))
+        if job is None:
+            # Already running elsewhere; report its progress instead
+            job = await db.salary_slip_jobs.find_one({"id": salary_slip_job_id(year, month)}, {"_id": 0})
+        else:
+            background_tasks.add_task(execute_salary_slip_job, db, job["id"])
+        
+        return SalarySlipJobResponse(**job, progress_percentage=get_salary_slip_job_progress(job))
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting salary slip job: {str(e)}")
+
+@api_router.get("/payroll/{year}/{month}/slips", response_model=SalarySlipJobResponse)
+async def get_salary_slip_job(year: int, month: int, current_user: dict = Depends(verify_token)):
+    """Get progress of a month's salary slip job and its slips per department"""
+    job = await db.salary_slip_jobs.find_one({"id": salary_slip_job_id(year, month)}, {"_id": 0})
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Salary slip job not found")
+    
+    return SalarySlipJobResponse(
+        **job,
+        progress_percentage=get_salary_slip_job_progress(job),
+        departments=await get_salary_slip_departments(db, job["id"])
+    )
+
+@api_router.get("/payroll/{year}/{month}/slips/{department}/zip")
+async def download_department_salary_slips(
+    year: int,
+    month: int,
+    department: str,
+    current_user: dict = Depends(verify_token)
+):
+    """Stream one department's salary slips for a month as a ZIP file"""
+    job_id = salary_slip_job_id(year, month)
+    slips = await db.employee_documents.find(
+        {"slip_job_id": job_id, "department": department},
+        {"_id": 0, "employee_id": 1, "slip_job_id": 1, "document_name": 1}
+    ).sort("employee_id", 1).to_list(None)
+    
+    if not slips:
+        raise HTTPException(status_code=404, detail="No salary slips found for this department and month")
+    
+    filename = f"Salary_Slips_{department.replace(' ', '_')}_{job_id}.zip"
+    return StreamingResponse(
+        stream_salary_slip_zip(slips),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@api_router.get("/payroll/runs/{run_id}", response_model=PayrollRunResponse)
+async def get_payroll_run(run_id: str, current_user: dict = Depends(verify_token)):
+    """Get status, progress and totals of a payroll run"""
+    payroll_run = await db.payroll_runs.find_one({"id": run_id}, {"_id": 0})
+    
+    if not payroll_run:
+        raise HTTPException(status_code=404, detail="Payroll run not found")
+    
+    payroll_run = decode_payroll_run(payroll_run)
+    return PayrollRunResponse(
+        **payroll_run,
+        progress_percentage=get_payroll_run_progress(payroll_run)
+    )
+
+@api_router.get("/payroll/runs/{run_id}/results")
+async def get_payroll_run_results(
+    run_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    department: str = None,
+    current_user: dict = Depends(verify_token)
+):
+    """Get per-employee results of a payroll run, one page at a time"""
+    payroll_run = await db.payroll_runs.find_one({"id": run_id}, {"_id": 0})
+    
+    if not payroll_run:
+        raise HTTPException(status_code=404, detail="Payroll run not found")
+    
+    try:
+        limit = max(1, min(limit, 1000))
+        skip = max(0, skip)
+        
+        query = {"run_id": run_id}
+        if department:
+            query["department"] = department
+        
+        results = await db.payroll_run_results.find(
+            query, {"_id": 0}
+        ).sort("employee_id", 1).skip(skip).limit(limit).to_list(limit)
+        
+        total_count = payroll_run.get("processed_employees", 0)
+        if department:
+            total_count = await db.payroll_run_results.count_documents(query)
+        
+        return {
+            "run_id": run_id,
+            "status": payroll_run["status"],
+            "progress_percentage": get_payroll_run_progress(payroll_run),
+            "results": results,
+            "skip": skip,
+            "limit": limit,
+            "total_count": total_count,
+            "has_more": skip + len(results) < total_count
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching payroll run results: {str(e)}")
+
 # Enhanced Employee Management Routes
 @api_router.delete("/employees/{employee_id}")
 async def delete_employee(employee_id: str, current_user: dict = Depends(verify_token)):
@@ -771,6 +1121,11 @@ async def delete_employee(employee_id: str, current_user: dict = Depends(verify_
         
         # Delete employee from database
         await db.employees.delete_one({"employee_id": employee_id})
+        employee_name_cache.invalidate(employee_id)
+        employee_count_cache.invalidate()
+        await increment_counters(
+            db, total_employees=-1, active_employees=-1 if employee.get("status") == "Active" else 0
+        )
         
         # Delete related attendance records (optional - keep for audit trail)
         # await db.attendance.delete_many({"employee_id": employee_id})
@@ -814,28 +1169,40 @@ async def upload_employee_document(
         if file_extension not in allowed_extensions:
             raise HTTPException(status_code=400, detail="File type not allowed")
         
-        # Save file
-        file_path, file_size = save_uploaded_file(file, employee_id, document_type)
+        # Store the content once; a re-upload of identical bytes only adds a reference
+        blob = await store_blob(db, file.file, metadata={"employee_id": employee_id, "document_type": document_type})
         
         # Create document record
         document = EmployeeDocument(
             employee_id=employee_id,
             document_type=document_type,
             document_name=file.filename,
-            file_path=file_path,
-            file_size=file_size,
+            file_path=blob["file_path"],
+            file_size=blob["file_size"],
             uploaded_by=current_user.get("username", "system"),
-            description=description
+            description=description,
+            content_sha256=blob["content_sha256"]
         )
         
         # Prepare for MongoDB
         document_mongo = prepare_for_mongo(document.dict())
         
-        # Insert into database
-        await db.employee_documents.insert_one(document_mongo)
+        # Insert into database; the blob reference goes back if the record is not written
+        try:
+            await db.employee_documents.insert_one(document_mongo)
+        except Exception:
+            await release_blob(db, blob["content_sha256"])
+            raise
+        await increment_counters(db, total_documents=1)
+        
+        # The preview is rendered in the background; identical content may already have one
+        if await enqueue_thumbnail(db, blob["content_sha256"], file.filename):
+            thumbnail_worker.wake()
+        thumbnail_versions = await get_thumbnail_versions(db, [blob["content_sha256"]])
         
         return {
             "message": "Document uploaded successfully",
+            "deduplicated": blob["deduplicated"],
             "document": EmployeeDocumentResponse(
                 id=document.id,
                 employee_id=document.employee_id,
@@ -844,7 +1211,8 @@ async def upload_employee_document(
                 file_size=document.file_size,
                 uploaded_by=document.uploaded_by,
                 uploaded_at=document.uploaded_at,
-                description=document.description
+                description=document.description,
+                thumbnail_version=thumbnail_versions.get(blob["content_sha256"])
             )
         }
         
@@ -858,12 +1226,14 @@ async def get_employee_documents(employee_id: str, current_user: dict = Depends(
     """Get all documents for an employee"""
     try:
         documents = await db.employee_documents.find({"employee_id": employee_id}).to_list(1000)
+        thumbnail_versions = await get_thumbnail_versions(db, [doc.get("content_sha256") for doc in documents])
         
         result = []
         for doc in documents:
             doc.pop("_id", None)
             doc.pop("file_path", None)  # Don't expose file path
-            doc = parse_from_mongo(doc)
+            doc = decode_employee_document(doc)
+            doc["thumbnail_version"] = thumbnail_versions.get(doc.get("content_sha256"))
             result.append(EmployeeDocumentResponse(**doc))
         
         return result
@@ -871,13 +1241,59 @@ async def get_employee_documents(employee_id: str, current_user: dict = Depends(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching employee documents: {str(e)}")
 
+@api_router.get("/employees/{employee_id}/documents/{document_id}/thumbnail")
+async def get_employee_document_thumbnail(
+    employee_id: str,
+    document_id: str,
+    request: Request,
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Small preview image of a document (images and scanned PDFs)
+    
+    Previews are rendered in the background after upload; until one is ready,
+    or when the file has none, this returns 404. Clients add the document's
+    thumbnail_version to the URL, so the image is cached for a year.
+    """
+    document = await db.employee_documents.find_one(
+        {"id": document_id, "employee_id": employee_id}, {"_id": 0, "content_sha256": 1}
+    )
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    thumbnail = await get_document_thumbnail(db, document.get("content_sha256"))
+    if thumbnail is None:
+        raise HTTPException(status_code=404, detail="Thumbnail not available")
+    
+    data, etag = thumbnail
+    return immutable_bytes_response(request, data, etag, THUMBNAIL_MEDIA_TYPE)
+
+def get_document_storage_object(document: dict) -> tuple:
+    """(storage backend, key) holding a document's bytes; (None, None) for a not yet migrated local file"""
+    blob_key = document_blob_key(document)
+    if blob_key:
+        return document_storage, blob_key
+    slip_key = salary_slip_document_key(document)
+    if slip_key:
+        return slip_storage, slip_key
+    return None, None
+
 @api_router.get("/employees/{employee_id}/documents/{document_id}/download")
 async def download_employee_document(
     employee_id: str, 
     document_id: str, 
+    request: Request,
+    format: Optional[str] = None,
     current_user: dict = Depends(verify_token)
 ):
-    """Download employee document"""
+    """
+    Download employee document
+    
+    Streams the stored file (with range and ETag support), or redirects to a
+    short-lived presigned URL when the storage backend provides one.
+    format=url returns that URL as JSON (null when the API serves the bytes);
+    format=json returns the legacy base64 JSON body.
+    """
     try:
         # Find document
         document = await db.employee_documents.find_one({
@@ -888,8 +1304,30 @@ async def download_employee_document(
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
+        storage, key = get_document_storage_object(document)
+        media_type = mimetypes.guess_type(document["document_name"])[0] or "application/octet-stream"
+        download_url = None
+        if key and not wants_json(format):
+            download_url = await asyncio.to_thread(
+                storage.presigned_url, key, document["document_name"], media_type
+            )
+        
+        if wants_download_url(format):
+            return {"download_url": download_url, "expires_in": PRESIGNED_URL_EXPIRY_SECONDS if download_url else None}
+        if download_url:
+            # File bytes go straight from object storage to the client
+            return RedirectResponse(download_url, status_code=307)
+        if not wants_json(format):
+            if key:
+                return await object_download_response(
+                    request, storage, key, document["document_name"], media_type
+                )
+            return file_download_response(request, document["file_path"], document["document_name"], media_type)
+        
         # Get file content as base64
-        file_base64 = get_file_as_base64(document["file_path"])
+        file_base64 = await asyncio.to_thread(
+            get_file_as_base64, document["file_path"], storage, key
+        )
         
         return {
             "document_name": document["document_name"],
@@ -898,9 +1336,44 @@ async def download_employee_document(
             "file_size": document["file_size"]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error downloading document: {str(e)}")
 
+@api_router.delete("/employees/{employee_id}/documents/{document_id}")
+async def delete_employee_document(
+    employee_id: str,
+    document_id: str,
+    current_user: dict = Depends(verify_token)
+):
+    """Delete employee document; its stored content is collected once nothing references it"""
+    try:
+        document = await db.employee_documents.find_one_and_delete(
+            {"id": document_id, "employee_id": employee_id},
+            projection={"_id": 0, "employee_id": 1, "file_path": 1, "content_sha256": 1, "slip_job_id": 1}
+        )
+        if not document:
+            raise HTTPException(status_code=404, detail="Document not found")
+        await increment_counters(db, total_documents=-1)
+        
+        storage, key = get_document_storage_object(document)
+        if storage is document_storage:
+            await release_blob(db, document["content_sha256"])
+        elif key:
+            # Generated slips own their stored object
+            await asyncio.to_thread(storage.delete, key)
+        elif os.path.exists(document["file_path"]):
+            # Not yet migrated uploads own their file
+            await asyncio.to_thread(os.remove, document["file_path"])
+        
+        return {"message": "Document deleted successfully"}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting document: {str(e)}")
+
 # Company Announcements Routes
 @api_router.post("/announcements", response_model=AnnouncementResponse)
 async def create_announcement(
@@ -924,6 +1397,9 @@ async def create_announcement(
         
         # Insert into database
         await db.announcements.insert_one(announcement_mongo)
+        await increment_counters(
+            db, active_announcements=1, urgent_announcements=1 if announcement.priority == "Urgent" else 0
+        )
         
         # Remove MongoDB fields for response
         announcement_dict = announcement.dict()
@@ -939,16 +1415,15 @@ async def get_announcements(current_user: dict = Depends(verify_token)):
         # Get active announcements, sorted by priority and date
         announcements = await db.announcements.find({
             "is_active": True,
-            "$or": [
-                {"valid_until": {"$gt": datetime.now(timezone.utc)}},
-                {"valid_until": None}
-            ]
+            "$or": date_range_clauses(
+                "valid_until", start=datetime.now(timezone.utc), start_op="$gt"
+            ) + [{"valid_until": None}]
         }).sort([("priority", -1), ("published_at", -1)]).to_list(100)
         
         result = []
         for ann in announcements:
             ann.pop("_id", None)
-            ann = parse_from_mongo(ann)
+            ann = decode_announcement(ann)
             result.append(AnnouncementResponse(**ann))
         
         return result
@@ -960,14 +1435,19 @@ async def get_announcements(current_user: dict = Depends(verify_token)):
 async def delete_announcement(announcement_id: str, current_user: dict = Depends(verify_token)):
     """Delete announcement"""
     try:
-        # Soft delete (set inactive)
-        result = await db.announcements.update_one(
+        # Soft delete (set inactive); the previous state tells which counters to move
+        previous = await db.announcements.find_one_and_update(
             {"id": announcement_id},
-            {"$set": {"is_active": False}}
+            {"$set": {"is_active": False}},
+            projection={"_id": 0, "is_active": 1, "priority": 1}
         )
         
-        if result.matched_count == 0:
+        if previous is None:
             raise HTTPException(status_code=404, detail="Announcement not found")
+        if previous.get("is_active"):
+            await increment_counters(
+                db, active_announcements=-1, urgent_announcements=-1 if previous.get("priority") == "Urgent" else 0
+            )
         
         return {"message": "Announcement deleted successfully"}
         
@@ -986,30 +1466,11 @@ async def get_dashboard_theme_config():
 async def get_enhanced_dashboard_statistics(current_user: dict = Depends(verify_token)):
     """Get comprehensive dashboard statistics"""
     try:
-        # Get basic stats
-        total_employees = await db.employees.count_documents({"status": "Active"})
-        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-        present_today = await db.attendance.count_documents({"date": today})
-        logged_in_now = await db.attendance.count_documents({"date": today, "status": "Logged In"})
-        
-        # Get enhanced stats
-        total_documents = await db.employee_documents.count_documents({})
-        active_announcements = await db.announcements.count_documents({"is_active": True})
-        
-        # Get recent stats (last 7 days)
-        week_ago = (datetime.now(timezone.utc) - timedelta(days=7))
-        recent_documents = await db.employee_documents.count_documents({
-            "uploaded_at": {"$gte": week_ago}
-        })
-        recent_announcements = await db.announcements.count_documents({
-            "published_at": {"$gte": week_ago}
-        })
-        
-        # Get urgent announcements
-        urgent_announcements = await db.announcements.count_documents({
-            "is_active": True,
-            "priority": "Urgent"
-        })
+        # Counts come from the shared dashboard cache
+        counts = await get_dashboard_counts(db)
+        total_employees = counts["employees"]["active"]
+        present_today = counts["attendance"]["present_today"]
+        logged_in_now = counts["attendance"]["logged_in_now"]
         
         return {
             "employee_metrics": {
@@ -1019,18 +1480,18 @@ async def get_enhanced_dashboard_statistics(current_user: dict = Depends(verify_
                 "absent_today": total_employees - present_today
             },
             "document_metrics": {
-                "total_documents": total_documents,
-                "recent_uploads": recent_documents,
+                "total_documents": counts["documents"]["total"],
+                "recent_uploads": counts["documents"]["recent"],
                 "pending_documents": 0  # Can be enhanced based on requirements
             },
             "announcement_metrics": {
-                "active_announcements": active_announcements,
-                "recent_announcements": recent_announcements,
-                "urgent_announcements": urgent_announcements
+                "active_announcements": counts["announcements"]["active"],
+                "recent_announcements": counts["announcements"]["recent"],
+                "urgent_announcements": counts["announcements"]["urgent"]
             },
             "system_health": {
                 "database_status": "Connected",
-                "last_updated": datetime.now(timezone.utc).isoformat()
+                "last_updated": counts["computed_at"].isoformat()
             }
         }
         
@@ -1038,8 +1499,17 @@ async def get_enhanced_dashboard_statistics(current_user: dict = Depends(verify_
         raise HTTPException(status_code=500, detail=f"Error fetching enhanced dashboard stats: {str(e)}")
 
 @api_router.post("/employees/{employee_id}/generate-employee-agreement")
-async def generate_employee_agreement_document(employee_id: str, current_user: dict = Depends(verify_token)):
-    """Generate comprehensive employee agreement with legal terms"""
+async def generate_employee_agreement_document(
+    employee_id: str,
+    request: Request,
+    format: Optional[str] = None,
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Generate comprehensive employee agreement with legal terms
+    
+    Responds with the PDF itself; format=json returns the legacy base64 JSON body.
+    """
     employee = await db.employees.find_one({"employee_id": employee_id})
     
     if not employee:
@@ -1049,18 +1519,22 @@ async def generate_employee_agreement_document(employee_id: str, current_user: d
         # Remove MongoDB ObjectId and parse dates
         employee.pop("_id", None)
         employee.pop("password_hash", None)
-        employee = parse_from_mongo(employee)
+        employee = decode_employee(employee)
         
         # Generate employee agreement PDF
-        pdf_base64 = generate_employee_agreement(employee)
+        pdf_data = await pdf_render_pool.render_pdf("employee_agreement", employee)
+        filename = f"Employee_Agreement_{employee['full_name'].replace(' ', '_')}_{employee_id}.pdf"
+        
+        if not wants_json(format):
+            return bytes_download_response(request, pdf_data, filename)
         
         return {
             "message": "Employee agreement generated successfully",
             "document_type": "employee_agreement",
             "employee_id": employee_id,
             "employee_name": employee["full_name"],
-            "pdf_data": pdf_base64,
-            "filename": f"Employee_Agreement_{employee['full_name'].replace(' ', '_')}_{employee_id}.pdf"
+            "pdf_data": base64.b64encode(pdf_data).decode(),
+            "filename": filename
         }
         
     except Exception as e:
@@ -1151,6 +1625,8 @@ async def create_interview(
         
         interview_mongo = prepare_for_mongo(interview.dict())
         await db.interviews.insert_one(interview_mongo)
+        if interview.interview_status != "Completed":
+            await increment_counters(db, pending_interviews=1)
         
         interview_dict = interview.dict()
         return InterviewCandidateResponse(**interview_dict)
@@ -1177,7 +1653,7 @@ async def get_interviews(
         result = []
         for interview in interviews:
             interview.pop("_id", None)
-            interview = parse_from_mongo(interview)
+            interview = decode_interview(interview)
             result.append(InterviewCandidateResponse(**interview))
         
         return result
@@ -1200,13 +1676,16 @@ async def update_interview_status(
             "updated_at": datetime.now(timezone.utc)
         }
         
-        result = await db.interviews.update_one(
+        previous = await db.interviews.find_one_and_update(
             {"id": interview_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection={"_id": 0, "interview_status": 1}
         )
         
-        if result.matched_count == 0:
+        if previous is None:
             raise HTTPException(status_code=404, detail="Interview not found")
+        was_pending = previous.get("interview_status") != "Completed"
+        await increment_counters(db, pending_interviews=(status != "Completed") - was_pending)
         
         return {"message": "Interview status updated successfully"}
         
@@ -1218,52 +1697,35 @@ async def update_interview_status(
 # Working Employee Database Routes
 @api_router.get("/working-employees", response_model=List[dict])
 async def get_working_employees(
+    response: Response,
     department: str = None,
+    after: Optional[str] = None,
+    limit: int = 100,
     current_user: dict = Depends(verify_token)
 ):
-    """Get detailed working employee database"""
+    """
+    Get detailed working employee database
+    
+    Paginated by employee_id: the X-Next-Cursor response header carries the
+    value to pass as `after` for the next page (absent on the last page).
+    """
     try:
-        query = {"status": "Active"}
-        if department:
-            query["department"] = department
+        limit = max(1, min(limit, 500))
         
-        employees = await db.employees.find(query).to_list(None)
+        # Employees, latest attendance and document completion in one aggregation
+        pipeline = build_working_employees_pipeline(department, after, limit)
+        employees = await db.employees.aggregate(pipeline).to_list(limit)
         
         result = []
         for emp in employees:
-            emp.pop("_id", None)
-            emp.pop("password_hash", None)
-            emp = parse_from_mongo(emp)
-            
-            # Get latest attendance for each employee
-            latest_attendance = await db.attendance.find_one(
-                {"employee_id": emp["employee_id"]},
-                sort=[("date", -1)]
-            )
-            
-            # Clean attendance data if exists
-            if latest_attendance:
-                latest_attendance.pop("_id", None)
-                latest_attendance = parse_from_mongo(latest_attendance)
-            
-            # Get document completion status
-            emp_documents = await db.employee_documents.find(
-                {"employee_id": emp["employee_id"]}
-            ).to_list(None)
-            
-            document_types = [doc.get("document_type", "") for doc in emp_documents]
-            completion_percentage = calculate_document_completion_percentage(document_types)
-            
-            # Enhanced employee profile
-            enhanced_employee = {
-                **emp,
-                "latest_attendance": latest_attendance,
-                "document_completion": completion_percentage,
-                "total_documents": len(emp_documents),
-                "last_login": latest_attendance.get("login_time") if latest_attendance else None
-            }
-            
-            result.append(enhanced_employee)
+            emp = decode_employee(emp)
+            if emp["latest_attendance"]:
+                emp["latest_attendance"] = decode_attendance(emp["latest_attendance"])
+                emp["last_login"] = emp["latest_attendance"].get("login_time")
+            result.append(emp)
+        
+        if len(result) == limit:
+            response.headers["X-Next-Cursor"] = result[-1]["employee_id"]
         
         return result
         
@@ -1279,22 +1741,32 @@ async def get_employee_attendance_report(
 ):
     """Get detailed attendance report for working employee"""
     try:
-        # Get all attendance records for the employee
-        attendance_records = await db.attendance.find({
-            "employee_id": employee_id
-        }).to_list(None)
+        total_working_days = await get_working_days_in_month(db, year, month)
         
-        # Convert MongoDB records to dict format
-        records = []
-        for record in attendance_records:
-            record.pop("_id", None)
-            record = parse_from_mongo(record)
-            records.append(record)
+        # Statistics and the month's detail rows are computed in one aggregation
+        pipeline = build_monthly_attendance_pipeline(
+            employee_id, year, month,
+            total_working_days=total_working_days,
+            include_records=True
+        )
+        statistics = (await db.attendance.aggregate(pipeline).to_list(1))[0]
         
-        # Generate comprehensive report
-        report = generate_employee_attendance_report(employee_id, month, year, records)
+        # Convert MongoDB records to dict format
+        records = [decode_attendance(record) for record in statistics.pop("detailed_records")]
         
-        return report
+        return {
+            "month": month,
+            "year": year,
+            "total_working_days": total_working_days,
+            "present_days": statistics["present_days"],
+            "absent_days": statistics["absent_days"],
+            "late_days": statistics["late_days"],
+            "total_late_minutes": statistics["total_late_minutes"],
+            "total_penalty_amount": statistics["total_penalty_amount"],
+            "attendance_percentage": statistics["attendance_percentage"],
+            "punctuality_score": statistics["punctuality_score"],
+            "detailed_records": records
+        }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating attendance report: {str(e)}")
@@ -1314,6 +1786,10 @@ async def create_holiday(
         
         holiday_mongo = prepare_for_mongo(holiday.dict())
         await db.holidays.insert_one(holiday_mongo)
+        await increment_counters(db, total_holidays=1)
+        
+        # Working-day counts for that year must pick up the new holiday
+        working_calendar_cache.invalidate(holiday.holiday_date.year)
         
         holiday_dict = holiday.dict()
         return CompanyHolidayResponse(**holiday_dict)
@@ -1329,9 +1805,9 @@ async def get_yearly_holidays(
     """Get complete holiday calendar for a year"""
     try:
         # Get custom company holidays
-        custom_holidays = await db.holidays.find({
-            "$expr": {"$eq": [{"$year": "$holiday_date"}, year]}
-        }).to_list(None)
+        custom_holidays = await db.holidays.find(
+            date_range_query("holiday_date", date(year, 1, 1), date(year + 1, 1, 1))
+        ).to_list(None)
         
         # Get Indian national holidays
         national_holidays = get_indian_national_holidays(year)
@@ -1340,7 +1816,7 @@ async def get_yearly_holidays(
         custom_holiday_list = []
         for holiday in custom_holidays:
             holiday.pop("_id", None)
-            holiday = parse_from_mongo(holiday)
+            holiday = decode_holiday(holiday)
             custom_holiday_list.append(CompanyHolidayResponse(**holiday))
         
         # Combine all holidays
@@ -1378,19 +1854,20 @@ async def get_dashboard_overview_data(current_user: dict = Depends(verify_token)
     try:
         overview = get_dashboard_overview()
         
-        # Get actual statistics for each module
+        # Get actual statistics for each module (shared dashboard cache)
+        counts = await get_dashboard_counts(db)
         stats = {
-            "employee_database": await db.employees.count_documents({}),
-            "interview_scheduled": await db.interviews.count_documents({"interview_status": {"$ne": "Completed"}}),
-            "working_employees": await db.employees.count_documents({"status": "Active"}),
-            "announcements": await db.announcements.count_documents({"is_active": True}),
-            "holidays": await db.holidays.count_documents({})
+            "employee_database": counts["employees"]["total"],
+            "interview_scheduled": counts["interviews"]["not_completed"],
+            "working_employees": counts["employees"]["active"],
+            "announcements": counts["announcements"]["active"],
+            "holidays": counts["holidays"]["total"]
         }
         
         return {
             **overview,
             "statistics": stats,
-            "last_updated": datetime.now(timezone.utc).isoformat()
+            "last_updated": counts["computed_at"].isoformat()
         }
         
     except Exception as e:
@@ -1402,9 +1879,15 @@ async def generate_digital_salary_slip_with_signature(
     employee_id: str,
     month: int,
     year: int,
+    request: Request,
+    format: Optional[str] = None,
     current_user: dict = Depends(verify_token)
 ):
-    """Generate salary slip with digital signature and QR code"""
+    """
+    Generate salary slip with digital signature and QR code
+    
+    Responds with the PDF itself; format=json returns the legacy base64 JSON body.
+    """
     try:
         employee = await db.employees.find_one({"employee_id": employee_id})
         if not employee:
@@ -1412,20 +1895,14 @@ async def generate_digital_salary_slip_with_signature(
         
         employee.pop("_id", None)
         employee.pop("password_hash", None)
-        employee = parse_from_mongo(employee)
+        employee = decode_employee(employee)
         
-        # Get employee attendance records for salary calculation
-        attendance_records = await db.attendance.find({
-            "employee_id": employee_id
-        }).to_list(None)
+        # Calculate salary and render the slip for the specified month/year (cached per month)
+        salary_calculation, pdf_data = await get_salary_slip_for_employee(employee, year, month)
+        filename = f"Digital_Salary_Slip_{employee['full_name'].replace(' ', '_')}_{month}_{year}.pdf"
         
-        # Clean attendance records
-        for record in attendance_records:
-            record.pop("_id", None)
-            record = parse_from_mongo(record)
-        
-        # Calculate salary for the specified month/year
-        salary_calculation = calculate_employee_salary(employee, attendance_records, year, month)
+        if not wants_json(format):
+            return bytes_download_response(request, pdf_data, filename)
         
         # Generate digital signature info
         signature_info = create_digital_signature_info(employee_id, month, year)
@@ -1433,17 +1910,14 @@ async def generate_digital_salary_slip_with_signature(
         # Add signature info to salary calculation
         salary_calculation["digital_signature"] = signature_info
         
-        # Generate standard salary slip with digital signature
-        pdf_base64 = generate_standard_salary_slip(salary_calculation)
-        
         return {
             "message": "Digital salary slip generated successfully",
             "employee_id": employee_id,
             "employee_name": employee["full_name"],
             "month": month,
             "year": year,
-            "pdf_data": pdf_base64,
-            "filename": f"Digital_Salary_Slip_{employee['full_name'].replace(' ', '_')}_{month}_{year}.pdf",
+            "pdf_data": base64.b64encode(pdf_data).decode(),
+            "filename": filename,
             "digital_signature": signature_info,
             "sharing_channels": ["email", "whatsapp", "sms"]
         }
@@ -1473,23 +1947,14 @@ async def share_salary_slip_multi_channel(
         
         employee.pop("_id", None)
         employee.pop("password_hash", None)
-        employee = parse_from_mongo(employee)
+        employee = decode_employee(employee)
         
         # Initialize enhanced communication service
         comm_service = EnhancedCommunicationService()
         
-        # Get employee attendance records for salary calculation
-        attendance_records = await db.attendance.find({
-            "employee_id": employee_id
-        }).to_list(None)
-        
-        # Clean attendance records  
-        for record in attendance_records:
-            record.pop("_id", None)
-            record = parse_from_mongo(record)
-        
-        # Calculate salary for the specified month/year
-        salary_calculation = calculate_employee_salary(employee, attendance_records, request.year, request.month)
+        # Calculate salary and render the slip for the specified month/year (cached per month)
+        salary_calculation, pdf_data = await get_salary_slip_for_employee(employee, request.year, request.month)
+        pdf_base64 = base64.b64encode(pdf_data).decode()
         
         # Generate digital signature info
         signature_info = create_digital_signature_info(employee_id, request.month, request.year)
@@ -1497,9 +1962,6 @@ async def share_salary_slip_multi_channel(
         # Add signature info to salary calculation
         salary_calculation["digital_signature"] = signature_info
         
-        # Generate digital salary slip
-        pdf_base64 = generate_standard_salary_slip(salary_calculation)
-        
         # Share via selected channels
         sharing_results = {}
         
@@ -1544,23 +2006,6 @@ async def share_salary_slip_multi_channel(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error sharing salary slip: {str(e)}")
 
-# Helper function for document completion calculation
-def calculate_document_completion_percentage(uploaded_document_types: List[str]) -> float:
-    """Calculate document completion percentage for working employees"""
-    total_required = 0
-    uploaded_required = 0
-    
-    for category, details in WORKING_EMPLOYEE_DOCUMENT_CATEGORIES.items():
-        total_required += len(details["required"])
-        for doc_type in details["required"]:
-            if doc_type in uploaded_document_types:
-                uploaded_required += 1
-    
-    if total_required == 0:
-        return 100.0
-    
-    return round((uploaded_required / total_required) * 100, 2)
-
 # Company Announcement Multi-channel Sharing
 class AnnouncementShareRequest(BaseModel):
     announcement_id: str
@@ -1595,7 +2040,7 @@ async def share_company_announcement(
         for emp in employees:
             emp.pop("_id", None)
             emp.pop("password_hash", None)
-            emp = parse_from_mongo(emp)
+            emp = decode_employee(emp)
             employee_list.append(emp)
         
         # Initialize enhanced communication service
@@ -1603,7 +2048,7 @@ async def share_company_announcement(
         
         # Clean announcement data
         announcement.pop("_id", None)
-        announcement = parse_from_mongo(announcement)
+        announcement = decode_announcement(announcement)
         
         # Share via selected channels
         sharing_results = {}
@@ -1689,7 +2134,7 @@ async def send_hr_notification(
         for emp in employees:
             emp.pop("_id", None) 
             emp.pop("password_hash", None)
-            emp = parse_from_mongo(emp)
+            emp = decode_employee(emp)
             employee_list.append(emp)
         
         # Create notification data structure
@@ -1846,6 +2291,91 @@ async def test_communication_services(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Test failed: {str(e)}")
 
+# Database Index Routes
+@api_router.get("/system/indexes")
+async def get_database_index_report(current_user: dict = Depends(verify_token)):
+    """Report registered indexes that are missing, unregistered or unused"""
+    try:
+        return await get_index_report(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating index report: {str(e)}")
+
+@api_router.get("/system/pdf-render-metrics")
+async def get_pdf_render_metrics(current_user: dict = Depends(verify_token)):
+    """Queue depth and render times of the PDF rendering pool"""
+    return pdf_render_pool.get_metrics()
+
+@api_router.get("/system/pdf-cache")
+async def get_pdf_cache_stats(current_user: dict = Depends(verify_token)):
+    """Entries, size and hits of the generated PDF cache"""
+    return await pdf_cache.get_stats(db)
+
+@api_router.post("/system/dashboard-counters/reconcile")
+async def reconcile_dashboard_counter_document(current_user: dict = Depends(verify_token)):
+    """Recount the dashboard counters from their collections and report any drift"""
+    try:
+        result = await reconcile_dashboard_counters(db)
+        dashboard_stats_cache.invalidate()
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reconciling dashboard counters: {str(e)}")
+
+@api_router.post("/system/migrations/bson-dates")
+async def start_bson_date_migration(
+    background_tasks: BackgroundTasks,
+    restart: bool = False,
+    current_user: dict = Depends(verify_token)
+):
+    """Start (or resume) rewriting legacy ISO string dates as BSON dates"""
+    background_tasks.add_task(migrate_dates_to_bson, db, None, restart=restart)
+    return {"message": "Date migration started", "restart": restart}
+
+@api_router.get("/system/migrations/bson-dates")
+async def get_bson_date_migration(current_user: dict = Depends(verify_token)):
+    """Per-collection checkpoint status of the date migration"""
+    try:
+        return await get_date_migration_status(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching migration status: {str(e)}")
+
+@api_router.get("/system/document-blobs")
+async def get_document_blob_stats(current_user: dict = Depends(verify_token)):
+    """Stored blobs, references and documents not yet moved into the blob store"""
+    return await get_blob_stats(db)
+
+@api_router.get("/system/thumbnails")
+async def get_document_thumbnail_stats(current_user: dict = Depends(verify_token)):
+    """Document previews by status, and what this process's worker has rendered"""
+    return await get_thumbnail_stats(db)
+
+@api_router.post("/system/document-blobs/gc")
+async def collect_document_blobs(current_user: dict = Depends(verify_token)):
+    """Remove blobs that have had no references for longer than the grace period, and their thumbnails"""
+    try:
+        result = await collect_unreferenced_blobs(db)
+        result["removed_thumbnails"] = await collect_orphaned_thumbnails(db)
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error collecting document blobs: {str(e)}")
+
+@api_router.post("/system/migrations/document-storage")
+async def start_document_storage_migration(
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(verify_token)
+):
+    """Start moving files under /app/uploaded_documents into the configured storage backend"""
+    background_tasks.add_task(migrate_files_to_storage, db)
+    return {"message": "Document storage migration started"}
+
+@api_router.post("/system/migrations/document-blobs")
+async def start_document_blob_migration(
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(verify_token)
+):
+    """Start moving per-employee document files into the content-addressed blob store"""
+    background_tasks.add_task(migrate_documents_to_blobs, db)
+    return {"message": "Document blob migration started"}
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -1855,6 +2385,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "Content-Disposition", "Content-Length", "ETag"],
 )
 
 # Configure logging
@@ -1867,10 +2398,47 @@ logger = logging.getLogger(__name__)
 # Startup event
 @app.on_event("startup")
 async def startup_db_client():
-    # This will create the MongoDB client when the app starts
-    pass
+    # Make sure every hot-path index exists before serving requests
+    try:
+        await ensure_indexes(db)
+    except Exception as e:
+        logger.error(f"Index setup failed: {str(e)}")
+    
+    # Logo and other brand images are fetched to disk and decoded once, then served from memory
+    await asyncio.to_thread(brand_assets.fetch)
+    if not await asyncio.to_thread(brand_assets.load):
+        logger.error(
+            f"COMPANY LOGO MISSING at {brand_assets.logo_path}: letters, agreements and salary slips "
+            f"will render without the logo and watermark. Place the file there or set BRAND_LOGO_PATH/BRAND_LOGO_URL."
+        )
+    
+    # PDF rendering workers warm up in the background
+    pdf_render_pool.start()
+    
+    # Cached slips from an older slip template are never served; free their space
+    try:
+        await pdf_cache.purge_stale_templates(db)
+    except Exception as e:
+        logger.error(f"PDF cache cleanup failed: {str(e)}")
+    
+    # Salary slip jobs interrupted by a crash or restart carry on once their lease runs out
+    app.state.slip_job_resume = asyncio.create_task(run_salary_slip_job_resumer(db))
+    
+    # Dashboard counters: reconcile now, then reset and reconcile every midnight
+    app.state.counter_maintenance = asyncio.create_task(run_daily_counter_maintenance(db))
+    
+    # Document previews render in the background, in batches
+    thumbnail_worker.start(db)
 
 # Shutdown event  
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    counter_maintenance = getattr(app.state, "counter_maintenance", None)
+    if counter_maintenance is not None:
+        counter_maintenance.cancel()
+    slip_job_resume = getattr(app.state, "slip_job_resume", None)
+    if slip_job_resume is not None:
+        slip_job_resume.cancel()
+    thumbnail_worker.stop()
+    pdf_render_pool.shutdown()
     client.close()
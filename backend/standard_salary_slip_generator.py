@@ -1,58 +1,58 @@
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 from datetime import datetime, timezone
 import io
 import base64
-import requests
-from logo_watermark_generator import create_watermarked_document, download_and_process_logo
+from logo_watermark_generator import create_watermarked_document, get_document_styles
+from pdf_layers import StaticLayer
+from brand_assets import header_logo_flowable
 
-def generate_standard_salary_slip_content(salary_calculation):
-    """Generate standard format salary slip content"""
-    # Get professional styles
-    styles = getSampleStyleSheet()
-    
-    # Custom styles for standard salary slip
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        parent=styles['Heading1'],
-        fontSize=14,
-        fontName='Helvetica-Bold',
-        textColor=colors.darkblue,
-        alignment=TA_CENTER,
-        spaceAfter=15
-    )
-    
-    company_style = ParagraphStyle(
-        'CompanyStyle',
-        parent=styles['Normal'],
-        fontSize=16,
-        fontName='Helvetica-Bold',
-        textColor=colors.darkblue,
-        alignment=TA_CENTER,
-        spaceAfter=5
-    )
-    
-    address_style = ParagraphStyle(
-        'AddressStyle',
-        parent=styles['Normal'],
-        fontSize=10,
-        alignment=TA_CENTER,
-        spaceAfter=10
-    )
-    
-    # Build document content
+# Bump whenever the slip's layout or wording changes; cached slips rendered
+# with another version are discarded (see pdf_cache)
+SALARY_SLIP_TEMPLATE_VERSION = 1
+
+# Custom styles for standard salary slip, shared by every render
+header_style = ParagraphStyle(
+    'HeaderStyle',
+    parent=get_document_styles()['Heading1'],
+    fontSize=14,
+    fontName='Helvetica-Bold',
+    textColor=colors.darkblue,
+    alignment=TA_CENTER,
+    spaceAfter=15
+)
+
+company_style = ParagraphStyle(
+    'CompanyStyle',
+    parent=get_document_styles()['Normal'],
+    fontSize=16,
+    fontName='Helvetica-Bold',
+    textColor=colors.darkblue,
+    alignment=TA_CENTER,
+    spaceAfter=5
+)
+
+address_style = ParagraphStyle(
+    'AddressStyle',
+    parent=get_document_styles()['Normal'],
+    fontSize=10,
+    alignment=TA_CENTER,
+    spaceAfter=10
+)
+
+def build_standard_slip_header():
+    """Company header and title of the standard salary slip (a static layer)"""
     story = []
     
     # Company Header with Logo
-    logo_path = download_and_process_logo()
-    if logo_path:
+    logo_img = header_logo_flowable(1.2*inch)
+    if logo_img is not None:
         try:
             # Create header with logo and company info
-            logo_img = Image(logo_path, width=1.2*inch, height=1.2*inch)
             
             company_info = [
                 Paragraph('<b>VISHWAS WORLD TECH PRIVATE LIMITED</b>', company_style),
@@ -82,6 +82,33 @@ def generate_standard_salary_slip_content(salary_calculation):
     
     # Title
     story.append(Paragraph('<b>SALARY SLIP</b>', header_style))
+    return story
+
+def build_standard_slip_footer():
+    """Digital signature notice and footer of the standard salary slip (a static layer)"""
+    styles = get_document_styles()
+    return [
+        # Digital Signature Notice
+        Paragraph(
+            '<b>DIGITAL SIGNATURE APPLIED</b><br/>'
+            'This salary slip has been digitally signed and generated by Vishwas World Tech HRMS System.<br/>'
+            'No physical signature required. For verification, contact HR Department.',
+            ParagraphStyle('DigitalNotice', parent=styles['Normal'], fontSize=8, alignment=TA_CENTER, 
+                          textColor=colors.darkblue, fontName='Helvetica-Bold')
+        ),
+        # Footer
+        Spacer(1, 15),
+        Paragraph(
+            'This is a computer-generated document and does not require physical signature.<br/>'
+            'For any queries, please contact HR Department at hr@vishwasworldtech.com',
+            ParagraphStyle('Footer', parent=styles['Normal'], fontSize=7, alignment=TA_CENTER, textColor=colors.grey)
+        )
+    ]
+
+def generate_standard_salary_slip_content(salary_calculation):
+    """Generate standard format salary slip content"""
+    # Build document content; header and footer are static layers
+    story = [StaticLayer("standard_slip_header", build_standard_slip_header)]
     
     # Employee and Pay Period Information
     emp_info = salary_calculation['employee_info']
@@ -245,22 +272,7 @@ def generate_standard_salary_slip_content(salary_calculation):
     story.append(signature_table)
     story.append(Spacer(1, 20))
     
-    # Digital Signature Notice
-    story.append(Paragraph(
-        '<b>DIGITAL SIGNATURE APPLIED</b><br/>'
-        'This salary slip has been digitally signed and generated by Vishwas World Tech HRMS System.<br/>'
-        'No physical signature required. For verification, contact HR Department.',
-        ParagraphStyle('DigitalNotice', parent=styles['Normal'], fontSize=8, alignment=TA_CENTER, 
-                      textColor=colors.darkblue, fontName='Helvetica-Bold')
-    ))
-    
-    # Footer
-    story.append(Spacer(1, 15))
-    story.append(Paragraph(
-        'This is a computer-generated document and does not require physical signature.<br/>'
-        'For any queries, please contact HR Department at hr@vishwasworldtech.com',
-        ParagraphStyle('Footer', parent=styles['Normal'], fontSize=7, alignment=TA_CENTER, textColor=colors.grey)
-    ))
+    story.append(StaticLayer("standard_slip_footer", build_standard_slip_footer))
     
     return story
 
@@ -0,0 +1,324 @@
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict, Iterator, NamedTuple, Optional
+from urllib.parse import quote
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# "local" keeps objects on this node's disk; "s3" uses any S3-compatible store (AWS, MinIO);
+# "gridfs" keeps them in the application's MongoDB
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "local")
+
+# Namespaces objects are kept under: S3 key prefix, GridFS bucket name
+DOCUMENTS_NAMESPACE = "documents"
+SALARY_SLIPS_NAMESPACE = "salary_slips"
+STORAGE_NAMESPACES = (DOCUMENTS_NAMESPACE, SALARY_SLIPS_NAMESPACE)
+
+# Derived previews, named by source content hash (no per-employee metadata)
+THUMBNAILS_NAMESPACE = "thumbnails"
+
+# S3-compatible settings; credentials come from the usual AWS_* variables or instance role
+S3_BUCKET = os.environ.get("S3_BUCKET", "")
+S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL") or None
+S3_REGION = os.environ.get("S3_REGION") or None
+S3_PREFIX = os.environ.get("S3_PREFIX", "")
+
+# Objects above this size are uploaded in parts of this size
+S3_MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Lifetime of presigned download links
+PRESIGNED_URL_EXPIRY_SECONDS = int(os.environ.get("PRESIGNED_URL_EXPIRY_SECONDS", 300))
+
+# Bytes read per step when streaming an object, and copied per step into local files
+STORAGE_READ_CHUNK_SIZE = 64 * 1024
+LOCAL_COPY_CHUNK_SIZE = 1024 * 1024
+
+class StoredObject(NamedTuple):
+    size: int
+    etag: str
+
+class StorageBackend(ABC):
+    """
+    Where document bytes live, addressed by relative keys like "ab/cd/abcd..."
+
+    Methods block (file or network I/O); async callers run them on a thread.
+    """
+
+    @abstractmethod
+    def location(self, key: str) -> str:
+        """Human-readable location of an object, recorded on document records"""
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[StoredObject]:
+        """Size and ETag of an object, or None when it does not exist"""
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    @abstractmethod
+    def put(self, key: str, source: BinaryIO, metadata: Optional[Dict] = None):
+        """
+        Store a seekable stream's content under key, replacing it atomically
+
+        metadata (e.g. employee_id, document_type) is kept with the object
+        where the backend supports it.
+        """
+
+    @abstractmethod
+    def iter_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        """Yield bytes start..end (inclusive) of an object in chunks"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove an object; a missing object is not an error"""
+
+    def read(self, key: str) -> bytes:
+        stored = self.stat(key)
+        if stored is None:
+            raise FileNotFoundError(self.location(key))
+        return b"".join(self.iter_range(key, 0, stored.size - 1)) if stored.size else b""
+
+    def presigned_url(self, key: str, filename: str, media_type: str,
+                      expires_in: int = PRESIGNED_URL_EXPIRY_SECONDS) -> Optional[str]:
+        """Short-lived URL the client downloads from directly; None when the API must serve the bytes"""
+        return None
+
+class LocalStorageBackend(StorageBackend):
+    """Objects as files under a root directory on this node"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def location(self, key: str) -> str:
+        return self.path(key)
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            stat = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        etag = hashlib.md5(f"{stat.st_mtime_ns}-{stat.st_size}".encode()).hexdigest()
+        return StoredObject(stat.st_size, f'"{etag}"')
+
+    def put(self, key: str, source: BinaryIO, metadata: Optional[Dict] = None):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per call, so concurrent puts of one key never share a partial file
+        partial_path = f"{path}.{uuid.uuid4().hex}.partial"
+        source.seek(0)
+        try:
+            with open(partial_path, "wb") as buffer:
+                shutil.copyfileobj(source, buffer, LOCAL_COPY_CHUNK_SIZE)
+            os.replace(partial_path, path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+
+    def iter_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        remaining = end - start + 1
+        with open(self.path(key), "rb") as f:
+            f.seek(start)
+            while remaining > 0:
+                data = f.read(min(STORAGE_READ_CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+class S3StorageBackend(StorageBackend):
+    """
+    Objects in an S3-compatible bucket (AWS S3, MinIO)
+
+    Uploads above S3_MULTIPART_CHUNK_SIZE go up as multipart uploads, reads
+    are ranged GETs, and downloads are handed out as presigned URLs so file
+    bytes never pass through the API process.
+    """
+
+    def __init__(self, namespace: str = DOCUMENTS_NAMESPACE, bucket: str = S3_BUCKET, prefix: str = S3_PREFIX,
+                 endpoint_url: Optional[str] = S3_ENDPOINT_URL, region: Optional[str] = S3_REGION,
+                 client=None):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+
+        if not bucket:
+            raise ValueError("S3_BUCKET must be set for the s3 storage backend")
+        self.bucket = bucket
+        self.prefix = f"{prefix}{namespace}/"
+        self.client = client or boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=S3_MULTIPART_CHUNK_SIZE
+        )
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def location(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self.object_key(key)}"
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return StoredObject(head["ContentLength"], head["ETag"])
+
+    def put(self, key: str, source: BinaryIO, metadata: Optional[Dict] = None):
+        source.seek(0)
+        extra_args = {"Metadata": {name: str(value) for name, value in metadata.items()}} if metadata else None
+        self.client.upload_fileobj(
+            source, self.bucket, self.object_key(key), ExtraArgs=extra_args, Config=self.transfer_config
+        )
+
+    def iter_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        response = self.client.get_object(
+            Bucket=self.bucket, Key=self.object_key(key), Range=f"bytes={start}-{end}"
+        )
+        yield from response["Body"].iter_chunks(STORAGE_READ_CHUNK_SIZE)
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    def presigned_url(self, key: str, filename: str, media_type: str,
+                      expires_in: int = PRESIGNED_URL_EXPIRY_SECONDS) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self.object_key(key),
+                "ResponseContentType": media_type,
+                "ResponseContentDisposition": f"attachment; filename*=UTF-8''{quote(filename)}"
+            },
+            ExpiresIn=expires_in
+        )
+
+_gridfs_database = None
+_gridfs_database_lock = threading.Lock()
+
+def _get_gridfs_database():
+    """Synchronous handle on the application database, connected on first use"""
+    global _gridfs_database
+    with _gridfs_database_lock:
+        if _gridfs_database is None:
+            from pymongo import MongoClient
+
+            _gridfs_database = MongoClient(os.environ['MONGO_URL'], tz_aware=True)[os.environ['DB_NAME']]
+        return _gridfs_database
+
+class GridFSStorageBackend(StorageBackend):
+    """
+    Objects as files in a MongoDB GridFS bucket, one bucket per namespace
+
+    Writes stream the source into GridFS chunks and reads seek straight to
+    the requested range, so no file is held in memory whole. Uses PyMongo's
+    GridFSBucket (the API Motor's bucket wraps), as backend methods run on
+    worker threads. A key is the GridFS filename; put adds a revision and
+    then drops older ones, and readers always take the newest.
+    """
+
+    def __init__(self, namespace: str = DOCUMENTS_NAMESPACE, database=None):
+        self.namespace = namespace
+        self._database = database
+        self._bucket = None
+
+    @property
+    def database(self):
+        if self._database is None:
+            self._database = _get_gridfs_database()
+        return self._database
+
+    @property
+    def bucket(self):
+        if self._bucket is None:
+            import gridfs
+
+            self._bucket = gridfs.GridFSBucket(self.database, bucket_name=self.namespace)
+        return self._bucket
+
+    @property
+    def files(self):
+        return self.database[f"{self.namespace}.files"]
+
+    def location(self, key: str) -> str:
+        return f"gridfs://{self.namespace}/{key}"
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        newest = self.files.find_one({"filename": key}, {"length": 1}, sort=[("uploadDate", -1)])
+        if newest is None:
+            return None
+        return StoredObject(newest["length"], f'"{newest["_id"]}"')
+
+    def put(self, key: str, source: BinaryIO, metadata: Optional[Dict] = None):
+        source.seek(0)
+        file_id = self.bucket.upload_from_stream(key, source, metadata=metadata)
+        # Only revisions older than ours, so concurrent writers never remove each other's
+        uploaded_at = self.files.find_one({"_id": file_id}, {"uploadDate": 1})["uploadDate"]
+        for revision in self.files.find({"filename": key, "uploadDate": {"$lt": uploaded_at}}, {"_id": 1}):
+            self._delete_revision(revision["_id"])
+
+    def iter_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        import gridfs
+
+        try:
+            grid_out = self.bucket.open_download_stream_by_name(key)
+        except gridfs.errors.NoFile:
+            raise FileNotFoundError(self.location(key))
+        try:
+            grid_out.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = grid_out.read(min(STORAGE_READ_CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+        finally:
+            grid_out.close()
+
+    def delete(self, key: str):
+        for revision in self.files.find({"filename": key}, {"_id": 1}):
+            self._delete_revision(revision["_id"])
+
+    def _delete_revision(self, file_id):
+        import gridfs
+
+        try:
+            self.bucket.delete(file_id)
+        except gridfs.errors.NoFile:
+            pass
+
+def create_storage_backend(local_root: str, namespace: str = DOCUMENTS_NAMESPACE,
+                           backend: str = STORAGE_BACKEND) -> StorageBackend:
+    """
+    Backend selected by STORAGE_BACKEND for one namespace
+
+    local_root is where the local backend keeps that namespace's files.
+    """
+    if backend == "s3":
+        logger.info(f"{namespace} storage: S3 bucket {S3_BUCKET} at {S3_ENDPOINT_URL or 'AWS'}")
+        return S3StorageBackend(namespace)
+    if backend == "gridfs":
+        logger.info(f"{namespace} storage: GridFS bucket {namespace}")
+        return GridFSStorageBackend(namespace)
+    if backend != "local":
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return LocalStorageBackend(local_root)
@@ -0,0 +1,142 @@
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import logging
+import os
+import re
+from pathlib import Path
+
+from document_blobs import (
+    BLOB_ROOT, document_storage, blob_key, legacy_document_cursor, migrate_legacy_document
+)
+from salary_slip_jobs import SALARY_SLIP_ROOT, slip_storage, salary_slip_document_key
+from storage_backends import LocalStorageBackend, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+# Files moved concurrently; each batch finishes before the next starts
+STORAGE_MIGRATION_BATCH_SIZE = 16
+
+async def gather_in_batches(items: AsyncIterator, worker: Callable[[Dict], Awaitable[str]],
+                            batch_size: int = STORAGE_MIGRATION_BATCH_SIZE) -> List[str]:
+    """Run worker over items, batch_size at a time; returns the outcomes in order"""
+    outcomes = []
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            outcomes.extend(await asyncio.gather(*[worker(entry) for entry in batch]))
+            batch = []
+    if batch:
+        outcomes.extend(await asyncio.gather(*[worker(entry) for entry in batch]))
+    return outcomes
+
+def _copy_local_object(source: LocalStorageBackend, target: StorageBackend, key: str,
+                       metadata: Optional[Dict]) -> bool:
+    """Stream one local file into target; False when the file is gone"""
+    try:
+        with open(source.path(key), "rb") as f:
+            target.put(key, f, metadata)
+    except FileNotFoundError:
+        return False
+    return True
+
+async def _move_blob(db, source: LocalStorageBackend, blob: Dict) -> str:
+    key = blob_key(blob["sha256"])
+    outcome = "already_stored"
+    if not await asyncio.to_thread(document_storage.exists, key):
+        owner = await db.employee_documents.find_one(
+            {"content_sha256": blob["sha256"]}, {"_id": 0, "employee_id": 1, "document_type": 1}
+        )
+        if not await asyncio.to_thread(_copy_local_object, source, document_storage, key, owner):
+            return "missing"
+        outcome = "moved"
+
+    await db.employee_documents.update_many(
+        {"content_sha256": blob["sha256"], "file_path": source.location(key)},
+        {"$set": {"file_path": document_storage.location(key)}}
+    )
+    await asyncio.to_thread(source.delete, key)
+    return outcome
+
+async def _move_salary_slip(db, source: LocalStorageBackend, document: Dict) -> str:
+    key = salary_slip_document_key(document)
+    metadata = {field: document.get(field) for field in ["employee_id", "document_type", "department", "slip_job_id"]}
+    if not await asyncio.to_thread(_copy_local_object, source, slip_storage, key, metadata):
+        return "missing"
+
+    await db.employee_documents.update_one(
+        {"id": document["id"], "file_path": document["file_path"]},
+        {"$set": {"file_path": slip_storage.location(key)}}
+    )
+    await asyncio.to_thread(source.delete, key)
+    return "moved"
+
+async def migrate_files_to_storage(db, batch_size: int = STORAGE_MIGRATION_BATCH_SIZE) -> Dict:
+    """
+    Move files under /app/uploaded_documents into the configured storage backend
+
+    Runs in three passes, each in parallel batches: per-employee uploads
+    into the blob store, local blobs into document storage, and generated
+    salary slips into slip storage. The last two only run when the backend
+    is not local disk. A file is removed locally only after its record
+    points at the copy. Safe to run repeatedly.
+    """
+    legacy = await gather_in_batches(
+        legacy_document_cursor(db), lambda document: migrate_legacy_document(db, document), batch_size
+    )
+
+    blobs = []
+    if not isinstance(document_storage, LocalStorageBackend):
+        local_blobs = LocalStorageBackend(BLOB_ROOT)
+        blobs = await gather_in_batches(
+            db.document_blobs.find({}, {"_id": 0, "sha256": 1}),
+            lambda blob: _move_blob(db, local_blobs, blob), batch_size
+        )
+
+    slips = []
+    if not isinstance(slip_storage, LocalStorageBackend):
+        local_slips = LocalStorageBackend(SALARY_SLIP_ROOT)
+        slips = await gather_in_batches(
+            db.employee_documents.find(
+                {"slip_job_id": {"$exists": True},
+                 "file_path": {"$regex": "^" + re.escape(local_slips.location(""))}},
+                {"_id": 0, "id": 1, "file_path": 1, "employee_id": 1, "document_type": 1,
+                 "department": 1, "slip_job_id": 1}
+            ),
+            lambda document: _move_salary_slip(db, local_slips, document), batch_size
+        )
+
+    result = {
+        "migrated_documents": legacy.count("migrated") + legacy.count("deduplicated"),
+        "deduplicated_documents": legacy.count("deduplicated"),
+        "moved_blobs": blobs.count("moved"),
+        "moved_salary_slips": slips.count("moved"),
+        "missing_files": legacy.count("missing") + blobs.count("missing") + slips.count("missing")
+    }
+    logger.info(f"Storage migration finished: {result}")
+    return result
+
+async def _run_storage_migration_command(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        result = await migrate_files_to_storage(db, args.batch_size)
+        print(f"Moved {result['migrated_documents']} uploads into the blob store "
+              f"({result['deduplicated_documents']} duplicates), {result['moved_blobs']} blobs and "
+              f"{result['moved_salary_slips']} salary slips into storage; {result['missing_files']} files missing")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Move document and salary slip files into the configured storage backend (STORAGE_BACKEND)"
+    )
+    parser.add_argument("--batch-size", type=int, default=STORAGE_MIGRATION_BATCH_SIZE,
+                        help="Files moved concurrently")
+    asyncio.run(_run_storage_migration_command(parser.parse_args()))
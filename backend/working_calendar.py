@@ -0,0 +1,176 @@
+from array import array
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Iterable, List
+import calendar
+import time
+
+from hrms_modules import get_indian_national_holidays
+from mongo_codec import date_range_query
+
+# Office location used for salary and attendance calculations
+DEFAULT_LOCATION = "Bangalore"
+
+# Regional entries from get_indian_national_holidays are Bangalore specific
+REGIONAL_HOLIDAY_LOCATIONS = ["Bangalore"]
+
+# Number of (year, location) calendars kept in memory
+WORKING_CALENDAR_CACHE_SIZE = 32
+
+# Holiday changes are invalidated only in the worker that made them; other
+# workers reload their calendars after this long
+WORKING_CALENDAR_CACHE_TTL_SECONDS = 60
+
+class WorkingCalendar:
+    """
+    Precomputed working-day bitmap for one year and office location
+    Sundays, national/regional holidays and mandatory company holidays are
+    non-working days. A prefix sum over the bitmap answers counts in O(1).
+    """
+
+    def __init__(self, year: int, location: str = DEFAULT_LOCATION, holidays: Iterable[date] = ()):
+        self.year = year
+        self.location = location
+        self.holidays = sorted({h for h in holidays if h.year == year})
+
+        self._first_ordinal = date(year, 1, 1).toordinal()
+        total_days = 366 if calendar.isleap(year) else 365
+        holiday_ordinals = {h.toordinal() for h in self.holidays}
+
+        # 1 = working day, 0 = Sunday or holiday
+        self.bitmap = bytearray(total_days)
+        first_weekday = date(year, 1, 1).weekday()
+        for day in range(total_days):
+            is_sunday = (first_weekday + day) % 7 == 6
+            if not is_sunday and (self._first_ordinal + day) not in holiday_ordinals:
+                self.bitmap[day] = 1
+
+        # prefix[i] = working days before day index i
+        self._prefix = array('H', [0]) * (total_days + 1)
+        running = 0
+        for day in range(total_days):
+            running += self.bitmap[day]
+            self._prefix[day + 1] = running
+
+        # Day index of the first day of each month (13th entry = end of year)
+        self._month_starts = [date(year, m, 1).toordinal() - self._first_ordinal for m in range(1, 13)]
+        self._month_starts.append(total_days)
+
+    def _day_index(self, day: date) -> int:
+        index = day.toordinal() - self._first_ordinal
+        if index < 0 or index >= len(self.bitmap):
+            raise ValueError(f"{day.isoformat()} is outside calendar year {self.year}")
+        return index
+
+    def is_working_day(self, day: date) -> bool:
+        """Check whether a date is a working day"""
+        return self.bitmap[self._day_index(day)] == 1
+
+    def working_days_between(self, start: date, end: date) -> int:
+        """Count working days from start to end (both inclusive)"""
+        if end < start:
+            return 0
+        start_index = max(start.toordinal() - self._first_ordinal, 0)
+        end_index = min(end.toordinal() - self._first_ordinal, len(self.bitmap) - 1)
+        if end_index < start_index:
+            return 0
+        return self._prefix[end_index + 1] - self._prefix[start_index]
+
+    def working_days_in_month(self, month: int) -> int:
+        """Count working days in a month of this calendar year"""
+        if month < 1 or month > 12:
+            raise ValueError("Month must be between 1 and 12")
+        return self._prefix[self._month_starts[month]] - self._prefix[self._month_starts[month - 1]]
+
+    def holidays_in_month(self, month: int) -> List[date]:
+        """Holidays falling in a month (including any that fall on Sundays)"""
+        return [h for h in self.holidays if h.month == month]
+
+def get_month_date_range(year: int, month: int) -> tuple:
+    """Return the [start, end) attendance date strings covering a month"""
+    start = f"{year}-{month:02d}-01"
+    end = f"{year + 1}-01-01" if month == 12 else f"{year}-{month + 1:02d}-01"
+    return start, end
+
+def _parse_holiday_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(str(value)[:10]).date()
+
+def get_statutory_holidays(year: int, location: str = DEFAULT_LOCATION) -> List[date]:
+    """National holidays plus regional holidays for the given location"""
+    holidays = []
+    for holiday in get_indian_national_holidays(year):
+        if holiday["type"] == "Regional" and location not in REGIONAL_HOLIDAY_LOCATIONS:
+            continue
+        holidays.append(_parse_holiday_date(holiday["date"]))
+    return holidays
+
+async def load_working_calendar(db, year: int, location: str = DEFAULT_LOCATION) -> WorkingCalendar:
+    """Build a WorkingCalendar from statutory holidays and db.holidays"""
+    holidays = get_statutory_holidays(year, location)
+
+    company_holidays = await db.holidays.find(
+        {
+            **date_range_query("holiday_date", date(year, 1, 1), date(year + 1, 1, 1)),
+            "is_mandatory": True,
+            "applicable_locations": {"$in": ["All", location]}
+        },
+        {"_id": 0, "holiday_date": 1}
+    ).to_list(None)
+
+    for holiday in company_holidays:
+        try:
+            holidays.append(_parse_holiday_date(holiday["holiday_date"]))
+        except (KeyError, ValueError):
+            continue
+
+    return WorkingCalendar(year, location, holidays)
+
+class WorkingCalendarCache:
+    """TTL + LRU cache of WorkingCalendar objects keyed by (year, location)"""
+
+    def __init__(self, maxsize: int = WORKING_CALENDAR_CACHE_SIZE, ttl: float = WORKING_CALENDAR_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._calendars: "OrderedDict[tuple, tuple]" = OrderedDict()
+        # Bumped on every invalidation so a load racing with a holiday write is not cached
+        self._generation = 0
+
+    async def get(self, db, year: int, location: str = DEFAULT_LOCATION) -> WorkingCalendar:
+        key = (year, location)
+        cached = self._calendars.get(key)
+        if cached is not None and cached[1] > time.monotonic():
+            self._calendars.move_to_end(key)
+            return cached[0]
+
+        generation = self._generation
+        working_calendar = await load_working_calendar(db, year, location)
+        if generation == self._generation:
+            self._calendars[key] = (working_calendar, time.monotonic() + self.ttl)
+            self._calendars.move_to_end(key)
+            while len(self._calendars) > self.maxsize:
+                self._calendars.popitem(last=False)
+        return working_calendar
+
+    def invalidate(self, year: int = None):
+        """Drop cached calendars for a year (or all years) after holiday changes"""
+        self._generation += 1
+        if year is None:
+            self._calendars.clear()
+            return
+        for key in [key for key in self._calendars if key[0] == year]:
+            del self._calendars[key]
+
+working_calendar_cache = WorkingCalendarCache()
+
+async def get_working_calendar(db, year: int, location: str = DEFAULT_LOCATION) -> WorkingCalendar:
+    """Get the cached WorkingCalendar for a year and location"""
+    return await working_calendar_cache.get(db, year, location)
+
+async def get_working_days_in_month(db, year: int, month: int, location: str = DEFAULT_LOCATION) -> int:
+    """Holiday-aware working days in a month, served from the calendar cache"""
+    working_calendar = await get_working_calendar(db, year, location)
+    return working_calendar.working_days_in_month(month)
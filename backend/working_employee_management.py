@@ -1,8 +1,10 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
-from datetime import datetime, timezone, date, time
+from datetime import datetime, timezone, timedelta, date, time
 import uuid
 
+from working_calendar import get_month_date_range
+
 # Working Employee Attendance Models
 class EmployeeAttendanceDetail(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -253,6 +255,33 @@ def calculate_late_penalty(late_minutes: int, monthly_late_count: int = 0) -> Di
     
     return penalty_info
 
+# Office schedule (Indian Standard Time)
+OFFICE_TIMEZONE = timezone(timedelta(hours=5, minutes=30))
+SCHEDULED_LOGIN_TIME = time(9, 45)  # 9:45 AM
+STANDARD_WORKING_HOURS = 9.0  # 9:45 AM - 6:45 PM including lunch
+
+def calculate_login_lateness(login_time: datetime) -> Dict:
+    """Calculate late minutes and penalty for a check-in timestamp"""
+    if login_time.tzinfo is None:
+        login_time = login_time.replace(tzinfo=timezone.utc)
+    
+    local_login = login_time.astimezone(OFFICE_TIMEZONE)
+    scheduled_login = datetime.combine(local_login.date(), SCHEDULED_LOGIN_TIME, tzinfo=OFFICE_TIMEZONE)
+    late_minutes = max(0, int((local_login - scheduled_login).total_seconds() // 60))
+    
+    penalty_info = calculate_late_penalty(late_minutes)
+    
+    return {
+        "late_minutes": late_minutes,
+        "late_penalty_amount": penalty_info["penalty_amount"],
+        "is_late": late_minutes > LATE_LOGIN_PENALTY_STRUCTURE["grace_period_minutes"],
+        "category": penalty_info["category"]
+    }
+
+def calculate_overtime_hours(total_hours: float) -> float:
+    """Hours worked beyond the standard office day"""
+    return round(max(0.0, total_hours - STANDARD_WORKING_HOURS), 2)
+
 def calculate_working_hours(login_time: time, logout_time: time) -> Dict:
     """Calculate working hours and overtime"""
     if not login_time or not logout_time:
@@ -321,42 +350,151 @@ def get_document_completion_percentage(employee_id: str, uploaded_docs: List[str
     percentage = (uploaded_required / total_required) * 100
     return round(percentage, 2)
 
-def generate_employee_attendance_report(employee_id: str, month: int, year: int, 
-                                      attendance_records: List[dict]) -> Dict:
-    """Generate comprehensive attendance report for an employee"""
+def build_monthly_attendance_pipeline(employee_id: str, year: int, month: int,
+                                      total_working_days: int = 0,
+                                      include_records: bool = False) -> List[dict]:
+    """
+    Aggregation pipeline for one employee's monthly attendance statistics
+
+    Only the requested month is matched, on the (employee_id, date) index, so
+    the cost does not grow with the employee's tenure. Counts, late minutes,
+    penalties, attendance percentage and punctuality are computed in MongoDB.
+    """
+    start, end = get_month_date_range(year, month)
+    late_minutes = {"$ifNull": ["$late_minutes", 0]}
+    hours = {"$ifNull": ["$total_hours", 0]}
     
-    # Filter records for the specified month/year
-    month_records = []
-    for record in attendance_records:
-        record_date = record.get('date')
-        if isinstance(record_date, str):
-            record_date = datetime.fromisoformat(record_date).date()
-        
-        if record_date.month == month and record_date.year == year:
-            month_records.append(record)
+    facets = {
+        "summary": [
+            {"$group": {
+                "_id": None,
+                "present_days": {"$sum": 1},
+                "late_days": {"$sum": {"$cond": [
+                    {"$or": [
+                        {"$gt": [late_minutes, LATE_LOGIN_PENALTY_STRUCTURE["grace_period_minutes"]]},
+                        {"$eq": ["$status", "Late"]}
+                    ]}, 1, 0
+                ]}},
+                "total_late_minutes": {"$sum": late_minutes},
+                "total_penalty_amount": {"$sum": {"$ifNull": ["$late_penalty_amount", 0]}},
+                "total_hours": {"$sum": hours},
+                "overtime_hours": {"$sum": {"$max": [0, {"$subtract": [hours, STANDARD_WORKING_HOURS]}]}}
+            }}
+        ]
+    }
+    if include_records:
+        facets["detailed_records"] = [
+            {"$sort": {"date": 1}},
+            {"$project": {"_id": 0}}
+        ]
     
-    # Calculate statistics
-    total_working_days = len(month_records) if month_records else 22  # Default
-    present_days = len([r for r in month_records if r.get('status') in ['Present', 'Late']])
-    absent_days = total_working_days - present_days
-    late_days = len([r for r in month_records if r.get('status') == 'Late'])
+    def summary_field(field):
+        return {"$ifNull": [{"$arrayElemAt": [f"$summary.{field}", 0]}, 0]}
     
-    total_late_minutes = sum([r.get('late_minutes', 0) for r in month_records])
-    total_penalty = sum([r.get('late_penalty_amount', 0) for r in month_records])
+    def percentage_of_working_days(days):
+        return {"$round": [{"$multiply": [{"$divide": [days, total_working_days]}, 100]}, 2]}
     
-    attendance_percentage = (present_days / total_working_days * 100) if total_working_days > 0 else 0
-    punctuality_score = calculate_punctuality_score(late_days, total_working_days)
+    present_days = summary_field("present_days")
+    late_days = summary_field("late_days")
     
-    return {
-        "month": month,
-        "year": year,
-        "total_working_days": total_working_days,
+    projection = {
+        "_id": 0,
         "present_days": present_days,
-        "absent_days": absent_days,
+        "absent_days": {"$max": [0, {"$subtract": [total_working_days, present_days]}]},
         "late_days": late_days,
-        "total_late_minutes": total_late_minutes,
-        "total_penalty_amount": total_penalty,
-        "attendance_percentage": round(attendance_percentage, 2),
-        "punctuality_score": punctuality_score,
-        "detailed_records": month_records
-    }
\ No newline at end of file
+        "total_late_minutes": summary_field("total_late_minutes"),
+        "total_penalty_amount": summary_field("total_penalty_amount"),
+        "total_hours": {"$round": [summary_field("total_hours"), 2]},
+        "overtime_hours": {"$round": [summary_field("overtime_hours"), 2]},
+        "attendance_percentage": (
+            percentage_of_working_days(present_days) if total_working_days > 0 else {"$literal": 0.0}
+        ),
+        "punctuality_score": (
+            percentage_of_working_days({"$subtract": [total_working_days, late_days]})
+            if total_working_days > 0 else {"$literal": 100.0}
+        )
+    }
+    if include_records:
+        projection["detailed_records"] = 1
+    
+    return [
+        {"$match": {"employee_id": employee_id, "date": {"$gte": start, "$lt": end}}},
+        {"$facet": facets},
+        {"$project": projection}
+    ]
+
+# Required document types across all categories, as counted by get_document_completion_percentage
+REQUIRED_EMPLOYEE_DOCUMENT_TYPES = [
+    doc_type
+    for details in WORKING_EMPLOYEE_DOCUMENT_CATEGORIES.values()
+    for doc_type in details["required"]
+]
+
+def build_working_employees_pipeline(department: Optional[str] = None, after: Optional[str] = None,
+                                     limit: int = 100) -> List[dict]:
+    """
+    Aggregation pipeline for one page of the working employee database
+
+    Pages are keyed on employee_id (pass the last employee_id seen as `after`).
+    Latest attendance, per-type document counts and document completion are
+    joined and computed in MongoDB, so a page costs one round trip.
+    """
+    match = {"status": "Active"}
+    if department:
+        match["department"] = department
+    if after:
+        match["employee_id"] = {"$gt": after}
+    
+    same_employee = {"$expr": {"$eq": ["$employee_id", "$$employee_id"]}}
+    uploaded_types = "$document_types._id"
+    required_uploaded = {"$size": {"$filter": {
+        "input": {"$literal": REQUIRED_EMPLOYEE_DOCUMENT_TYPES},
+        "cond": {"$in": ["$$this", uploaded_types]}
+    }}}
+    
+    if REQUIRED_EMPLOYEE_DOCUMENT_TYPES:
+        document_completion = {"$round": [{"$multiply": [
+            {"$divide": [required_uploaded, len(REQUIRED_EMPLOYEE_DOCUMENT_TYPES)]}, 100
+        ]}, 2]}
+    else:
+        document_completion = {"$literal": 100.0}
+    
+    return [
+        {"$match": match},
+        {"$sort": {"employee_id": 1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "password_hash": 0}},
+        {"$lookup": {
+            "from": "attendance",
+            "let": {"employee_id": "$employee_id"},
+            "pipeline": [
+                {"$match": same_employee},
+                {"$sort": {"date": -1}},
+                {"$limit": 1},
+                {"$project": {"_id": 0}}
+            ],
+            "as": "latest_attendance"
+        }},
+        {"$lookup": {
+            "from": "employee_documents",
+            "let": {"employee_id": "$employee_id"},
+            "pipeline": [
+                {"$match": same_employee},
+                {"$group": {"_id": "$document_type", "count": {"$sum": 1}}}
+            ],
+            "as": "document_types"
+        }},
+        {"$addFields": {
+            "latest_attendance": {"$ifNull": [{"$arrayElemAt": ["$latest_attendance", 0]}, None]},
+            "document_completion": document_completion,
+            "total_documents": {"$sum": "$document_types.count"},
+            "document_counts": {"$arrayToObject": {"$map": {
+                "input": "$document_types",
+                "in": {"k": {"$ifNull": ["$$this._id", ""]}, "v": "$$this.count"}
+            }}}
+        }},
+        {"$addFields": {
+            "last_login": {"$ifNull": ["$latest_attendance.login_time", None]}
+        }},
+        {"$project": {"document_types": 0}}
+    ]
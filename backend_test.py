@@ -363,7 +363,7 @@ class HRMSAPITester:
         
         # Test 1: Generate enhanced offer letter with logo & watermark
         try:
-            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-offer-letter", 
+            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-offer-letter?format=json", 
                                    headers=headers)
             
             if response.status_code == 200:
@@ -411,7 +411,7 @@ class HRMSAPITester:
             
         # Test 2: Generate enhanced appointment letter with logo & watermark
         try:
-            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-appointment-letter", 
+            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-appointment-letter?format=json", 
                                    headers=headers)
             
             if response.status_code == 200:
@@ -459,7 +459,7 @@ class HRMSAPITester:
             
         # Test 3: Generate enhanced employee agreement with logo & watermark
         try:
-            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-employee-agreement", 
+            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-employee-agreement?format=json", 
                                    headers=headers)
             
             if response.status_code == 200:
@@ -515,7 +515,7 @@ class HRMSAPITester:
                 "month": current_month
             }
             
-            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-salary-slip", 
+            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-salary-slip?format=json", 
                                    json=salary_request, headers=headers)
             
             if response.status_code == 200:
@@ -601,7 +601,7 @@ class HRMSAPITester:
         # Test 6: Test with invalid employee ID for enhanced documents
         try:
             invalid_employee_id = "INVALID123"
-            response = requests.post(f"{self.base_url}/employees/{invalid_employee_id}/generate-offer-letter", 
+            response = requests.post(f"{self.base_url}/employees/{invalid_employee_id}/generate-offer-letter?format=json", 
                                    headers=headers)
             
             if response.status_code == 404:
@@ -616,7 +616,7 @@ class HRMSAPITester:
             
         # Test 7: Test authentication requirement for enhanced document endpoints
         try:
-            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-offer-letter")  # No auth header
+            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-offer-letter?format=json")  # No auth header
             
             if response.status_code == 401 or response.status_code == 403:
                 self.log_result("documents", "Enhanced Document Auth Required", True, 
@@ -658,7 +658,7 @@ class HRMSAPITester:
             
             # Test salary slip separately
             salary_request = {"employee_id": test_employee_id, "year": current_year, "month": current_month}
-            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-salary-slip", 
+            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-salary-slip?format=json", 
                                    json=salary_request, headers=headers)
             
             if response.status_code == 200:
@@ -889,7 +889,7 @@ class HRMSAPITester:
                 "month": current_month
             }
             
-            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-salary-slip", 
+            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-salary-slip?format=json", 
                                    json=salary_request, headers=headers)
             
             if response.status_code == 200:
@@ -1003,7 +1003,7 @@ class HRMSAPITester:
         
         # Test 1: Generate employee agreement for admin user
         try:
-            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-employee-agreement", 
+            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-employee-agreement?format=json", 
                                    headers=headers)
             
             if response.status_code == 200:
@@ -1164,7 +1164,7 @@ class HRMSAPITester:
         # Test 7: Test with invalid employee ID for agreement generation
         try:
             invalid_employee_id = "INVALID123"
-            response = requests.post(f"{self.base_url}/employees/{invalid_employee_id}/generate-employee-agreement", 
+            response = requests.post(f"{self.base_url}/employees/{invalid_employee_id}/generate-employee-agreement?format=json", 
                                    headers=headers)
             
             if response.status_code == 404:
@@ -1179,7 +1179,7 @@ class HRMSAPITester:
             
         # Test 8: Test authentication requirement for agreement endpoint
         try:
-            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-employee-agreement")  # No auth header
+            response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-employee-agreement?format=json")  # No auth header
             
             if response.status_code == 401 or response.status_code == 403:
                 self.log_result("employee_agreement", "Agreement Auth Required", True, 
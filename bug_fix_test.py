@@ -261,7 +261,7 @@ class HRMSBugFixTester:
         try:
             response = requests.post(
                 f"{self.base_url}/employees/{test_employee_id}/generate-digital-salary-slip",
-                params={"month": current_month, "year": current_year},
+                params={"format": "json", "month": current_month, "year": current_year},
                 headers=headers
             )
             
@@ -308,7 +308,7 @@ class HRMSBugFixTester:
         try:
             response = requests.post(
                 f"{self.base_url}/employees/INVALID123/generate-digital-salary-slip",
-                params={"month": current_month, "year": current_year},
+                params={"format": "json", "month": current_month, "year": current_year},
                 headers=headers
             )
             
@@ -326,7 +326,7 @@ class HRMSBugFixTester:
         try:
             response = requests.post(
                 f"{self.base_url}/employees/{test_employee_id}/generate-digital-salary-slip",
-                params={"month": current_month, "year": current_year}
+                params={"format": "json", "month": current_month, "year": current_year}
             )  # No auth header
             
             if response.status_code == 401 or response.status_code == 403:
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Bulk Attendance Ingestion API Testing
+Tests NDJSON and CSV punch imports, pairing and per-row rejections
+"""
+
+import json
+import requests
+
+# Configuration
+BASE_URL = "https://vishwashrms.preview.emergentagent.com/api"
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin123"
+
+def get_auth_headers():
+    """Authenticate and return authorization headers"""
+    login_data = {"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}
+    response = requests.post(f"{BASE_URL}/auth/login", json=login_data)
+    if response.status_code != 200:
+        print(f"❌ Authentication failed: {response.status_code} - {response.text}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def get_any_employee_id(headers):
+    response = requests.get(f"{BASE_URL}/employees", headers=headers)
+    assert response.status_code == 200, f"Failed to list employees: {response.text}"
+    employees = response.json()
+    assert employees, "No employees available for testing"
+    return employees[0]["employee_id"]
+
+def test_ndjson_import():
+    """Import paired punches as NDJSON and check the rejections"""
+    print("🕘 Testing NDJSON punch import")
+    print("=" * 60)
+
+    headers = get_auth_headers()
+    assert headers, "Authentication failed"
+    employee_id = get_any_employee_id(headers)
+
+    punches = [
+        {"employee_id": employee_id, "timestamp": "2024-02-05T09:40:00", "direction": "in", "device_id": "GATE-1"},
+        {"employee_id": employee_id, "timestamp": "2024-02-05T18:50:00", "direction": "out", "device_id": "GATE-1"},
+        {"employee_id": employee_id, "timestamp": "2024-02-05T13:00:00", "device_id": "GATE-2"},
+        {"employee_id": "NO-SUCH-EMPLOYEE", "timestamp": "2024-02-05T09:00:00"},
+        {"employee_id": employee_id, "timestamp": "not-a-time"}
+    ]
+    body = "\n".join(json.dumps(punch) for punch in punches) + "\n{broken json"
+
+    response = requests.post(
+        f"{BASE_URL}/attendance/bulk",
+        data=body.encode(),
+        headers={**headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200, f"Import failed: {response.text}"
+    result = response.json()
+    print(f"   {result['message']}")
+
+    assert result["total_rows"] == 6, f"Expected 6 rows, got {result['total_rows']}"
+    assert result["accepted_punches"] == 3, f"Expected 3 accepted punches, got {result['accepted_punches']}"
+    assert result["days_written"] == 1, f"Expected 1 attendance day, got {result['days_written']}"
+    rejected_rows = sorted(rejection["row"] for rejection in result["rejections"])
+    assert rejected_rows == [4, 5, 6], f"Unexpected rejections: {result['rejections']}"
+    print("✅ Punches paired into one day with per-row rejections")
+
+    # Re-importing the same punches must not create another row
+    response = requests.post(
+        f"{BASE_URL}/attendance/bulk",
+        data=body.encode(),
+        headers={**headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200, f"Re-import failed: {response.text}"
+    response = requests.get(f"{BASE_URL}/attendance/employee/{employee_id}", headers=headers)
+    days = [record for record in response.json() if record["date"] == "2024-02-05"]
+    assert len(days) == 1, f"Expected one attendance row for the day, got {len(days)}"
+    assert days[0]["status"] == "Logged Out", f"Expected Logged Out, got {days[0]['status']}"
+    print(f"✅ Re-import is idempotent ({days[0]['total_hours']} hours recorded)")
+
+def test_csv_import():
+    """Import punches as CSV"""
+    print("\n🕘 Testing CSV punch import")
+    print("=" * 60)
+
+    headers = get_auth_headers()
+    assert headers, "Authentication failed"
+    employee_id = get_any_employee_id(headers)
+
+    body = "\n".join([
+        "employee_id,timestamp,direction",
+        f"{employee_id},2024-02-06T10:05:00,in",
+        f"{employee_id},2024-02-06T19:00:00,out",
+        f"{employee_id},2024-02-07T19:00:00,out",
+        f"{employee_id},2024-02-08T09:30:00,sideways"
+    ])
+
+    response = requests.post(
+        f"{BASE_URL}/attendance/bulk?format=csv",
+        data=body.encode(),
+        headers=headers
+    )
+    assert response.status_code == 200, f"CSV import failed: {response.text}"
+    result = response.json()
+    print(f"   {result['message']}")
+
+    errors = {rejection["row"]: rejection["error"] for rejection in result["rejections"]}
+    assert 4 in errors and "direction" in errors[4], f"Invalid direction not rejected: {errors}"
+    assert 3 in errors and "without a check-in" in errors[3], f"Unpaired check-out not rejected: {errors}"
+    print("✅ CSV import rejected invalid direction and unpaired check-out")
+
+    # Unknown format
+    response = requests.post(f"{BASE_URL}/attendance/bulk?format=xml", data=b"", headers=headers)
+    assert response.status_code == 400, f"Expected 400, got {response.status_code}"
+    print("✅ Correctly rejected unsupported format")
+
+if __name__ == "__main__":
+    print("🚀 Starting Bulk Attendance Tests")
+    test_ndjson_import()
+    test_csv_import()
+    print("\n✅ All bulk attendance tests completed!")
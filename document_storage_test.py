@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Document Storage Testing
+Tests uploads into the blob store and downloads through whichever storage
+backend is configured: a presigned link (format=url) or bytes from the API
+"""
+
+import os
+import requests
+
+# Configuration
+BASE_URL = "https://vishwashrms.preview.emergentagent.com/api"
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin123"
+
+def get_auth_headers():
+    """Authenticate and return authorization headers"""
+    login_data = {"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}
+    response = requests.post(f"{BASE_URL}/auth/login", json=login_data)
+    if response.status_code != 200:
+        print(f"❌ Authentication failed: {response.status_code} - {response.text}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def get_any_employee_id(headers):
+    response = requests.get(f"{BASE_URL}/employees", headers=headers)
+    assert response.status_code == 200, f"Failed to list employees: {response.text}"
+    employees = response.json()
+    assert employees, "No employees available for testing"
+    return employees[0]["employee_id"]
+
+def test_document_round_trip():
+    """An uploaded document downloads back byte for byte, by link or through the API"""
+    print("📁 Testing document storage round trip")
+    print("=" * 60)
+
+    headers = get_auth_headers()
+    assert headers, "Authentication failed"
+    employee_id = get_any_employee_id(headers)
+    content = b"%PDF-1.4\n" + os.urandom(2 * 1024 * 1024)
+
+    document_ids = []
+    for attempt in range(2):
+        response = requests.post(
+            f"{BASE_URL}/employees/{employee_id}/upload-document?document_type=Other",
+            files={"file": ("storage-test.pdf", content, "application/pdf")},
+            headers=headers
+        )
+        assert response.status_code == 200, f"Upload failed: {response.text}"
+        document_ids.append(response.json()["document"]["id"])
+    assert response.json()["deduplicated"], "Second upload of the same content was stored again"
+    print("✅ Same content uploaded twice, stored once")
+
+    download = f"{BASE_URL}/employees/{employee_id}/documents/{document_ids[0]}/download"
+    response = requests.get(f"{download}?format=url", headers=headers)
+    assert response.status_code == 200, f"format=url failed: {response.text}"
+    download_url = response.json()["download_url"]
+    if download_url:
+        # Presigned links carry their own authorization
+        downloaded = requests.get(download_url)
+        print(f"✅ Presigned link issued (expires in {response.json()['expires_in']}s)")
+    else:
+        downloaded = requests.get(download, headers=headers)
+        print("✅ Local backend: no link, the API serves the bytes")
+    assert downloaded.status_code == 200, f"Download failed: {downloaded.status_code}"
+    assert downloaded.content == content, "Downloaded bytes differ from the upload"
+    print(f"✅ Downloaded {len(downloaded.content):,} bytes intact")
+
+    for document_id in document_ids:
+        response = requests.delete(f"{BASE_URL}/employees/{employee_id}/documents/{document_id}", headers=headers)
+        assert response.status_code == 200, f"Delete failed: {response.text}"
+    print("✅ Test documents removed")
+
+if __name__ == "__main__":
+    print("🚀 Starting Document Storage Tests")
+    test_document_round_trip()
+    print("\n✅ All document storage tests completed!")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Document Thumbnail Testing
+Tests background preview generation for uploaded images and the cacheable
+/thumbnail endpoint
+"""
+
+import io
+import time
+import requests
+from PIL import Image
+
+# Configuration
+BASE_URL = "https://vishwashrms.preview.emergentagent.com/api"
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin123"
+
+def get_auth_headers():
+    """Authenticate and return authorization headers"""
+    login_data = {"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}
+    response = requests.post(f"{BASE_URL}/auth/login", json=login_data)
+    if response.status_code != 200:
+        print(f"❌ Authentication failed: {response.status_code} - {response.text}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def get_any_employee_id(headers):
+    response = requests.get(f"{BASE_URL}/employees", headers=headers)
+    assert response.status_code == 200, f"Failed to list employees: {response.text}"
+    employees = response.json()
+    assert employees, "No employees available for testing"
+    return employees[0]["employee_id"]
+
+def wait_for_thumbnail_version(headers, employee_id, document_id, timeout=30):
+    """Poll the document list until the background worker has rendered the preview"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        response = requests.get(f"{BASE_URL}/employees/{employee_id}/documents", headers=headers)
+        assert response.status_code == 200, f"Failed to list documents: {response.text}"
+        document = next(doc for doc in response.json() if doc["id"] == document_id)
+        if document.get("thumbnail_version"):
+            return document["thumbnail_version"]
+        time.sleep(1)
+    return None
+
+def test_image_thumbnail():
+    """An uploaded photo gets a small, long-cached preview"""
+    print("🖼️ Testing document thumbnails")
+    print("=" * 60)
+
+    headers = get_auth_headers()
+    assert headers, "Authentication failed"
+    employee_id = get_any_employee_id(headers)
+
+    image = io.BytesIO()
+    Image.new("RGB", (2400, 1600), (int(time.time()) % 256, 90, 160)).save(image, "JPEG")
+    response = requests.post(
+        f"{BASE_URL}/employees/{employee_id}/upload-document?document_type=ID Proof",
+        files={"file": ("thumbnail-test.jpg", image.getvalue(), "image/jpeg")},
+        headers=headers
+    )
+    assert response.status_code == 200, f"Upload failed: {response.text}"
+    document_id = response.json()["document"]["id"]
+    print("✅ Image uploaded; preview queued")
+
+    version = wait_for_thumbnail_version(headers, employee_id, document_id)
+    assert version, "Thumbnail was not rendered in time"
+    print(f"✅ Preview rendered in the background (version {version})")
+
+    url = f"{BASE_URL}/employees/{employee_id}/documents/{document_id}/thumbnail?v={version}"
+    response = requests.get(url, headers=headers)
+    assert response.status_code == 200, f"Thumbnail failed: {response.status_code}"
+    assert response.headers["content-type"] in ("image/webp", "image/jpeg"), response.headers["content-type"]
+    assert "immutable" in response.headers["cache-control"], "Thumbnail is not long-cached"
+    width, height = Image.open(io.BytesIO(response.content)).size
+    assert max(width, height) <= 320, f"Thumbnail too large: {width}x{height}"
+    print(f"✅ {width}x{height} {response.headers['content-type']}, {len(response.content):,} bytes")
+
+    response = requests.get(url, headers={**headers, "If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304, f"Expected 304, got {response.status_code}"
+    print("✅ Cached preview revalidated with 304 Not Modified")
+
+    response = requests.delete(f"{BASE_URL}/employees/{employee_id}/documents/{document_id}", headers=headers)
+    assert response.status_code == 200, f"Delete failed: {response.text}"
+    print("✅ Test document removed")
+
+if __name__ == "__main__":
+    print("🚀 Starting Document Thumbnail Tests")
+    test_image_thumbnail()
+    print("\n✅ All document thumbnail tests completed!")
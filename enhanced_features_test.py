@@ -273,7 +273,7 @@ class EnhancedHRMSAPITester:
         # Test 3: Download document (if we have uploaded one)
         if self.uploaded_document_id:
             try:
-                response = requests.get(f"{self.base_url}/employees/{test_employee_id}/documents/{self.uploaded_document_id}/download", 
+                response = requests.get(f"{self.base_url}/employees/{test_employee_id}/documents/{self.uploaded_document_id}/download?format=json", 
                                       headers=headers)
                 
                 if response.status_code == 200:
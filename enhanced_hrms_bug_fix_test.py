@@ -244,7 +244,7 @@ class EnhancedHRMSBugFixTester:
         try:
             response = requests.post(
                 f"{self.base_url}/employees/{TEST_EMPLOYEE_ID}/generate-digital-salary-slip",
-                params={"month": TEST_MONTH, "year": TEST_YEAR},
+                params={"format": "json", "month": TEST_MONTH, "year": TEST_YEAR},
                 headers=headers
             )
             
@@ -284,7 +284,7 @@ class EnhancedHRMSBugFixTester:
         try:
             response = requests.post(
                 f"{self.base_url}/employees/INVALID123/generate-digital-salary-slip",
-                params={"month": TEST_MONTH, "year": TEST_YEAR},
+                params={"format": "json", "month": TEST_MONTH, "year": TEST_YEAR},
                 headers=headers
             )
             
@@ -453,7 +453,7 @@ class EnhancedHRMSTester:
         # Test 1: Generate digital salary slip with signature
         try:
             response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-digital-salary-slip", 
-                                   params={"month": current_month, "year": current_year}, headers=headers)
+                                   params={"format": "json", "month": current_month, "year": current_year}, headers=headers)
             
             if response.status_code == 200:
                 slip_data = response.json()
@@ -504,7 +504,7 @@ class EnhancedHRMSTester:
             prev_year = current_year if current_month > 1 else current_year - 1
             
             response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-digital-salary-slip", 
-                                   params={"month": prev_month, "year": prev_year}, headers=headers)
+                                   params={"format": "json", "month": prev_month, "year": prev_year}, headers=headers)
             
             if response.status_code == 200:
                 slip_data = response.json()
@@ -525,7 +525,7 @@ class EnhancedHRMSTester:
         try:
             invalid_employee_id = "INVALID123"
             response = requests.post(f"{self.base_url}/employees/{invalid_employee_id}/generate-digital-salary-slip", 
-                                   params={"month": current_month, "year": current_year}, headers=headers)
+                                   params={"format": "json", "month": current_month, "year": current_year}, headers=headers)
             
             if response.status_code == 404:
                 self.log_result("digital_salary", "Digital Slip Error Handling", True, 
@@ -540,7 +540,7 @@ class EnhancedHRMSTester:
         # Test 4: Test authentication requirement
         try:
             response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-digital-salary-slip", 
-                                   params={"month": current_month, "year": current_year})  # No auth header
+                                   params={"format": "json", "month": current_month, "year": current_year})  # No auth header
             
             if response.status_code == 401 or response.status_code == 403:
                 self.log_result("digital_salary", "Digital Salary Auth Required", True, 
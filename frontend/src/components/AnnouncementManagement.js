@@ -46,7 +46,9 @@ const AnnouncementManagement = ({ currentUser }) => {
 
   const fetchEmployees = async () => {
     try {
-      const response = await axios.get(`${API}/employees`);
+      const response = await axios.get(`${API}/employees`, {
+        params: { status: 'Active', fields: 'employee_id,full_name,department,status' }
+      });
       setEmployees(response.data);
     } catch (error) {
       console.error('Error fetching employees:', error);
@@ -4,6 +4,41 @@ import axios from 'axios';
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// Preview image when the server has rendered one, the type icon otherwise
+const DocumentThumbnail = ({ employeeId, doc, fallback }) => {
+  const [src, setSrc] = useState(null);
+
+  useEffect(() => {
+    setSrc(null);
+    if (!doc.thumbnail_version) {
+      return undefined;
+    }
+    let objectUrl = null;
+    let cancelled = false;
+    // The version in the URL lets the browser keep the preview cached
+    axios.get(
+      `${API}/employees/${employeeId}/documents/${doc.id}/thumbnail?v=${doc.thumbnail_version}`,
+      { responseType: 'blob' }
+    ).then((response) => {
+      if (!cancelled) {
+        objectUrl = window.URL.createObjectURL(response.data);
+        setSrc(objectUrl);
+      }
+    }).catch(() => {});
+    return () => {
+      cancelled = true;
+      if (objectUrl) {
+        window.URL.revokeObjectURL(objectUrl);
+      }
+    };
+  }, [employeeId, doc.id, doc.thumbnail_version]);
+
+  if (!src) {
+    return <span className="text-2xl">{fallback}</span>;
+  }
+  return <img src={src} alt={doc.document_name} className="w-12 h-12 object-cover rounded border border-gray-200" />;
+};
+
 const DocumentManagement = ({ currentUser, employees }) => {
   const [selectedEmployee, setSelectedEmployee] = useState('');
   const [documents, setDocuments] = useState([]);
@@ -73,23 +108,19 @@ const DocumentManagement = ({ currentUser, employees }) => {
 
   const handleDownload = async (employeeId, documentId, documentName) => {
     try {
-      const response = await axios.get(`${API}/employees/${employeeId}/documents/${documentId}/download`);
-      
-      // Convert base64 to blob and download
-      const byteCharacters = atob(response.data.file_data);
-      const byteNumbers = new Array(byteCharacters.length);
-      
-      for (let i = 0; i < byteCharacters.length; i++) {
-        byteNumbers[i] = byteCharacters.charCodeAt(i);
-      }
-      
-      const byteArray = new Uint8Array(byteNumbers);
-      const blob = new Blob([byteArray]);
-      
-      // Create download link
+      const downloadUrl = `${API}/employees/${employeeId}/documents/${documentId}/download`;
       const link = document.createElement('a');
-      link.href = window.URL.createObjectURL(blob);
       link.download = documentName;
+
+      // Object storage hands out a short-lived link, so the file skips the API
+      const urlResponse = await axios.get(`${downloadUrl}?format=url`);
+      if (urlResponse.data.download_url) {
+        link.href = urlResponse.data.download_url;
+      } else {
+        // The file arrives as binary; download it as-is
+        const response = await axios.get(downloadUrl, { responseType: 'blob' });
+        link.href = window.URL.createObjectURL(response.data);
+      }
       link.click();
       
     } catch (error) {
@@ -283,7 +314,11 @@ const DocumentManagement = ({ currentUser, employees }) => {
                 <div key={doc.id} className="bg-gray-50 border-2 border-gray-200 rounded-xl p-5 hover:shadow-md transition-shadow">
                   <div className="flex items-start justify-between mb-3">
                     <div className="flex items-center space-x-3">
-                      <span className="text-2xl">{getDocumentIcon(doc.document_type)}</span>
+                      <DocumentThumbnail
+                        employeeId={selectedEmployee}
+                        doc={doc}
+                        fallback={getDocumentIcon(doc.document_type)}
+                      />
                       <div>
                         <h3 className="font-semibold text-gray-900 text-sm truncate max-w-32">
                           {doc.document_name}
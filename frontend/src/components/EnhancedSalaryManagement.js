@@ -99,28 +99,19 @@ const EnhancedSalaryManagement = ({ currentUser }) => {
     }
 
     try {
-      const response = await axios.post(`${API}/employees/${selectedEmployee}/generate-salary-slip`, {
-        employee_id: selectedEmployee,
-        year: calculationYear,
-        month: calculationMonth
-      });
-      
-      // Convert base64 to blob and download
-      const pdfData = response.data.pdf_data;
-      const byteCharacters = atob(pdfData);
-      const byteNumbers = new Array(byteCharacters.length);
-      
-      for (let i = 0; i < byteCharacters.length; i++) {
-        byteNumbers[i] = byteCharacters.charCodeAt(i);
-      }
+      const response = await axios.get(
+        `${API}/employees/${selectedEmployee}/salary-slips/${calculationYear}/${calculationMonth}`,
+        { responseType: 'blob' }
+      );
       
-      const byteArray = new Uint8Array(byteNumbers);
-      const blob = new Blob([byteArray], { type: 'application/pdf' });
+      // The PDF arrives as binary; use the file name the server suggests
+      const disposition = response.headers['content-disposition'] || '';
+      const filename = disposition.match(/filename="([^"]+)"/)?.[1] || `Salary_Slip_${selectedEmployee}.pdf`;
       
       // Create download link
       const link = document.createElement('a');
-      link.href = window.URL.createObjectURL(blob);
-      link.download = response.data.filename;
+      link.href = window.URL.createObjectURL(response.data);
+      link.download = filename;
       link.click();
       
       alert('Standard salary slip downloaded successfully!');
@@ -263,7 +263,7 @@ class MultiChannelCommunicationTester:
         # Test 1: Generate digital salary slip with signature
         try:
             response = requests.post(f"{self.base_url}/employees/{test_employee_id}/generate-digital-salary-slip", 
-                                   params={"month": 1, "year": 2025}, headers=headers)
+                                   params={"format": "json", "month": 1, "year": 2025}, headers=headers)
             
             if response.status_code == 200:
                 data = response.json()
@@ -302,7 +302,7 @@ class MultiChannelCommunicationTester:
         # Test 2: Test with invalid employee ID
         try:
             response = requests.post(f"{self.base_url}/employees/INVALID123/generate-digital-salary-slip", 
-                                   params={"month": 1, "year": 2025}, headers=headers)
+                                   params={"format": "json", "month": 1, "year": 2025}, headers=headers)
             
             if response.status_code == 404:
                 self.log_result("digital_signature", "Digital Salary Slip - Invalid Employee", True, 
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Month-end Payroll Run API Testing
+Tests payroll run creation, progress polling and paginated results
+"""
+
+import requests
+import time
+
+# Configuration
+BASE_URL = "https://vishwashrms.preview.emergentagent.com/api"
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin123"
+
+def get_auth_headers():
+    """Authenticate and return authorization headers"""
+    login_data = {"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}
+    response = requests.post(f"{BASE_URL}/auth/login", json=login_data)
+    if response.status_code != 200:
+        print(f"❌ Authentication failed: {response.status_code} - {response.text}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_payroll_run():
+    """Start a payroll run, wait for it and page through its results"""
+    print("💰 Testing Month-end Payroll Run")
+    print("=" * 60)
+
+    headers = get_auth_headers()
+    assert headers, "Authentication failed"
+
+    # Invalid month is rejected
+    response = requests.post(f"{BASE_URL}/payroll/runs/2025/13", headers=headers)
+    assert response.status_code == 400, f"Expected 400, got {response.status_code}"
+    print("✅ Correctly rejected invalid month")
+
+    # Start the run
+    response = requests.post(f"{BASE_URL}/payroll/runs/2025/3", headers=headers)
+    assert response.status_code == 200, f"Failed to start run: {response.text}"
+    run = response.json()
+    run_id = run["id"]
+    print(f"✅ Payroll run started: {run_id} ({run['status']})")
+
+    # Poll progress until the run finishes
+    for _ in range(30):
+        response = requests.get(f"{BASE_URL}/payroll/runs/{run_id}", headers=headers)
+        assert response.status_code == 200, f"Failed to fetch run: {response.text}"
+        run = response.json()
+        print(f"   Progress: {run['processed_employees']}/{run['total_employees']} ({run['progress_percentage']}%)")
+        if run["status"] in ["Completed", "Failed"]:
+            break
+        time.sleep(1)
+
+    assert run["status"] == "Completed", f"Payroll run did not complete: {run['error']}"
+    print(f"✅ Payroll run completed - total net salary ₹{run['total_net_salary']:,.2f}")
+
+    # Page through results
+    fetched = 0
+    skip = 0
+    while True:
+        response = requests.get(
+            f"{BASE_URL}/payroll/runs/{run_id}/results",
+            params={"skip": skip, "limit": 50},
+            headers=headers
+        )
+        assert response.status_code == 200, f"Failed to fetch results: {response.text}"
+        page = response.json()
+        fetched += len(page["results"])
+        skip += len(page["results"])
+        if not page["has_more"]:
+            break
+
+    assert fetched == run["processed_employees"], f"Expected {run['processed_employees']} results, got {fetched}"
+    print(f"✅ Retrieved {fetched} employee results through pagination")
+
+    # Compare one result with the single-employee calculation
+    if fetched:
+        first = requests.get(
+            f"{BASE_URL}/payroll/runs/{run_id}/results",
+            params={"limit": 1},
+            headers=headers
+        ).json()["results"][0]
+        response = requests.post(
+            f"{BASE_URL}/employees/{first['employee_id']}/calculate-salary",
+            json={"employee_id": first["employee_id"], "year": 2025, "month": 3},
+            headers=headers
+        )
+        assert response.status_code == 200, f"Failed to calculate salary: {response.text}"
+        single = response.json()["calculation"]
+        assert single["net_salary"] == first["net_salary"], "Payroll run and single calculation differ"
+        print("✅ Payroll run matches single-employee salary calculation")
+
+    # Unknown run
+    response = requests.get(f"{BASE_URL}/payroll/runs/does-not-exist", headers=headers)
+    assert response.status_code == 404, f"Expected 404, got {response.status_code}"
+    print("✅ Correctly returned 404 for unknown payroll run")
+
+if __name__ == "__main__":
+    print("🚀 Starting Payroll Run Tests")
+    test_payroll_run()
+    print("\n✅ All payroll run tests completed!")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Binary PDF Download Testing
+Tests application/pdf responses, range requests, ETag revalidation and the
+legacy base64 JSON variant (format=json)
+"""
+
+import base64
+import requests
+
+# Configuration
+BASE_URL = "https://vishwashrms.preview.emergentagent.com/api"
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin123"
+
+def get_auth_headers():
+    """Authenticate and return authorization headers"""
+    login_data = {"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}
+    response = requests.post(f"{BASE_URL}/auth/login", json=login_data)
+    if response.status_code != 200:
+        print(f"❌ Authentication failed: {response.status_code} - {response.text}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def get_any_employee_id(headers):
+    response = requests.get(f"{BASE_URL}/employees", headers=headers)
+    assert response.status_code == 200, f"Failed to list employees: {response.text}"
+    employees = response.json()
+    assert employees, "No employees available for testing"
+    return employees[0]["employee_id"]
+
+def test_binary_documents():
+    """Generated letters come back as PDF bytes unless format=json is given"""
+    print("📄 Testing binary document responses")
+    print("=" * 60)
+
+    headers = get_auth_headers()
+    assert headers, "Authentication failed"
+    employee_id = get_any_employee_id(headers)
+
+    for document in ["generate-offer-letter", "generate-appointment-letter", "generate-employee-agreement"]:
+        response = requests.post(f"{BASE_URL}/employees/{employee_id}/{document}", headers=headers)
+        assert response.status_code == 200, f"{document} failed: {response.text}"
+        assert response.headers["content-type"] == "application/pdf", f"Unexpected type: {response.headers['content-type']}"
+        assert response.content.startswith(b"%PDF"), f"{document} did not return a PDF"
+        assert int(response.headers["content-length"]) == len(response.content), "Content-Length mismatch"
+        assert "attachment" in response.headers["content-disposition"], "Missing Content-Disposition"
+        print(f"✅ {document}: {len(response.content):,} bytes of application/pdf")
+
+    response = requests.post(f"{BASE_URL}/employees/{employee_id}/generate-offer-letter?format=json", headers=headers)
+    assert response.status_code == 200, f"JSON variant failed: {response.text}"
+    assert base64.b64decode(response.json()["pdf_data"]).startswith(b"%PDF"), "JSON variant lost the PDF"
+    print("✅ format=json still returns the base64 body")
+
+def test_salary_slip_download():
+    """Salary slip GET supports ETag revalidation and byte ranges"""
+    print("\n📄 Testing salary slip download")
+    print("=" * 60)
+
+    headers = get_auth_headers()
+    assert headers, "Authentication failed"
+    employee_id = get_any_employee_id(headers)
+    url = f"{BASE_URL}/employees/{employee_id}/salary-slips/2025/1"
+
+    response = requests.get(url, headers=headers)
+    assert response.status_code == 200, f"Slip download failed: {response.text}"
+    assert response.content.startswith(b"%PDF"), "Slip download did not return a PDF"
+    assert response.headers["accept-ranges"] == "bytes", "Ranges not advertised"
+    etag = response.headers["etag"]
+    full_pdf = response.content
+    print(f"✅ Slip downloaded: {len(full_pdf):,} bytes, ETag {etag}")
+
+    response = requests.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304, f"Expected 304 for a current copy, got {response.status_code}"
+    print("✅ Unchanged slip revalidated with 304 Not Modified")
+
+    response = requests.get(url, headers={**headers, "Range": "bytes=0-99"})
+    assert response.status_code == 206, f"Expected 206, got {response.status_code}"
+    assert response.content == full_pdf[:100], "Range returned the wrong bytes"
+    assert response.headers["content-range"] == f"bytes 0-99/{len(full_pdf)}", response.headers["content-range"]
+    print("✅ First 100 bytes served as 206 Partial Content")
+
+    response = requests.get(url, headers={**headers, "Range": f"bytes={len(full_pdf) + 10}-"})
+    assert response.status_code == 416, f"Expected 416, got {response.status_code}"
+    print("✅ Unsatisfiable range rejected with 416")
+
+    response = requests.get(f"{BASE_URL}/employees/{employee_id}/salary-slips/2025/13", headers=headers)
+    assert response.status_code == 400, f"Expected 400, got {response.status_code}"
+    print("✅ Correctly rejected invalid month")
+
+if __name__ == "__main__":
+    print("🚀 Starting Binary PDF Download Tests")
+    test_binary_documents()
+    test_salary_slip_download()
+    print("\n✅ All PDF download tests completed!")